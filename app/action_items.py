@@ -0,0 +1,51 @@
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger("app.action_items")
+
+TABLE = "action_items"
+
+# ``notes.action_items`` (JSON) stays the source of the Note response shape; these
+# triggers mirror it into the indexed ``action_items`` table on every write,
+# including Core bulk statements and other processes. Items whose position and
+# text survive an update keep their row, id and ``done`` flag.
+SYNC_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS notes_action_items_ai AFTER INSERT ON notes BEGIN
+        INSERT OR IGNORE INTO {TABLE}(note_id, position, text, done)
+        SELECT new.id, j.key, j.value, 0 FROM json_each(new.action_items) AS j WHERE j.type = 'text';
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS notes_action_items_au AFTER UPDATE OF action_items ON notes BEGIN
+        DELETE FROM {TABLE} WHERE note_id = new.id AND NOT EXISTS (
+            SELECT 1 FROM json_each(new.action_items) AS j
+            WHERE j.key = {TABLE}.position AND j.value = {TABLE}.text
+        );
+        INSERT OR IGNORE INTO {TABLE}(note_id, position, text, done)
+        SELECT new.id, j.key, j.value, 0 FROM json_each(new.action_items) AS j WHERE j.type = 'text';
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS notes_action_items_ad AFTER DELETE ON notes BEGIN
+        DELETE FROM {TABLE} WHERE note_id = old.id;
+    END""",
+]
+
+BACKFILL = f"""INSERT OR IGNORE INTO {TABLE}(note_id, position, text, done)
+    SELECT notes.id, j.key, j.value, 0 FROM notes, json_each(notes.action_items) AS j WHERE j.type = 'text'"""
+
+
+def ensure_sync(conn) -> None:
+    """Create the sync triggers, backfilling from ``notes.action_items`` the first time."""
+    if conn.dialect.name != "sqlite":
+        return
+    created = not conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'notes_action_items_ai'")
+    ).first()
+    for ddl in SYNC_DDL:
+        conn.execute(text(ddl))
+    if created:
+        logger.info("Backfilling %s from notes.action_items", TABLE)
+        backfill(conn)
+
+
+def backfill(conn) -> None:
+    """Insert rows for any note items missing from the table (idempotent)."""
+    conn.execute(text(BACKFILL))
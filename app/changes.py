@@ -0,0 +1,164 @@
+"""Append-only change feed for incremental client sync.
+
+SQLite triggers append a row to ``note_changes`` for every insert, update and
+delete on ``notes``. The trigger runs inside the same statement, so it is part
+of the same transaction, and it covers ORM and Core writes from any process
+alike. Deletes leave a tombstone. Updates that do not change the note's
+content (e.g. the embedding rebuild) do not bump ``version``/``updated_at``
+and are not logged.
+
+A client keeps the ``cursor`` of the last batch it applied and asks for what
+came after it, so a sync costs what changed rather than the size of the table.
+``compact`` drops every change that a later change of the same note
+supersedes. A client resuming from any cursor still ends up with each note's
+latest state, and ``since=0`` doubles as a full snapshot.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import event, func, text
+from sqlalchemy.orm import Session, object_session
+
+from . import models, serialization
+
+logger = logging.getLogger("app.changes")
+
+TABLE = "note_changes"
+
+# How often a waiting long-poll or SSE client re-checks the table; writes made
+# through this process wake it sooner
+CHANGES_POLL_INTERVAL = float(os.getenv("CHANGES_POLL_INTERVAL", "0.5"))
+
+_NOW = "((julianday('now') - 2440587.5) * 86400.0)"
+
+SYNC_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS notes_changes_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO {TABLE}(note_id, op, version, changed_at) VALUES (new.id, 'create', new.version, {_NOW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS notes_changes_au AFTER UPDATE ON notes
+    WHEN old.version IS NOT new.version OR old.updated_at IS NOT new.updated_at BEGIN
+        INSERT INTO {TABLE}(note_id, op, version, changed_at) VALUES (new.id, 'update', new.version, {_NOW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS notes_changes_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO {TABLE}(note_id, op, version, changed_at) VALUES (old.id, 'delete', old.version, {_NOW});
+    END""",
+]
+
+BACKFILL = f"""INSERT INTO {TABLE}(note_id, op, version, changed_at)
+    SELECT id, 'create', version, coalesce(updated_at, {_NOW}) FROM notes ORDER BY id"""
+
+COMPACT = f"""DELETE FROM {TABLE} WHERE seq < (
+    SELECT max(later.seq) FROM {TABLE} AS later WHERE later.note_id = {TABLE}.note_id
+)"""
+
+
+def ensure_sync(conn) -> None:
+    """Create the triggers, logging a ``create`` for every existing note the first time."""
+    if conn.dialect.name != "sqlite":
+        return
+    created = not conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'notes_changes_ai'")
+    ).first()
+    for ddl in SYNC_DDL:
+        conn.execute(text(ddl))
+    if created:
+        logger.info("Seeding %s from existing notes", TABLE)
+        conn.execute(text(BACKFILL))
+
+
+def compact(conn) -> int:
+    """Delete changes superseded by a later change of the same note; returns how many went."""
+    return conn.execute(text(COMPACT)).rowcount
+
+
+def head(db: Session) -> int:
+    """Sequence number of the newest change, 0 when there is none."""
+    return db.query(func.max(models.NoteChange.seq)).scalar() or 0
+
+
+def read(db: Session, since: int, limit: int) -> Dict:
+    """Up to ``limit`` changes after ``since``, with each note's current state.
+
+    Changes to the same note within the batch collapse into the newest one. A
+    note deleted after the batch's change is reported as a delete already;
+    its tombstone follows in a later batch.
+    """
+    rows = (
+        db.query(models.NoteChange)
+        .filter(models.NoteChange.seq > since)
+        .order_by(models.NoteChange.seq)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    latest: Dict[int, models.NoteChange] = {}
+    for row in rows:
+        latest.pop(row.note_id, None)
+        latest[row.note_id] = row
+
+    live = [note_id for note_id, row in latest.items() if row.op != "delete"]
+    notes = {}
+    if live:
+        found = [dict(r._mapping) for r in db.query(*serialization.NOTE_COLUMNS).filter(models.Note.id.in_(live))]
+        notes = {item["id"]: item for item in serialization.NOTE_ROWS.dump_python(found, mode="json")}
+
+    changes: List[Dict] = []
+    for note_id, row in latest.items():
+        note = notes.get(note_id)
+        op = row.op if note is not None else "delete"
+        changes.append({
+            "seq": row.seq, "op": op, "note_id": note_id, "version": row.version,
+            "changed_at": row.changed_at, "note": note,
+        })
+    return {"changes": changes, "cursor": rows[-1].seq if rows else since, "has_more": has_more}
+
+
+# -------------------- Waking waiters --------------------
+
+_waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+_CHANGED = "notes_changed"
+
+
+def notify() -> None:
+    """Wake every client waiting for changes in this process."""
+    for loop, waiter in list(_waiters):
+        loop.call_soon_threadsafe(waiter.set)
+
+
+async def wait(timeout: float) -> bool:
+    """Wait up to ``timeout`` seconds for ``notify``; True when woken."""
+    waiter = asyncio.Event()
+    entry = (asyncio.get_running_loop(), waiter)
+    _waiters.add(entry)
+    try:
+        await asyncio.wait_for(waiter.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        _waiters.discard(entry)
+
+
+def _mark(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info[_CHANGED] = True
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(models.Note, _event, _mark)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_committed(session):
+    # Core bulk statements and other processes are picked up by polling instead
+    if session.info.pop(_CHANGED, False):
+        notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop(_CHANGED, None)
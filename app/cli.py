@@ -0,0 +1,68 @@
+"""Maintenance commands: ``python -m app.cli <command>``.
+
+    migrate             create missing tables, columns, indexes and triggers
+    rebuild-search      re-index every note in the full-text search table
+    rebuild-embeddings  recompute every note's stored embedding vector
+    rebuild-stats       recompute the dashboard counts in note_stats from scratch
+    compact-changes     drop change-feed entries superseded by a later change of the same note
+"""
+import argparse
+import logging
+
+from . import changes, embeddings, migrations, search, stats
+from .database import SessionLocal, engine
+
+logger = logging.getLogger("app.cli")
+
+
+def migrate() -> None:
+    migrations.upgrade(engine)
+
+
+def rebuild_search() -> None:
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        search.rebuild(conn)
+
+
+def rebuild_embeddings() -> None:
+    migrations.upgrade(engine)
+    db = SessionLocal()
+    try:
+        logger.info("Embedded %d notes", embeddings.rebuild(db))
+    finally:
+        db.close()
+
+
+def rebuild_stats() -> None:
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        stats.rebuild(conn)
+
+
+def compact_changes() -> None:
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        logger.info("Removed %d superseded changes", changes.compact(conn))
+
+
+COMMANDS = {
+    "migrate": migrate,
+    "rebuild-search": rebuild_search,
+    "rebuild-embeddings": rebuild_embeddings,
+    "rebuild-stats": rebuild_stats,
+    "compact-changes": compact_changes,
+}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Notes API maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    COMMANDS[args.command]()
+    logger.info("%s: done", args.command)
+
+
+if __name__ == "__main__":
+    main()
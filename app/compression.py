@@ -0,0 +1,212 @@
+"""Response compression negotiated from ``Accept-Encoding``.
+
+``CompressionMiddleware`` encodes responses with the best codec both sides
+support, in ``COMPRESSION_ENCODINGS`` preference order: zstd (``zstandard``
+package) and brotli (``brotli`` package) when installed, gzip always.
+
+- Bodies under ``COMPRESSION_MIN_SIZE`` bytes are sent as they are: the
+  framing overhead would outweigh the savings.
+- Streamed bodies (NDJSON exports) are compressed chunk by chunk and flushed
+  after each one, so clients still receive rows as they are produced.
+  Server-sent events and already-compressed media types are left alone.
+- Chunks of ``COMPRESSION_THREAD_MIN_SIZE`` bytes or more are compressed in a
+  worker thread so a large page does not stall the event loop (zlib, brotli
+  and zstd release the GIL while they work).
+
+A compressed response's strong ``ETag`` becomes weak (``W/``), since its bytes
+differ from the identity encoding; ``If-None-Match`` accepts either form.
+"""
+import importlib.util
+import os
+import zlib
+from typing import Callable, Dict, List, Optional
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+
+COMPRESSION_ENCODINGS = [
+    name.strip() for name in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if name.strip()
+]
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_THREAD_MIN_SIZE = int(os.getenv("COMPRESSION_THREAD_MIN_SIZE", str(64 * 1024)))
+
+# Speed-oriented levels: within a few percent of the best ratio at a fraction of the CPU
+LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+
+EXCLUDED_TYPES = ("text/event-stream", "image/", "audio/", "video/", "application/zip", "application/gzip")
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, level: int):
+        import brotli
+
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def _gzip_once(data: bytes, level: int) -> bytes:
+    obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return obj.compress(data) + obj.flush()
+
+
+def _brotli_once(data: bytes, level: int) -> bytes:
+    import brotli
+
+    return brotli.compress(data, quality=level)
+
+
+def _zstd_once(data: bytes, level: int) -> bytes:
+    import zstandard
+
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+# Content-Encoding token -> (module it needs, streaming compressor, one-shot compress)
+CODECS: Dict[str, tuple] = {
+    "gzip": (None, _Gzip, _gzip_once),
+    "br": ("brotli", _Brotli, _brotli_once),
+    "zstd": ("zstandard", _Zstd, _zstd_once),
+}
+
+
+def available_encodings() -> List[str]:
+    """Configured encodings whose library is installed, in preference order."""
+    return [
+        name for name in COMPRESSION_ENCODINGS
+        if name in CODECS and (CODECS[name][0] is None or importlib.util.find_spec(CODECS[name][0]))
+    ]
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    return CODECS[encoding][2](data, LEVELS[encoding] if level is None else level)
+
+
+def choose_encoding(accept_encoding: Optional[str], available: List[str]) -> Optional[str]:
+    """The available encoding the client rates highest (``q``), server preference on ties."""
+    if not accept_encoding:
+        return None
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, *params = [piece.strip() for piece in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if token:
+            qualities[token.lower()] = quality
+    best, best_quality = None, 0.0
+    for name in available:
+        quality = qualities.get(name, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    return not any(content_type.startswith(excluded) for excluded in EXCLUDED_TYPES)
+
+
+async def _run(fn: Callable[..., bytes], *args) -> bytes:
+    if len(args[0]) >= COMPRESSION_THREAD_MIN_SIZE:
+        return await anyio.to_thread.run_sync(fn, *args)
+    return fn(*args)
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware: holds the response start until the first body chunk decides the encoding."""
+
+    def __init__(self, app):
+        self.app = app
+        self.available = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"), self.available)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Dict = {}
+        state = {"compressor": None, "identity": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                return
+            if message["type"] != "http.response.body" or state["identity"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            compressor = state["compressor"]
+            if compressor is not None:
+                data = await _run(compressor.compress, body) if body else b""
+                if not more:
+                    data += compressor.finish()
+                await send({"type": "http.response.body", "body": data, "more_body": more})
+                return
+
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            if not _compressible(headers) or (not more and len(body) < COMPRESSION_MIN_SIZE):
+                state["identity"] = True
+                await send(start)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            level = LEVELS[encoding]
+            if more:
+                del headers["content-length"]
+                state["compressor"] = compressor = CODECS[encoding][1](level)
+                data = await _run(compressor.compress, body) if body else b""
+            else:
+                data = await _run(CODECS[encoding][2], body, level)
+                headers["Content-Length"] = str(len(data))
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,26 +1,130 @@
 import os
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import StaticPool
+from . import metrics
 
 # Allow overriding the DB URL (used by tests)
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 
+# Serve the hot routes with async handlers, AsyncSession and AsyncOpenAI
+ASYNC_MODE = os.getenv("ASYNC_MODE", "").lower() in ("1", "true", "yes")
+
+# "performance" applies WAL and the pragmas below on every new connection;
+# "default" leaves SQLite's stock settings (rollback journal, synchronous=FULL)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "performance").lower()
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-64000")),  # negative = KiB, i.e. 64 MB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": "MEMORY",
+}
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+DB_READ_MAX_OVERFLOW = int(os.getenv("DB_READ_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+def apply_sqlite_profile(engine, read_only: bool = False) -> None:
+    """Apply the performance pragmas to every connection ``engine`` opens.
+
+    Read connections additionally get ``query_only`` so a GET route can never
+    take the write lock.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = dict(SQLITE_PRAGMAS) if SQLITE_PROFILE == "performance" else {}
+    if engine.url.database in (None, "", ":memory:"):
+        # WAL and mmap do not apply to in-memory databases
+        pragmas.pop("journal_mode", None)
+        pragmas.pop("mmap_size", None)
+    if read_only:
+        pragmas["query_only"] = "ON"
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+_SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "PRAGMA", "CREATE", "ALTER", "DROP", "BEGIN", "COMMIT"}
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement ``engine`` executes into ``db_query_duration_seconds``."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        operation = statement.lstrip()[:8].split(None, 1)[0].upper() if statement.strip() else ""
+        metrics.DB_QUERY_DURATION.observe(elapsed, operation if operation in _SQL_OPERATIONS else "OTHER")
+        metrics.add_db_time(elapsed)
+
+
+# In async mode an in-memory database is a named shared-cache one, so the sync
+# engine (bulk, search, stats, changes, idempotency...) and the aiosqlite
+# engine open the same database instead of two unrelated ones
+SHARED_MEMORY_URL = f"sqlite+pysqlite:///file:notes-{os.getpid()}?mode=memory&cache=shared&uri=true"
+
 if ":memory:" in SQLALCHEMY_DATABASE_URL:
     # Keep the in-memory DB alive across connections (needed for tests)
     engine = create_engine(
-        "sqlite+pysqlite:///:memory:",
+        SHARED_MEMORY_URL if ASYNC_MODE else "sqlite+pysqlite:///:memory:",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
+    # There is only one connection, so reads share it with writes
+    read_engine = engine
+    apply_sqlite_profile(engine)
+    instrument_engine(engine)
 else:
     engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    # Separate pool for GET routes: under WAL readers never block on the writer,
+    # and a busy write pool cannot starve them of connections
+    read_engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=DB_READ_POOL_SIZE,
+        max_overflow=DB_READ_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
     )
+    apply_sqlite_profile(engine)
+    apply_sqlite_profile(read_engine, read_only=True)
+    instrument_engine(engine)
+    instrument_engine(read_engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 Base = declarative_base()
 
+# Created by init_async_engine() only in async mode, so aiosqlite stays optional
+async_engine = None
+AsyncSessionLocal = None
+
 
 def get_db():
     db = SessionLocal()
@@ -28,3 +132,50 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Session on the read-only pool, for routes that never write."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def async_url(url: str) -> str:
+    """Map a sync SQLite URL onto the aiosqlite driver."""
+    if url.startswith("sqlite+pysqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite+pysqlite://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+def init_async_engine(url: str = SQLALCHEMY_DATABASE_URL):
+    global async_engine, AsyncSessionLocal
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    if ":memory:" in url:
+        # The sync engine's shared-cache database; tables are created from the app lifespan
+        async_engine = create_async_engine(async_url(SHARED_MEMORY_URL), poolclass=StaticPool)
+    else:
+        async_engine = create_async_engine(
+            async_url(url),
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    apply_sqlite_profile(async_engine.sync_engine)
+    instrument_engine(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return async_engine
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+if ASYNC_MODE:
+    init_async_engine()
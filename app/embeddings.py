@@ -0,0 +1,330 @@
+"""Offline note embeddings and an in-memory cosine similarity index.
+
+Vectors come from a deterministic feature-hashing vectorizer (word unigrams and
+bigrams, signed buckets, sublinear term frequency, L2-normalised), so they need
+no model download, no fitting pass and are stable across processes. Each note
+stores its vector as a float32 blob in ``notes.embedding``; the index keeps all
+of them in one contiguous matrix and answers top-k queries with a single
+matrix-vector product.
+
+ORM writes keep blob and index current through mapper/session events; the
+bulk endpoints, whose statements skip those events, call ``embed_rows``,
+``embed_updates``, ``set_vectors`` and ``forget`` themselves. Writes from other
+processes are picked up when the index is reloaded, at most
+``EMBEDDING_INDEX_TTL_SECONDS`` later.
+"""
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, event, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from . import database, models
+
+# numpy is imported on first use: every process imports this module through the
+# ORM hooks, but only note writes and similarity queries need vectors
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger("app.embeddings")
+
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "512"))
+EMBEDDING_INDEX_TTL_SECONDS = float(os.getenv("EMBEDDING_INDEX_TTL_SECONDS", "300"))
+# Title words count this many times as much as description words
+TITLE_WEIGHT = 2.0
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "we our you your i me my they them their he she his her".split()
+)
+
+# Session.info key collecting (note_id, vector or None) changes until commit
+_PENDING = "embedding_changes"
+
+
+def _tokens(text: Optional[str]) -> List[str]:
+    words = [w for w in _TOKEN_RE.findall((text or "").lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def embed(title: Optional[str], description: Optional[str] = None) -> "np.ndarray":
+    """Hash ``title`` and ``description`` into a unit-length float32 vector (all zeros if no tokens)."""
+    import numpy as np
+
+    weights: Dict[str, float] = Counter()
+    for token, count in Counter(_tokens(title)).items():
+        weights[token] += TITLE_WEIGHT * (1.0 + math.log(count))
+    for token, count in Counter(_tokens(description)).items():
+        weights[token] += 1.0 + math.log(count)
+
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token, weight in weights.items():
+        digest = zlib.crc32(token.encode("utf-8"))
+        # Low bits pick the bucket, the top bit the sign, so collisions tend to cancel
+        vector[digest % EMBEDDING_DIM] += weight if digest & 0x80000000 else -weight
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def to_blob(vector: "np.ndarray") -> bytes:
+    import numpy as np
+
+    return vector.astype(np.float32).tobytes()
+
+
+def from_blob(blob: Optional[bytes]) -> Optional["np.ndarray"]:
+    import numpy as np
+
+    if not blob or len(blob) != EMBEDDING_DIM * 4:
+        return None  # missing, or written with another EMBEDDING_DIM
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+def embed_rows(rows: List[dict]) -> List["np.ndarray"]:
+    """Set ``embedding`` on insert payload dicts (bulk paths that skip ORM events)."""
+    vectors = [embed(row.get("title"), row.get("description")) for row in rows]
+    for row, vector in zip(rows, vectors):
+        row["embedding"] = to_blob(vector)
+    return vectors
+
+
+def embed_updates(db: Session, rows: List[dict]) -> List[Tuple[int, "np.ndarray"]]:
+    """Set ``embedding`` on bulk update payloads that change the title or description.
+
+    Unchanged fields are read from the database so the vector covers both.
+    """
+    changed = [row for row in rows if "title" in row or "description" in row]
+    if not changed:
+        return []
+    stmt = select(models.Note.id, models.Note.title, models.Note.description).where(
+        models.Note.id.in_([row["id"] for row in changed])
+    )
+    current = {r.id: r for r in db.execute(stmt)}
+    vectors = []
+    for row in changed:
+        stored = current.get(row["id"])
+        if stored is None:
+            continue
+        vector = embed(row.get("title", stored.title), row.get("description", stored.description))
+        row["embedding"] = to_blob(vector)
+        vectors.append((row["id"], vector))
+    return vectors
+
+
+class EmbeddingIndex:
+    """Thread-safe id -> vector matrix with cosine top-k.
+
+    Rows live in a preallocated float32 array grown by doubling; removal swaps
+    the last row into the hole, so the live rows are always ``[:size]``.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self._matrix: Optional["np.ndarray"] = None  # allocated by the first upsert or load
+        self._ids: List[int] = []
+        self._rows: Dict[int, int] = {}
+        self._lock = threading.RLock()
+        self.loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _reserve(self, capacity: int) -> None:
+        import numpy as np
+
+        allocated = 0 if self._matrix is None else self._matrix.shape[0]
+        if self._matrix is not None and capacity <= allocated:
+            return
+        grown = np.zeros((max(capacity, 2 * allocated, 64), self.dim), dtype=np.float32)
+        if self._ids:
+            grown[: len(self._ids)] = self._matrix[: len(self._ids)]
+        self._matrix = grown
+
+    def upsert(self, note_id: int, vector: "np.ndarray") -> None:
+        with self._lock:
+            row = self._rows.get(note_id)
+            if row is None:
+                row = len(self._ids)
+                self._reserve(row + 1)
+                self._ids.append(note_id)
+                self._rows[note_id] = row
+            self._matrix[row] = vector
+
+    def remove(self, note_id: int) -> None:
+        with self._lock:
+            row = self._rows.pop(note_id, None)
+            if row is None:
+                return
+            last = len(self._ids) - 1
+            if row != last:
+                moved = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved
+                self._rows[moved] = row
+            self._ids.pop()
+
+    def vector(self, note_id: int) -> Optional["np.ndarray"]:
+        with self._lock:
+            row = self._rows.get(note_id)
+            return None if row is None else self._matrix[row].copy()
+
+    def top_k(self, query: "np.ndarray", k: int, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """The ``k`` most similar ids with their cosine scores (vectors are unit length)."""
+        import numpy as np
+
+        with self._lock:
+            size = len(self._ids)
+            if size == 0 or not query.any():
+                return []
+            scores = self._matrix[:size] @ query
+            if exclude is not None and exclude in self._rows:
+                scores[self._rows[exclude]] = -np.inf
+            k = min(k, size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self._ids[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def load(self, db: Session, batch_size: int = 1000) -> None:
+        """Replace the contents with every note's stored vector, embedding any that lack one."""
+        import numpy as np
+
+        ids: List[int] = []
+        vectors: List["np.ndarray"] = []
+        stmt = select(models.Note.id, models.Note.embedding, models.Note.title, models.Note.description)
+        for row in db.execute(stmt.execution_options(yield_per=batch_size)):
+            vector = from_blob(row.embedding)
+            ids.append(row.id)
+            vectors.append(vector if vector is not None else embed(row.title, row.description))
+        with self._lock:
+            self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+            self._reserve(len(ids))
+            if ids:
+                self._matrix[: len(ids)] = np.vstack(vectors)
+            self._ids = ids
+            self._rows = {note_id: i for i, note_id in enumerate(ids)}
+            self.loaded_at = time.time()
+        logger.info("Loaded %d note embeddings", len(ids))
+
+    def ensure_loaded(self, session_factory: Callable[[], Session]) -> None:
+        """Load on first use and again once the TTL has passed (to see other processes' writes)."""
+        with self._lock:
+            fresh = self.loaded_at is not None and (
+                EMBEDDING_INDEX_TTL_SECONDS <= 0 or time.time() - self.loaded_at < EMBEDDING_INDEX_TTL_SECONDS
+            )
+            if fresh:
+                return
+            db = session_factory()
+            try:
+                self.load(db)
+            finally:
+                db.close()
+
+
+index = EmbeddingIndex()
+
+
+def set_vectors(items: Iterable[Tuple[int, "np.ndarray"]]) -> None:
+    """Apply committed vectors to the index if it is loaded (otherwise the next load reads them)."""
+    if index.loaded_at is None:
+        return
+    for note_id, vector in items:
+        index.upsert(note_id, vector)
+
+
+def forget(note_ids: Iterable[int]) -> None:
+    for note_id in note_ids:
+        index.remove(note_id)
+
+
+def nearest(vector: "np.ndarray", limit: int, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+    index.ensure_loaded(database.ReadSessionLocal)
+    return index.top_k(vector, limit, exclude=exclude)
+
+
+def search(text: str, limit: int) -> List[Tuple[int, float]]:
+    """Notes closest to free text, as (note id, cosine score) pairs."""
+    return nearest(embed(None, text), limit)
+
+
+def rebuild(db: Session, batch_size: int = 500) -> int:
+    """Recompute and store every note's embedding; returns the number of notes updated."""
+    count = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(models.Note.id, models.Note.title, models.Note.description)
+            .where(models.Note.id > last_id)
+            .order_by(models.Note.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        table = models.Note.__table__
+        # Setting version/updated_at to themselves suppresses their onupdate: content is unchanged
+        db.execute(
+            table.update()
+            .where(table.c.id == bindparam("note_id"))
+            .values(embedding=bindparam("blob"), version=table.c.version, updated_at=table.c.updated_at),
+            [{"note_id": r.id, "blob": to_blob(embed(r.title, r.description))} for r in rows],
+        )
+        db.commit()
+        count += len(rows)
+        last_id = rows[-1].id
+    index.loaded_at = None
+    return count
+
+
+# -------------------- ORM hooks --------------------
+
+
+def _queue(target: models.Note, vector: Optional["np.ndarray"]) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING, []).append((target.id, vector))
+
+
+@event.listens_for(models.Note, "before_insert")
+def _embed_new_note(mapper, connection, target):
+    target.embedding = to_blob(embed(target.title, target.description))
+
+
+@event.listens_for(models.Note, "before_update")
+def _embed_changed_note(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.title.history.has_changes() or state.attrs.description.history.has_changes():
+        target.embedding = to_blob(embed(target.title, target.description))
+
+
+@event.listens_for(models.Note, "after_insert")
+@event.listens_for(models.Note, "after_update")
+def _queue_vector(mapper, connection, target):
+    vector = from_blob(target.__dict__.get("embedding"))
+    if vector is not None:
+        _queue(target, vector)
+
+
+@event.listens_for(models.Note, "after_delete")
+def _queue_removal(mapper, connection, target):
+    _queue(target, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    changes = session.info.pop(_PENDING, None)
+    if not changes:
+        return
+    set_vectors((note_id, vector) for note_id, vector in changes if vector is not None)
+    forget(note_id for note_id, vector in changes if vector is None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session):
+    session.info.pop(_PENDING, None)
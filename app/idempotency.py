@@ -0,0 +1,312 @@
+"""``Idempotency-Key`` support for the create and AI endpoints.
+
+Clients that time out and retry ``POST /notes/`` or ``POST /notes/ai-note``
+would otherwise create a duplicate note and pay for a second LLM call. With
+an ``Idempotency-Key`` header, ``IdempotencyMiddleware`` claims the key in the
+``idempotency_keys`` table before the request reaches the router, and stores
+the response when it completes.
+
+- A retry of a completed request gets the stored response replayed, with
+  ``Idempotent-Replayed: true``. Neither the route, the database write path
+  nor OpenAI is involved.
+- A retry that arrives while the original is still running waits for its
+  result, for up to ``IDEMPOTENCY_WAIT_SECONDS``, then gets ``409`` with
+  ``Retry-After``. Completions in this process wake waiters at once; other
+  workers' are noticed by polling the table with read-only SELECTs.
+- Reusing a key for a different request (method, path, query or body) is
+  rejected with ``422``.
+- 5xx responses and requests that raise are not stored, so the key can be
+  retried. A client that disconnects does not stop the original request,
+  and its response is still stored for the retry.
+
+Keys expire after ``IDEMPOTENCY_TTL_SECONDS``. A claim left behind by a
+crashed worker is taken over after ``IDEMPOTENCY_PENDING_TIMEOUT`` seconds.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from . import database, metrics
+
+logger = logging.getLogger("app.idempotency")
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "60"))
+IDEMPOTENCY_PENDING_TIMEOUT = float(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT", "300"))
+IDEMPOTENCY_POLL_INTERVAL = float(os.getenv("IDEMPOTENCY_POLL_INTERVAL", "0.25"))
+
+# Bulk endpoints are left out: their bodies can be large NDJSON streams, and
+# each item already reports its own result
+IDEMPOTENT_ROUTES = frozenset({
+    ("POST", "/notes/"),
+    ("POST", "/notes/ai-note"),
+    ("POST", "/notes/ai-action-items"),
+    ("POST", "/notes/ai-action-items/batch"),
+})
+
+MAX_KEY_LENGTH = 255
+# How often expired keys are deleted, at most
+PURGE_INTERVAL = 60.0
+
+TABLE = "idempotency_keys"
+
+
+_SELECT = text(f"SELECT fingerprint, status_code, headers, body, created_at, expires_at FROM {TABLE} WHERE key = :key")
+
+
+def _state(row, fingerprint: str, now: float) -> str:
+    """What a stored key means for a request: ``"stale"``, ``"mismatch"``, ``"done"`` or ``"pending"``."""
+    abandoned = row["status_code"] is None and now - row["created_at"] >= IDEMPOTENCY_PENDING_TIMEOUT
+    if row["expires_at"] <= now or abandoned:
+        return "stale"
+    if row["fingerprint"] != fingerprint:
+        return "mismatch"
+    return "done" if row["status_code"] is not None else "pending"
+
+
+def _select(conn, key: str) -> Optional[dict]:
+    row = conn.execute(_SELECT, {"key": key}).mappings().first()
+    return dict(row) if row is not None else None
+
+
+def _complete(conn, key: str, status_code: int, headers: List[List[str]], body: bytes) -> None:
+    conn.execute(
+        text(f"UPDATE {TABLE} SET status_code = :status, headers = :headers, body = :body WHERE key = :key"),
+        {"key": key, "status": status_code, "headers": json.dumps(headers), "body": body},
+    )
+
+
+def _release(conn, key: str) -> None:
+    conn.execute(text(f"DELETE FROM {TABLE} WHERE key = :key AND status_code IS NULL"), {"key": key})
+
+
+def _on_connection(engine, read_only: bool, fn, *args):
+    with (engine.connect() if read_only else engine.begin()) as conn:
+        return fn(conn, *args)
+
+
+class IdempotencyStore:
+    """Claims, completions and lookups of keys in ``idempotency_keys``.
+
+    By default the store uses the engine the note routes write with, looked up
+    on each call: ``database.async_engine`` in ASYNC_MODE, otherwise
+    ``database.engine`` in the threadpool, with ``database.read_engine``
+    serving ``poll`` so waiting retries do not queue on SQLite's write lock.
+    Passing ``engine`` (and optionally ``read_engine``) pins sync engines.
+    """
+
+    def __init__(self, engine=None, read_engine=None):
+        self.engine = engine
+        self.read_engine = read_engine if read_engine is not None else engine
+        self._purged_at = 0.0
+
+    async def _execute(self, fn, *args, read_only: bool = False):
+        if self.engine is None and database.ASYNC_MODE:
+            engine = database.async_engine
+            async with (engine.connect() if read_only else engine.begin()) as conn:
+                return await conn.run_sync(fn, *args)
+        if self.engine is None:
+            engine = database.read_engine if read_only else database.engine
+        else:
+            engine = self.read_engine if read_only else self.engine
+        return await run_in_threadpool(_on_connection, engine, read_only, fn, *args)
+
+    def _claim(self, conn, key: str, fingerprint: str) -> Tuple[str, Optional[dict]]:
+        now = time.time()
+        if now - self._purged_at >= PURGE_INTERVAL:
+            self._purged_at = now
+            conn.execute(text(f"DELETE FROM {TABLE} WHERE expires_at < :now"), {"now": now})
+        inserted = conn.execute(
+            text(f"""INSERT INTO {TABLE}(key, fingerprint, created_at, expires_at)
+                VALUES (:key, :fingerprint, :now, :expires) ON CONFLICT(key) DO NOTHING"""),
+            {"key": key, "fingerprint": fingerprint, "now": now, "expires": now + IDEMPOTENCY_TTL_SECONDS},
+        ).rowcount
+        if inserted:
+            return "claimed", None
+        row = _select(conn, key)
+        if row is None:
+            return "pending", None  # released in between; the caller retries
+        state = _state(row, fingerprint, now)
+        if state == "stale":
+            # Take over, unless another request did since the SELECT
+            taken = conn.execute(
+                text(f"""UPDATE {TABLE} SET fingerprint = :fingerprint, status_code = NULL, headers = NULL,
+                    body = NULL, created_at = :now, expires_at = :expires
+                    WHERE key = :key AND created_at = :created_at"""),
+                {"key": key, "fingerprint": fingerprint, "now": now,
+                 "expires": now + IDEMPOTENCY_TTL_SECONDS, "created_at": row["created_at"]},
+            ).rowcount
+            return ("claimed", None) if taken else ("pending", row)
+        return state, row
+
+    async def claim(self, key: str, fingerprint: str) -> Tuple[str, Optional[dict]]:
+        """``("claimed", None)`` or ``("done" | "pending" | "mismatch", row)``."""
+        return await self._execute(self._claim, key, fingerprint)
+
+    async def poll(self, key: str, fingerprint: str) -> Tuple[str, Optional[dict]]:
+        """Like ``claim``, but reads first: only a released or stale key is claimed in a write transaction."""
+        row = await self._execute(_select, key, read_only=True)
+        if row is not None:
+            state = _state(row, fingerprint, time.time())
+            if state != "stale":
+                return state, row
+        return await self.claim(key, fingerprint)
+
+    async def complete(self, key: str, status_code: int, headers: List[List[str]], body: bytes) -> None:
+        await self._execute(_complete, key, status_code, headers, body)
+
+    async def release(self, key: str) -> None:
+        await self._execute(_release, key)
+
+
+def fingerprint(scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+# -------------------- Waking waiters --------------------
+
+_waiters: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+
+def _wake(key: str) -> None:
+    for loop, waiter in list(_waiters.get(key, ())):
+        loop.call_soon_threadsafe(waiter.set)
+
+
+async def _wait(key: str, timeout: float) -> None:
+    waiter = asyncio.Event()
+    entry = (asyncio.get_running_loop(), waiter)
+    _waiters.setdefault(key, set()).add(entry)
+    try:
+        await asyncio.wait_for(waiter.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        entries = _waiters.get(key)
+        if entries is not None:
+            entries.discard(entry)
+            if not entries:
+                _waiters.pop(key, None)
+
+
+class IdempotencyMiddleware:
+    """Pure ASGI middleware: claim the key, then run the request once or replay its stored response."""
+
+    def __init__(self, app, store: Optional[IdempotencyStore] = None):
+        self.app = app
+        self.store = store or IdempotencyStore()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in IDEMPOTENT_ROUTES:
+            await self.app(scope, receive, send)
+            return
+        key = Headers(scope=scope).get("idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key.strip() or len(key) > MAX_KEY_LENGTH:
+            await JSONResponse(
+                {"detail": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"}, status_code=400
+            )(scope, receive, send)
+            return
+
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return  # client went away before sending the body
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        expected = fingerprint(scope, body)
+
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        waited = False
+        outcome, row = await self.store.claim(key, expected)
+        while True:
+            if outcome == "claimed":
+                metrics.IDEMPOTENCY_REQUESTS.inc("retried" if waited else "new")
+                await self._run(key, body, scope, receive, send)
+                return
+            if outcome == "mismatch":
+                metrics.IDEMPOTENCY_REQUESTS.inc("mismatch")
+                await JSONResponse(
+                    {"detail": "Idempotency-Key was already used for a different request"}, status_code=422
+                )(scope, receive, send)
+                return
+            if outcome == "done":
+                metrics.IDEMPOTENCY_REQUESTS.inc("replayed")
+                await self._replay(row, send)
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                metrics.IDEMPOTENCY_REQUESTS.inc("conflict")
+                await JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still in progress"},
+                    status_code=409,
+                    headers={"Retry-After": str(max(1, round(IDEMPOTENCY_POLL_INTERVAL * 4)))},
+                )(scope, receive, send)
+                return
+            waited = True
+            await _wait(key, min(IDEMPOTENCY_POLL_INTERVAL, remaining))
+            outcome, row = await self.store.poll(key, expected)
+
+    async def _run(self, key: str, body: bytes, scope, receive, send) -> None:
+        delivered = False
+
+        async def replay_receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = {"status": 500, "headers": [], "body": [], "store": True}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [[k.decode("latin-1"), v.decode("latin-1")] for k, v in message.get("headers", [])]
+                content_type = Headers(raw=message.get("headers", [])).get("content-type", "")
+                # Event streams are not buffered; retrying them runs them again
+                response["store"] = not content_type.startswith("text/event-stream")
+            elif message["type"] == "http.response.body" and response["store"]:
+                response["body"].append(message.get("body", b""))
+            try:
+                await send(message)
+            except OSError:
+                # The client timed out and left: finish anyway so its retry finds the result
+                logger.debug("Client disconnected before the response to %s was sent", key)
+
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+        except BaseException:
+            await self.store.release(key)
+            _wake(key)
+            raise
+        if response["store"] and response["status"] < 500:
+            await self.store.complete(key, response["status"], response["headers"], b"".join(response["body"]))
+        else:
+            await self.store.release(key)
+        _wake(key)
+
+    @staticmethod
+    async def _replay(row: dict, send) -> None:
+        raw = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in json.loads(row["headers"] or "[]")]
+        raw.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": row["status_code"], "headers": raw})
+        await send({"type": "http.response.body", "body": row["body"] or b""})
@@ -0,0 +1,64 @@
+"""Secondary indexes on ``notes`` for the list filters.
+
+``ix_notes_date_id`` (declared on the model) serves ``order_by=date`` and date
+ranges. Filtering by status is served by one of two layouts:
+
+- by default, the composite ``ix_notes_status_date`` on (status, date), which
+  answers ``status=`` with or without a date range or date ordering;
+- with ``NOTES_PARTIAL_INDEX_STATUSES`` set (e.g. ``open,in_progress``), one
+  partial index on ``date`` per listed status instead. They only hold the
+  notes in those statuses, so they stay small and writes to other notes never
+  touch them, but listing any other status falls back to walking the date
+  index.
+
+Switching layouts drops the indexes of the other one on the next migration.
+"""
+import logging
+import os
+import re
+from typing import Dict, Sequence
+
+from sqlalchemy import text
+
+logger = logging.getLogger("app.indexes")
+
+PARTIAL_INDEX_STATUSES = tuple(
+    status.strip() for status in os.getenv("NOTES_PARTIAL_INDEX_STATUSES", "").split(",") if status.strip()
+)
+
+STATUS_DATE_INDEX = "ix_notes_status_date"
+STATUS_DATE_DDL = f"CREATE INDEX IF NOT EXISTS {STATUS_DATE_INDEX} ON notes (status, date)"
+PARTIAL_PREFIX = "ix_notes_partial_"
+
+
+def partial_index_name(status: str) -> str:
+    return PARTIAL_PREFIX + re.sub(r"\W+", "_", status.lower()).strip("_")
+
+
+def partial_index_ddl(status: str) -> str:
+    literal = "'" + status.replace("'", "''") + "'"
+    return f"CREATE INDEX IF NOT EXISTS {partial_index_name(status)} ON notes (date) WHERE status = {literal}"
+
+
+def _existing(conn) -> Dict[str, str]:
+    rows = conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'notes'"))
+    return dict(rows.all())
+
+
+def ensure_status_indexes(conn, statuses: Sequence[str] = PARTIAL_INDEX_STATUSES) -> None:
+    """Create the status index layout for ``statuses`` and drop the other one."""
+    existing = _existing(conn)
+    wanted = {partial_index_name(status): partial_index_ddl(status) for status in statuses}
+    if not wanted:
+        wanted[STATUS_DATE_INDEX] = STATUS_DATE_DDL
+
+    stale = [
+        name for name in existing if (name.startswith(PARTIAL_PREFIX) or name == STATUS_DATE_INDEX) and name not in wanted
+    ]
+    for name in stale:
+        logger.info("Dropping index %s", name)
+        conn.execute(text(f"DROP INDEX {name}"))
+    for name, ddl in wanted.items():
+        if name not in existing:
+            logger.info("Creating index %s", name)
+            conn.execute(text(ddl))
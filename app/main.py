@@ -1,8 +1,14 @@
 import os
 import logging
-from fastapi import FastAPI
-from .database import Base, engine
-from .routers import notes
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import Response
+from . import compression, database, idempotency, metrics, migrations
+from .database import engine
+from .routers import action_items, bulk, changes, notes, search, stats
+from .services import ai, enrichment
+
+logger = logging.getLogger("app.main")
 
 tags_metadata = [
     {
@@ -21,7 +27,49 @@ logging.basicConfig(
     format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
 )
 
-Base.metadata.create_all(bind=engine)
+# Create/upgrade the schema at startup; turn off when deployments run `python -m app.cli migrate` themselves
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
+# Build the OpenAI client (importing the SDK) at startup rather than on the first AI call
+AI_PRELOAD = os.getenv("AI_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if AUTO_MIGRATE:
+        if database.ASYNC_MODE:
+            async with database.async_engine.begin() as conn:
+                await conn.run_sync(migrations.upgrade)
+        else:
+            migrations.upgrade(engine)
+    if AI_PRELOAD:
+        try:
+            ai.init_client()
+            if database.ASYNC_MODE:
+                ai.init_async_client()
+        except RuntimeError:
+            # CRUD keeps working without a key; AI routes fail (or fail open) per call
+            logger.warning("OpenAI client not initialized at startup; AI endpoints are unavailable")
+    if enrichment.ENRICHMENT_MODE == "background":
+        enrichment.pool = enrichment.WorkerPool()
+        await enrichment.pool.start()
+    yield
+    if enrichment.pool is not None:
+        # Drain in-flight enrichment jobs before the AI client goes away
+        await enrichment.pool.stop()
+        enrichment.pool = None
+    ai.close_client()
+    if database.ASYNC_MODE:
+        await ai.close_async_client()
+        await database.async_engine.dispose()
+
+
+def _without_routes(router: APIRouter, shadowed: APIRouter) -> APIRouter:
+    """Copy of ``router`` minus the handlers ``shadowed`` re-implements (matched by name)."""
+    taken = {route.name for route in shadowed.routes}
+    remaining = APIRouter()
+    remaining.routes.extend(route for route in router.routes if route.name not in taken)
+    return remaining
+
 
 app = FastAPI(
     title="FastAPI Boilerplate - Notes API",
@@ -31,6 +79,7 @@ app = FastAPI(
     ),
     version="1.0.0",
     openapi_tags=tags_metadata,
+    lifespan=lifespan,
     openapi_url="/openapi.json",
     docs_url="/swagger",
     redoc_url="/redoc",
@@ -40,4 +89,38 @@ app = FastAPI(
     },
 )
 
-app.include_router(notes.router, prefix="/notes", tags=["notes"])
+# Inside metrics, so replays are timed and carry no X-OpenAI-* usage headers
+app.add_middleware(idempotency.IdempotencyMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+# Outermost, so it compresses what the other middleware produced
+app.add_middleware(compression.CompressionMiddleware)
+
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/health", tags=["ai"])
+def read_health():
+    """Liveness plus the OpenAI guard's state; ``degraded`` while its circuit is not closed.
+
+    Always 200: CRUD keeps working when OpenAI does not.
+    """
+    guard = ai.guard.snapshot()
+    return {"status": "ok" if guard["state"] == "closed" else "degraded", "openai": guard}
+
+
+# Literal paths go first so /notes/bulk etc. are not captured by /notes/{note_id}
+app.include_router(bulk.router, prefix="/notes", tags=["notes"])
+app.include_router(search.router, prefix="/notes", tags=["notes"])
+app.include_router(action_items.router, prefix="/notes", tags=["action items"])
+app.include_router(stats.router, prefix="/notes", tags=["stats"])
+app.include_router(changes.router, prefix="/notes", tags=["sync"])
+if database.ASYNC_MODE:
+    from .routers import notes_async
+
+    app.include_router(notes_async.router, prefix="/notes", tags=["notes"])
+    app.include_router(_without_routes(notes.router, notes_async.router), prefix="/notes", tags=["notes"])
+else:
+    app.include_router(notes.router, prefix="/notes", tags=["notes"])
@@ -0,0 +1,246 @@
+"""Minimal in-process metrics with Prometheus text exposition.
+
+Recording is a dict lookup, a bisect and a few additions under a lock, so it
+is cheap enough for every request and every SQL statement. Per-request time
+spent in the database and in OpenAI, and the OpenAI calls and tokens, are
+accumulated through a context variable set by ``MetricsMiddleware``
+(threadpool workers inherit a copy of it). The OpenAI usage is also returned
+to the client in ``X-OpenAI-*`` response headers.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, *labels: str) -> int:
+        state = self._values.get(labels)
+        return int(sum(state[:-1])) if state else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(labels, list(state)) for labels, state in self._values.items()]
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            cumulative += state[len(self.buckets)]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {state[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route and status", ("method", "route", "status")
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time a request spent executing SQL", ("method", "route"), buckets=DB_BUCKETS
+)
+REQUEST_OPENAI_TIME = Histogram(
+    "http_request_openai_seconds", "Time a request spent waiting on OpenAI", ("method", "route")
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "SQL statement latency by statement type", ("operation",), buckets=DB_BUCKETS
+)
+OPENAI_REQUEST_DURATION = Histogram(
+    "openai_request_duration_seconds", "OpenAI chat completion latency", ("operation", "model", "outcome")
+)
+OPENAI_TOKENS = Counter("openai_tokens_total", "Tokens billed by OpenAI", ("operation", "model", "type"))
+REQUEST_OPENAI_TOKENS = Histogram(
+    "http_request_openai_tokens", "OpenAI tokens (prompt + completion) spent by a request", ("method", "route"),
+    buckets=TOKEN_BUCKETS,
+)
+OPENAI_REJECTIONS = Counter(
+    "openai_guard_rejections_total", "OpenAI calls shed before being sent, by reason", ("reason",)
+)
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total", "Requests carrying an Idempotency-Key, by outcome", ("outcome",)
+)
+
+# [db_seconds, openai_seconds, openai_calls, prompt_tokens, completion_tokens]
+# for the request being served, if any
+_request_timings: contextvars.ContextVar[Optional[List[float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def add_db_time(seconds: float) -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[0] += seconds
+
+
+def add_openai_time(seconds: float) -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[1] += seconds
+
+
+def observe_openai(operation: str, model: str, started: float, response=None, error: bool = False) -> None:
+    elapsed = time.perf_counter() - started
+    OPENAI_REQUEST_DURATION.observe(elapsed, operation, model, "error" if error else "ok")
+    add_openai_time(elapsed)
+    usage = getattr(response, "usage", None)
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    if usage is not None:
+        OPENAI_TOKENS.inc(operation, model, "prompt", amount=prompt)
+        OPENAI_TOKENS.inc(operation, model, "completion", amount=completion)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[2] += 1
+        timings[3] += prompt
+        timings[4] += completion
+
+
+def usage_headers(timings: Sequence[float]) -> List[Tuple[bytes, bytes]]:
+    """``X-OpenAI-*`` headers for a request's usage; none if it made no OpenAI call."""
+    if not timings[2]:
+        return []
+    return [
+        (b"x-openai-calls", b"%d" % timings[2]),
+        (b"x-openai-prompt-tokens", b"%d" % timings[3]),
+        (b"x-openai-completion-tokens", b"%d" % timings[4]),
+    ]
+
+
+def route_template(scope) -> str:
+    """The matched route with parameters restored, e.g. ``/notes/{note_id}``.
+
+    Raw paths would give every note id its own time series.
+    """
+    params = scope.get("path_params")
+    if params is None:
+        return "unmatched"
+    by_value = {str(v): k for k, v in params.items()}
+    segments = []
+    for segment in scope.get("path", "").split("/"):
+        name = by_value.pop(segment, None)
+        segments.append("{" + name + "}" if name else segment)
+    return "/".join(segments)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing each HTTP request (no per-request task or body copy)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                # Streamed responses start before their OpenAI calls finish; they carry no usage headers
+                extra = usage_headers(timings)
+                if extra:
+                    message = {**message, "headers": [*message.get("headers", []), *extra]}
+            await send(message)
+
+        timings = [0.0, 0.0, 0, 0, 0]
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_timings.reset(token)
+            method, route = scope["method"], route_template(scope)
+            REQUEST_DURATION.observe(elapsed, method, route, str(status["code"]))
+            REQUEST_DB_TIME.observe(timings[0], method, route)
+            if timings[1]:
+                REQUEST_OPENAI_TIME.observe(timings[1], method, route)
+            if timings[2]:
+                REQUEST_OPENAI_TOKENS.observe(timings[3] + timings[4], method, route)
@@ -0,0 +1,75 @@
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+from . import action_items, changes, indexes, search, stats
+from .database import Base
+
+logger = logging.getLogger("app.migrations")
+
+
+def _add_missing_columns(conn) -> None:
+    """Add columns declared on the models but absent from existing tables.
+
+    ``create_all`` only creates missing tables, so databases created by an
+    older version of the app would otherwise never see new columns. Only
+    nullable columns (optionally with a server default) can be added this way.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg.text}"
+            logger.info("Adding column %s.%s", table.name, column.name)
+            conn.execute(text(ddl))
+
+
+def _add_missing_indexes(conn) -> None:
+    """Create indexes declared on the models but absent from existing tables.
+
+    Like columns, ``create_all`` only creates a table's indexes along with the
+    table itself.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in present:
+                logger.info("Creating index %s", index.name)
+                index.create(conn)
+
+
+def upgrade(bind) -> None:
+    """Bring the schema up to date: tables, missing columns, then SQL-only objects.
+
+    ``bind`` may be an Engine or a Connection (e.g. from ``AsyncConnection.run_sync``).
+    """
+    Base.metadata.create_all(bind=bind)
+    if isinstance(bind, Engine):
+        with bind.begin() as conn:
+            _upgrade(conn)
+    else:
+        _upgrade(bind)
+
+
+def _upgrade(conn) -> None:
+    _add_missing_columns(conn)
+    _add_missing_indexes(conn)
+    indexes.ensure_status_indexes(conn)
+    search.ensure_fts(conn)
+    action_items.ensure_sync(conn)
+    # After action_items: the initial stats count done items from that table
+    stats.ensure_sync(conn)
+    changes.ensure_sync(conn)
@@ -1,9 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON
+import time
+
+from sqlalchemy import (
+    Boolean, Column, Integer, String, DateTime, Text, JSON, Float, ForeignKey, Index, LargeBinary,
+    UniqueConstraint, literal_column,
+)
+from sqlalchemy import text as sql_text
+from sqlalchemy.orm import deferred
 from .database import Base
 
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        # order_by=date and date ranges; the status filter's index is managed by app.indexes
+        Index("ix_notes_date_id", "date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
@@ -11,3 +22,96 @@ class Note(Base):
     status = Column(String, nullable=False)
     date = Column(DateTime, nullable=False)
     action_items = Column(JSON, default=list)
+    # None when no enrichment was needed; otherwise pending/done/failed
+    enrichment_status = Column(String, nullable=True)
+    # Bumped by every UPDATE issued through SQLAlchemy (ORM, bulk and Core); ETags derive from both
+    version = Column(
+        Integer, nullable=False, default=1, server_default=sql_text("1"), onupdate=literal_column("version + 1")
+    )
+    updated_at = Column(Float, nullable=True, default=time.time, onupdate=time.time)
+    # float32 vector of title + description (app.embeddings); deferred so note reads never load it
+    embedding = deferred(Column(LargeBinary, nullable=True))
+
+
+class ActionItem(Base):
+    """One entry of a note's ``action_items``, mirrored by SQLite triggers (app.action_items)."""
+
+    __tablename__ = "action_items"
+    __table_args__ = (
+        UniqueConstraint("note_id", "position", name="uq_action_items_note_position"),
+        # "all open items" scans only the matching rows, then joins to notes by id
+        Index("ix_action_items_done_note", "done", "note_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    done = Column(Boolean, nullable=False, default=False, server_default=sql_text("0"))
+
+
+class NoteStat(Base):
+    """Note and action-item counts for one day and status, maintained by SQLite triggers (app.stats)."""
+
+    __tablename__ = "note_stats"
+
+    # ISO date (YYYY-MM-DD) of Note.date
+    day = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    notes = Column(Integer, nullable=False, default=0, server_default=sql_text("0"))
+    action_items = Column(Integer, nullable=False, default=0, server_default=sql_text("0"))
+    action_items_done = Column(Integer, nullable=False, default=0, server_default=sql_text("0"))
+
+
+class NoteChange(Base):
+    """One entry of the append-only change feed, written by SQLite triggers on ``notes`` (app.changes)."""
+
+    __tablename__ = "note_changes"
+    __table_args__ = (
+        # Compaction finds each note's latest change
+        Index("ix_note_changes_note_seq", "note_id", "seq"),
+        # AUTOINCREMENT: a sequence number is never reused, even after compaction deletes the newest rows
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True)
+    note_id = Column(Integer, nullable=False)
+    # create | update | delete (a tombstone)
+    op = Column(String, nullable=False)
+    version = Column(Integer, nullable=True)
+    # Unix timestamp
+    changed_at = Column(Float, nullable=False)
+
+
+class IdempotencyKey(Base):
+    """A client's ``Idempotency-Key`` and the response it produced (app.idempotency)."""
+
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    # sha256 of method, path, query and body: the key may only be reused for the same request
+    fingerprint = Column(String, nullable=False)
+    # None while the original request is still being processed
+    status_code = Column(Integer, nullable=True)
+    headers = Column(JSON, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    # Unix timestamps
+    created_at = Column(Float, nullable=False)
+    expires_at = Column(Float, nullable=False, index=True)
+
+
+class EnrichmentJob(Base):
+    """A queued request to fill in a note's action items outside the request path."""
+
+    __tablename__ = "enrichment_jobs"
+
+    id = Column(Integer, primary_key=True)
+    note_id = Column(Integer, nullable=False, index=True)
+    # queued -> running -> done | failed (re-queued with backoff between attempts)
+    status = Column(String, nullable=False, default="queued", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    # Unix timestamps; run_after delays retries
+    run_after = Column(Float, nullable=False, default=0.0)
+    created_at = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
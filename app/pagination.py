@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+from sqlalchemy import tuple_
+
+from . import models, schemas
+
+# A legacy ``Query`` (sync routes) or a 2.0 ``Select`` (async routes); both
+# provide the ``filter``/``order_by`` methods used here.
+Q = TypeVar("Q")
+
+# Columns a client may ask for via ``fields=``; mirrors the public Note schema
+NOTE_FIELDS = tuple(schemas.Note.model_fields.keys())
+ORDER_KEYS = ("id", "date")
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+STREAM_BATCH_SIZE = 500
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor is malformed or does not match the query."""
+
+
+def encode_cursor(order_by: str, last_id: int, last_date: Optional[datetime]) -> str:
+    payload = {"o": order_by, "id": last_id}
+    if order_by == "date" and last_date is not None:
+        payload["d"] = last_date.isoformat()
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = int(payload["id"])
+        last_date = datetime.fromisoformat(payload["d"]) if "d" in payload else None
+    except Exception as exc:
+        raise CursorError("Invalid cursor") from exc
+    if payload.get("o") != order_by or (order_by == "date" and last_date is None):
+        raise CursorError("Cursor does not match order_by")
+    return {"id": last_id, "date": last_date}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a ``fields=a,b`` parameter, rejecting names not on the Note schema."""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in NOTE_FIELDS]
+    if unknown:
+        raise ValueError("Unknown fields: " + ", ".join(unknown))
+    return names
+
+
+def apply_filters(
+    query: Q,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> Q:
+    if status is not None:
+        query = query.filter(models.Note.status == status)
+    if date_from is not None:
+        query = query.filter(models.Note.date >= date_from)
+    if date_to is not None:
+        query = query.filter(models.Note.date < date_to)
+    return query
+
+
+def apply_keyset(
+    query: Q,
+    order_by: str,
+    descending: bool = False,
+    after: Optional[Dict[str, Any]] = None,
+) -> Q:
+    """Order ``query`` by the keyset and, given a decoded cursor, seek past it.
+
+    Ties on ``date`` are broken by ``id`` so the ordering is total and no row
+    is skipped or repeated across pages. The seek is a row-value comparison,
+    which SQLite turns into a range on the (date) indexes; the equivalent
+    ``date < ? OR (date = ? AND id < ?)`` makes it walk the index from the start.
+    """
+    note = models.Note
+    if order_by == "date":
+        keys = (note.date, note.id)
+    else:
+        keys = (note.id,)
+
+    if after is not None:
+        if order_by == "date":
+            position = tuple_(note.date, note.id)
+            seek = position < (after["date"], after["id"]) if descending else position > (after["date"], after["id"])
+        else:
+            seek = note.id < after["id"] if descending else note.id > after["id"]
+        query = query.filter(seek)
+
+    return query.order_by(*[key.desc() if descending else key.asc() for key in keys])
+
+
+def query_columns(fields: Optional[Sequence[str]], extra: Sequence[str] = ()) -> List[str]:
+    """Columns to select: the requested fields plus the keyset columns and ``extra``."""
+    names = list(fields or NOTE_FIELDS)
+    for key in (*ORDER_KEYS, *extra):
+        if key not in names:
+            names.append(key)
+    return names
+
+
+def project(rows: Iterable[Any], fields: Optional[Sequence[str]]) -> List[Dict[str, Any]]:
+    names = list(fields or NOTE_FIELDS)
+    return [{name: row._mapping[name] for name in names} for row in rows]
@@ -0,0 +1,69 @@
+"""``EXPLAIN QUERY PLAN`` checks for the statements the app issues.
+
+    with query_plan.capture(engine) as statements:
+        client.get("/notes/", params={"status": "open"})
+    for statement, parameters in statements:
+        assert not query_plan.full_scans(conn, statement, parameters)
+
+A plan step ``SCAN <table>`` reads the table (or an index of it) from end to
+end. That is flagged unless the index is partial, i.e. only holds the rows the
+query wants, or the statement is an unfiltered ``LIMIT`` query, which walks the
+table in index order and stops after the rows it returns. A ``LIMIT`` query
+whose plan sorts in a ``USE TEMP B-TREE FOR ORDER BY`` step is flagged all the
+same: it has to read every row before it can return the first.
+"""
+import re
+from contextlib import contextmanager
+from typing import Any, List, Sequence, Tuple
+
+from sqlalchemy import event, text
+
+_SCAN = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?")
+_EXPLAINED = ("SELECT", "UPDATE", "DELETE", "WITH")
+_WHERE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+_LIMIT = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+
+
+def explain(conn, statement: str, parameters: Sequence[Any] = ()) -> List[str]:
+    """The ``detail`` column of each plan step."""
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, tuple(parameters)).all()
+    return [row[3] for row in rows]
+
+
+def _partial_indexes(conn) -> set:
+    rows = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '% WHERE %'"))
+    return set(rows.scalars())
+
+
+def full_scans(conn, statement: str, parameters: Sequence[Any] = ()) -> List[str]:
+    """Plan steps of ``statement`` that read a whole table; empty when it only seeks."""
+    if not statement.lstrip().upper().startswith(_EXPLAINED):
+        return []
+    plan = explain(conn, statement, parameters)
+    sorted_in_memory = any(d.startswith("USE TEMP B-TREE") and "ORDER BY" in d for d in plan)
+    if _LIMIT.search(statement) and not _WHERE.search(statement) and not sorted_in_memory:
+        return []
+    partial = _partial_indexes(conn)
+    scans = []
+    for detail in plan:
+        match = _SCAN.match(detail)
+        # Virtual tables (FTS5, json_each) plan their own lookups
+        if match and "VIRTUAL TABLE" not in detail and match.group(1) != "CONSTANT" and match.group(2) not in partial:
+            scans.append(detail)
+    return scans
+
+
+@contextmanager
+def capture(engine):
+    """Collect ``(statement, parameters)`` for everything ``engine`` executes in the block."""
+    statements: List[Tuple[str, Any]] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
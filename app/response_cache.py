@@ -0,0 +1,161 @@
+"""Strong ETags, conditional GET and a byte-bounded cache of serialized note bodies.
+
+ETags are derived from each note's ``(id, version, updated_at)``, which every
+SQLAlchemy UPDATE bumps, so routes validate them with a narrow query instead of
+loading and re-serializing rows. That keeps 304s correct even when another
+process (a second worker, ``python -m app.worker``) changed the data; the
+in-process write paths additionally drop affected entries so memory is not
+held by bodies that can no longer be served.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+NOTE_PREFIX = "note:"
+LIST_PREFIX = "list:"
+CACHE_CONTROL = "no-cache"
+# Columns every list query selects so the page's ETag can be computed from its rows
+VALIDATOR_COLUMNS = ("id", "version", "updated_at")
+
+
+class Entry(NamedTuple):
+    etag: str
+    body: bytes
+    headers: Dict[str, str]
+    media_type: str = "application/json"
+
+
+class ResponseCache:
+    """LRU of serialized response bodies bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "not_modified": 0}
+
+    def get(self, key: str, etag: str) -> Optional[Entry]:
+        """Return the entry for ``key`` only if it was stored under ``etag``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.etag != etag:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+    def put(self, key: str, entry: Entry) -> None:
+        cost = len(entry.body)
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.body)
+            self._entries[key] = entry
+            self._size += cost
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+                self.stats["evictions"] += 1
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= len(entry.body)
+
+    def discard_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._size -= len(self._entries.pop(key).body)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes}
+
+
+cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
+
+
+def _etag(parts: Iterable) -> str:
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\x00")
+    return '"' + digest.hexdigest() + '"'
+
+
+def note_etag(note_id: int, version: int, updated_at: Optional[float]) -> str:
+    return _etag((note_id, version, updated_at))
+
+
+def page_etag(key: str, rows: Iterable) -> str:
+    """ETag of a list page: the query plus every (id, version, updated_at) on it.
+
+    Pass the page's ``limit + 1`` rows so the presence of a next page (and so the
+    ``X-Next-Cursor`` header) is part of the tag.
+    """
+    return _etag((key, *(tuple(row._mapping[c] for c in VALIDATOR_COLUMNS) for row in rows)))
+
+
+def note_key(note_id: int) -> str:
+    return f"{NOTE_PREFIX}{note_id}"
+
+
+def list_key(request: Request, representation: str = "json") -> str:
+    """Cache key for a list request: path plus the query parameters in canonical order.
+
+    Representations other than JSON get their own key, and so their own ETag.
+    """
+    params = sorted(request.query_params.multi_items())
+    key = LIST_PREFIX + request.url.path + "?" + "&".join(f"{k}={v}" for k, v in params)
+    return key if representation == "json" else f"{key}#{representation}"
+
+
+def is_fresh(request: Request, etag: str) -> bool:
+    """True if the client's ``If-None-Match`` already names ``etag``."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    cache.stats["not_modified"] += 1
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def respond(entry: Entry) -> Response:
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    return Response(entry.body, media_type=entry.media_type, headers=headers)
+
+
+def store(
+    key: str, etag: str, body: bytes, headers: Optional[Dict[str, str]] = None, media_type: str = "application/json"
+) -> Response:
+    entry = Entry(etag, body, headers or {}, media_type)
+    cache.put(key, entry)
+    return respond(entry)
+
+
+def invalidate(*note_ids: int) -> None:
+    """Drop the cached bodies of ``note_ids`` and every cached list page."""
+    for note_id in note_ids:
+        cache.discard(note_key(note_id))
+    cache.discard_prefix(LIST_PREFIX)
@@ -0,0 +1,96 @@
+"""Action items as first-class rows: list and filter across notes, toggle one item.
+
+Rows are kept in step with ``notes.action_items`` by the triggers in
+``app.action_items``, so note responses keep their ``action_items`` list.
+"""
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .. import database, models, response_cache, schemas
+
+router = APIRouter()
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@router.get("/action-items", response_model=List[schemas.ActionItem])
+def list_action_items(
+    response: Response,
+    done: Optional[bool] = None,
+    note_status: Optional[str] = Query(None, description="Only items of notes with this status"),
+    q: Optional[str] = Query(None, description="Case-insensitive substring of the item text"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, description="Value of a previous X-Next-Cursor header"),
+    db: Session = Depends(database.get_read_db),
+):
+    """Items across all notes in id order, e.g. ``?done=false`` for every open item."""
+    query = db.query(models.ActionItem)
+    if done is not None:
+        query = query.filter(models.ActionItem.done == done)
+    if note_status is not None:
+        query = query.join(models.Note, models.Note.id == models.ActionItem.note_id).filter(
+            models.Note.status == note_status
+        )
+    if q:
+        query = query.filter(models.ActionItem.text.ilike(f"%{_escape_like(q)}%", escape="\\"))
+    if cursor is not None:
+        query = query.filter(models.ActionItem.id > cursor)
+    items = query.order_by(models.ActionItem.id).limit(limit + 1).all()
+    if len(items) > limit:
+        items = items[:limit]
+        response.headers["X-Next-Cursor"] = str(items[-1].id)
+    return items
+
+
+@router.get("/action-items/counts", response_model=List[schemas.ActionItemCount])
+def count_action_items(db: Session = Depends(database.get_read_db)):
+    """Number of items per note status and done flag, computed in SQL."""
+    rows = (
+        db.query(models.Note.status, models.ActionItem.done, func.count(models.ActionItem.id))
+        .join(models.Note, models.Note.id == models.ActionItem.note_id)
+        .group_by(models.Note.status, models.ActionItem.done)
+        .order_by(models.Note.status, models.ActionItem.done)
+        .all()
+    )
+    return [{"note_status": status, "done": done, "count": count} for status, done, count in rows]
+
+
+@router.get("/{note_id}/action-items", response_model=List[schemas.ActionItem])
+def read_note_action_items(note_id: int, db: Session = Depends(database.get_read_db)):
+    if db.query(models.Note.id).filter(models.Note.id == note_id).first() is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return (
+        db.query(models.ActionItem)
+        .filter(models.ActionItem.note_id == note_id)
+        .order_by(models.ActionItem.position)
+        .all()
+    )
+
+
+@router.patch("/action-items/{item_id}", response_model=schemas.ActionItem)
+def update_action_item(item_id: int, payload: schemas.ActionItemUpdate, db: Session = Depends(database.get_db)):
+    """Toggle ``done`` and/or edit the text of one item without sending the whole note."""
+    item = db.get(models.ActionItem, item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Action item not found")
+    if payload.done is not None:
+        item.done = payload.done
+
+    text_changed = payload.text is not None and payload.text != item.text
+    if text_changed:
+        # Row first, then the note's JSON: the sync trigger then finds the row
+        # already matching and keeps its id and done flag
+        item.text = payload.text
+        db.flush()
+        note = db.get(models.Note, item.note_id)
+        texts = list(note.action_items or [])
+        texts[item.position] = payload.text
+        note.action_items = texts
+    db.commit()
+    db.refresh(item)
+    if text_changed:
+        response_cache.invalidate(item.note_id)
+    return item
@@ -0,0 +1,236 @@
+"""Bulk create/update/delete for notes.
+
+Bodies are JSON arrays or, with ``Content-Type: application/x-ndjson``, one
+JSON value per line, parsed as the request streams in. Deletes take note ids
+(bare or as ``{"id": ...}``), and also the ``{"ids": [...]}`` object. Items are validated
+one by one and written with executemany statements in chunked transactions.
+When a chunk fails, its items are written again one at a time, so a bad item
+never takes the rest of the import down.
+"""
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .. import database, embeddings, models, response_cache, schemas
+from ..serialization import NDJSON_TYPES
+from ..services import enrichment
+
+router = APIRouter()
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+
+Result = Dict[str, Any]
+
+
+async def _iter_items(request: Request) -> AsyncIterator[Any]:
+    """Yield raw items from a JSON array or NDJSON body; bad NDJSON lines yield the error."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_TYPES:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield _loads_line(line)
+        if buffer.strip():
+            yield _loads_line(buffer)
+        return
+
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    for item in body:
+        yield item
+
+
+def _loads_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as exc:
+        return exc
+
+
+def _error(index: int, status: int, detail: str, note_id: Optional[int] = None) -> Result:
+    return {"index": index, "id": note_id, "status": status, "error": detail}
+
+
+def _validation_detail(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+    return str(exc)
+
+
+def _write_rows(write, db: Session, chunk: List[Tuple[int, dict]], return_notes: bool, exc: Exception) -> List[Result]:
+    """After ``chunk`` failed as a whole, write its items one by one so only the bad ones fail."""
+    if len(chunk) == 1:
+        index, payload = chunk[0]
+        return [_error(index, 500, f"Write failed: {exc.__class__.__name__}", payload.get("id"))]
+    results: List[Result] = []
+    for item in chunk:
+        results.extend(write(db, [item], return_notes))
+    return results
+
+
+def _load_notes(db: Session, ids: List[int]) -> Dict[int, dict]:
+    rows = db.execute(select(models.Note).where(models.Note.id.in_(ids))).scalars()
+    return {note.id: schemas.Note.model_validate(note).model_dump() for note in rows}
+
+
+def _insert_chunk(db: Session, chunk: List[Tuple[int, dict]], return_notes: bool) -> List[Result]:
+    deferred = enrichment.is_deferred()
+    rows = []
+    for _, payload in chunk:
+        needs_ai = deferred and not payload.get("action_items") and payload.get("description")
+        rows.append({**payload, "enrichment_status": "pending" if needs_ai else None})
+    vectors = embeddings.embed_rows(rows)
+    try:
+        stmt = insert(models.Note).returning(models.Note.id, sort_by_parameter_order=True)
+        ids = db.execute(stmt, rows).scalars().all()
+        jobs = [enrichment.new_job(note_id) for note_id, row in zip(ids, rows) if row["enrichment_status"]]
+        if jobs:
+            db.add_all(jobs)
+        db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        return _write_rows(_insert_chunk, db, chunk, return_notes, exc)
+    response_cache.invalidate()
+    embeddings.set_vectors(zip(ids, vectors))
+    if jobs:
+        enrichment.notify()
+
+    notes = _load_notes(db, ids) if return_notes else {}
+    return [
+        {"index": index, "id": note_id, "status": 201, "note": notes.get(note_id)}
+        for (index, _), note_id in zip(chunk, ids)
+    ]
+
+
+def _update_chunk(db: Session, chunk: List[Tuple[int, dict]], return_notes: bool) -> List[Result]:
+    ids = [payload["id"] for _, payload in chunk]
+    existing = set(db.execute(select(models.Note.id).where(models.Note.id.in_(ids))).scalars())
+    rows = [payload for _, payload in chunk if payload["id"] in existing and len(payload) > 1]
+    vectors = embeddings.embed_updates(db, rows)
+    try:
+        if rows:
+            # ORM bulk UPDATE by primary key: one executemany per distinct column set
+            db.execute(update(models.Note), rows)
+        db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        return _write_rows(_update_chunk, db, chunk, return_notes, exc)
+    response_cache.invalidate(*existing)
+    embeddings.set_vectors(vectors)
+
+    notes = _load_notes(db, list(existing)) if return_notes else {}
+    return [
+        {"index": index, "id": payload["id"], "status": 200, "note": notes.get(payload["id"])}
+        if payload["id"] in existing
+        else _error(index, 404, "Note not found", payload["id"])
+        for index, payload in chunk
+    ]
+
+
+def _delete_chunk(db: Session, chunk: List[Tuple[int, dict]], return_notes: bool = False) -> List[Result]:
+    ids = [payload["id"] for _, payload in chunk]
+    existing = set(db.execute(select(models.Note.id).where(models.Note.id.in_(ids))).scalars())
+    try:
+        db.execute(delete(models.Note).where(models.Note.id.in_(existing)))
+        db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        return _write_rows(_delete_chunk, db, chunk, return_notes, exc)
+    response_cache.invalidate(*existing)
+    embeddings.forget(existing)
+    return [
+        {"index": index, "id": payload["id"], "status": 200}
+        if payload["id"] in existing
+        else _error(index, 404, "Note not found", payload["id"])
+        for index, payload in chunk
+    ]
+
+
+def _summarize(results: List[Result]) -> dict:
+    results.sort(key=lambda r: r["index"])
+    succeeded = sum(1 for r in results if r["status"] < 400)
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+
+
+async def _run_bulk(
+    request: Request, model, write, db: Session, return_notes: bool, partial: bool = False, items=None
+) -> dict:
+    results: List[Result] = []
+    chunk: List[Tuple[int, dict]] = []
+    index = -1
+    async for raw in items if items is not None else _iter_items(request):
+        index += 1
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            payload = model.model_validate(raw).model_dump(exclude_unset=partial)
+        except (ValidationError, ValueError) as exc:
+            results.append(_error(index, 422, _validation_detail(exc)))
+            continue
+        chunk.append((index, payload))
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            results.extend(await run_in_threadpool(write, db, chunk, return_notes))
+            chunk = []
+    if chunk:
+        results.extend(await run_in_threadpool(write, db, chunk, return_notes))
+    return _summarize(results)
+
+
+@router.post("/bulk", response_model=schemas.BulkResponse)
+async def bulk_create_notes(request: Request, return_notes: bool = False, db: Session = Depends(database.get_db)):
+    """Create many notes. Body: JSON array or NDJSON of note objects.
+
+    AI action items are never generated inline here; with a deferred
+    ``ENRICHMENT_MODE`` notes without items are queued for enrichment.
+    Set ``return_notes`` to re-read and return the stored rows.
+    """
+    return await _run_bulk(request, schemas.NoteCreate, _insert_chunk, db, return_notes)
+
+
+@router.patch("/bulk", response_model=schemas.BulkResponse)
+async def bulk_update_notes(request: Request, return_notes: bool = False, db: Session = Depends(database.get_db)):
+    """Partially update many notes. Each item carries its ``id`` plus the fields to change."""
+    return await _run_bulk(request, schemas.NoteBulkUpdate, _update_chunk, db, return_notes, partial=True)
+
+
+async def _iter_delete_ids(request: Request) -> AsyncIterator[Any]:
+    """Like ``_iter_items``, but also unwraps the ``{"ids": [...]}`` object body."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in NDJSON_TYPES:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array, NDJSON or {\"ids\": [...]}")
+        if isinstance(body, dict):
+            try:
+                ids = schemas.NoteBulkDelete.model_validate(body).ids
+            except ValidationError as exc:
+                raise RequestValidationError(exc.errors())
+            for note_id in ids:
+                yield note_id
+            return
+    async for raw in _iter_items(request):
+        yield raw
+
+
+@router.delete("/bulk", response_model=schemas.BulkResponse)
+async def bulk_delete_notes(request: Request, db: Session = Depends(database.get_db)):
+    """Delete many notes. Body: JSON array or NDJSON of ids (or ``{"id": ...}`` objects), or ``{"ids": [...]}``."""
+    return await _run_bulk(
+        request, schemas.NoteBulkDeleteItem, _delete_chunk, db, False, items=_iter_delete_ids(request)
+    )
@@ -0,0 +1,109 @@
+"""Incremental sync: the ``note_changes`` feed in batches, by long-poll or as SSE.
+
+Handlers are async so a waiting client holds no threadpool worker; each
+database read runs in the threadpool on a short-lived read session.
+"""
+import json
+import os
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Header, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from .. import changes, database, schemas
+from ..services.streaming import SSE_HEADERS
+
+CHANGES_MAX_WAIT_SECONDS = float(os.getenv("CHANGES_MAX_WAIT_SECONDS", "30"))
+CHANGES_HEARTBEAT_SECONDS = float(os.getenv("CHANGES_HEARTBEAT_SECONDS", "15"))
+# Changes per SSE read; a long backlog is sent in batches of this size
+CHANGES_STREAM_BATCH = int(os.getenv("CHANGES_STREAM_BATCH", "500"))
+
+router = APIRouter()
+
+
+def _read(since: int, limit: int) -> dict:
+    db = database.ReadSessionLocal()
+    try:
+        return changes.read(db, since, limit)
+    finally:
+        db.close()
+
+
+def _head() -> int:
+    db = database.ReadSessionLocal()
+    try:
+        return changes.head(db)
+    finally:
+        db.close()
+
+
+async def wait_for_changes(since: int, timeout: float) -> bool:
+    """Wait up to ``timeout`` seconds for a change after ``since``.
+
+    Writes committed by this process wake the waiter at once; Core bulk
+    statements and other workers are noticed on the next poll of the newest
+    sequence number (a primary-key lookup).
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if await run_in_threadpool(_head) > since:
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        await changes.wait(min(changes.CHANGES_POLL_INTERVAL, remaining))
+
+
+@router.get("/changes", response_model=schemas.NoteChanges)
+async def read_changes(
+    since: int = Query(0, ge=0, description="Cursor of the last batch applied; 0 for everything"),
+    limit: int = Query(100, ge=1, le=1000),
+    wait: float = Query(0, ge=0, description="Long-poll: seconds to wait when there is nothing new"),
+):
+    """Changes after ``since`` in commit order, each with the note's current state.
+
+    Deletes are tombstones (``op: "delete"``, ``note: null``). Continue from
+    the returned ``cursor``; ``has_more`` means another batch is ready now.
+    With ``wait``, an empty result is held until something changes or the
+    wait (capped at ``CHANGES_MAX_WAIT_SECONDS``) runs out.
+    """
+    batch = await run_in_threadpool(_read, since, limit)
+    if not batch["changes"] and wait > 0:
+        if await wait_for_changes(since, min(wait, CHANGES_MAX_WAIT_SECONDS)):
+            batch = await run_in_threadpool(_read, since, limit)
+    return batch
+
+
+def _change_event(change: dict) -> str:
+    # The id lets EventSource resume with Last-Event-ID after a reconnect
+    return f"id: {change['seq']}\nevent: change\ndata: {json.dumps(change, ensure_ascii=False)}\n\n"
+
+
+async def tail(since: int):
+    """Yield the backlog after ``since`` as SSE, then every new change as it commits."""
+    while True:
+        batch = await run_in_threadpool(_read, since, CHANGES_STREAM_BATCH)
+        for change in batch["changes"]:
+            yield _change_event(change)
+        since = batch["cursor"]
+        if batch["has_more"]:
+            continue
+        if not await wait_for_changes(since, CHANGES_HEARTBEAT_SECONDS):
+            # Keeps proxies from closing an idle connection
+            yield ": keepalive\n\n"
+
+
+@router.get("/changes/stream")
+async def stream_changes(
+    since: int = Query(0, ge=0),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+):
+    """Live tail of the change feed as Server-Sent Events (``event: change``, ``id`` = seq).
+
+    A reconnecting ``EventSource`` sends ``Last-Event-ID``, which takes
+    precedence over ``since``.
+    """
+    start = last_event_id if last_event_id is not None else since
+    return StreamingResponse(tail(start), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,8 +1,23 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import math
+from datetime import datetime, timezone
+from typing import List, Literal, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from .. import models, schemas, database
-from ..services.ai import generate_action_items, generate_note_fields
+from .. import models, schemas, database, pagination, response_cache, serialization
+from ..services.ai import (
+    AIUnavailable,
+    generate_action_items,
+    generate_action_items_batch,
+    generate_note_fields,
+    stream_note_fields,
+)
+from ..services import enrichment
+from ..services.cache import ai_cache
+from ..services.streaming import SSE_HEADERS, sse_event
 
 router = APIRouter()
 
@@ -10,32 +25,233 @@ router = APIRouter()
 @router.post("/", response_model=schemas.Note)
 def create_note(note: schemas.NoteCreate, db: Session = Depends(database.get_db)):
     payload = note.model_dump()
-    if (not payload.get("action_items")) and payload.get("description"):
+    needs_ai = (not payload.get("action_items")) and payload.get("description")
+    deferred = needs_ai and enrichment.is_deferred()
+    if needs_ai and not deferred:
         # Auto-generate action items if not provided
         try:
             ai_items = generate_action_items(payload["description"])
             payload["action_items"] = ai_items
+            payload["enrichment_status"] = "done"
         except Exception:
             # Fail open: if AI fails, proceed without auto items
             payload["action_items"] = payload.get("action_items") or []
+            payload["enrichment_status"] = "failed"
     db_note = models.Note(**payload)
     db.add(db_note)
+    if deferred:
+        # Persist now; a worker fills in action items later
+        db_note.enrichment_status = "pending"
+        db.flush()
+        db.add(enrichment.new_job(db_note.id))
     db.commit()
     db.refresh(db_note)
+    response_cache.invalidate()
+    if deferred:
+        enrichment.notify()
     return db_note
 
 
+# -------------------- Listing and reading, shared with notes_async --------------------
+# The helpers build statements and shape responses; each router only runs the
+# statements on its own (sync or async) session.
+
+
+def list_params(request: Request, cursor: Optional[str], order_by: str, fields: Optional[str], output_format):
+    """``(selected fields, keyset position, representation)``; 400/406 on bad input."""
+    try:
+        selected = pagination.parse_fields(fields)
+        after = pagination.decode_cursor(cursor, order_by) if cursor else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    representation = serialization.negotiate(request.headers.get("accept"), output_format)
+    if representation is None:
+        raise HTTPException(status_code=406, detail="Acceptable: " + ", ".join(serialization.available_types()))
+    return selected, after, representation
+
+
+def page_stmt(names, filters: dict, order_by: str, descending: bool, after, limit: int):
+    """One keyset page of the ``names`` columns."""
+    stmt = pagination.apply_filters(select(*[getattr(models.Note, name) for name in names]), **filters)
+    return pagination.apply_keyset(stmt, order_by, descending, after).limit(limit)
+
+
+def validators_stmt(filters: dict, order_by: str, descending: bool, after, limit: int):
+    """The page's (id, version, updated_at) only: enough for its ETag."""
+    return page_stmt(response_cache.VALIDATOR_COLUMNS, filters, order_by, descending, after, limit + 1)
+
+
+def rows_stmt(selected, filters: dict, order_by: str, descending: bool, after, limit: int):
+    names = pagination.query_columns(selected, extra=response_cache.VALIDATOR_COLUMNS)
+    return page_stmt(names, filters, order_by, descending, after, limit + 1)
+
+
+def stream_stmt(selected, filters: dict, order_by: str, descending: bool, after):
+    names = pagination.query_columns(selected)
+    return page_stmt(names, filters, order_by, descending, after, pagination.STREAM_BATCH_SIZE)
+
+
+def ndjson_batch(rows, selected) -> Tuple[str, Optional[dict]]:
+    """NDJSON lines for one streamed batch, and the keyset position after it (None after the last)."""
+    lines = "".join(json.dumps(jsonable_encoder(item)) + "\n" for item in pagination.project(rows, selected))
+    if len(rows) < pagination.STREAM_BATCH_SIZE:
+        return lines, None
+    last = rows[-1]._mapping
+    return lines, {"id": last["id"], "date": last["date"]}
+
+
+def ndjson_response(stream) -> StreamingResponse:
+    return StreamingResponse(stream, media_type="application/x-ndjson", headers={"Vary": "Accept"})
+
+
+def cached_response(request: Request, key: str, etag: str):
+    """``304`` or the cached body when ``etag`` is still current; None when the body must be built."""
+    if response_cache.is_fresh(request, etag):
+        return response_cache.not_modified(etag)
+    cached = response_cache.cache.get(key, etag)
+    return response_cache.respond(cached) if cached is not None else None
+
+
+def page_response(key: str, rows, limit: int, order_by: str, selected, representation: str):
+    """Serialize (and cache) a page read with ``rows_stmt``, with ``X-Next-Cursor`` when there is more."""
+    # Tag what is actually served, in case a write landed since the ETag check
+    etag = response_cache.page_etag(key, rows)
+    headers = {"Vary": "Accept"}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        headers["X-Next-Cursor"] = pagination.encode_cursor(order_by, last["id"], last["date"])
+    items = pagination.project(rows, selected)
+    if representation == "msgpack":
+        body = serialization.dump_page_msgpack(items)
+    else:
+        body = serialization.dump_page(items, selected)
+    return response_cache.store(key, etag, body, headers, serialization.MEDIA_TYPES[representation])
+
+
+def note_etag_stmt(note_id: int):
+    return select(models.Note.version, models.Note.updated_at).where(models.Note.id == note_id)
+
+
+def note_etag(note_id: int, current) -> str:
+    """ETag from a ``note_etag_stmt`` row; 404 when there is none."""
+    if current is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return response_cache.note_etag(note_id, current.version, current.updated_at)
+
+
+def note_stmt(note_id: int):
+    if serialization.FAST_RESPONSES:
+        # Plain row mapping: no ORM instance, no schema validation
+        return select(*serialization.NOTE_COLUMNS).where(models.Note.id == note_id)
+    return select(models.Note).where(models.Note.id == note_id)
+
+
+def note_response(key: str, note_id: int, result):
+    """Serialize (and cache) the result of ``note_stmt``; 404 when the note is gone."""
+    if serialization.FAST_RESPONSES:
+        row = result.first()
+        note = dict(row._mapping) if row is not None else None
+    else:
+        note = result.scalars().first()
+    if note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    if serialization.FAST_RESPONSES:
+        etag = response_cache.note_etag(note_id, note["version"], note["updated_at"])
+    else:
+        etag = response_cache.note_etag(note_id, note.version, note.updated_at)
+    return response_cache.store(key, etag, serialization.dump_note(note))
+
+
+def _stream_notes(selected, filters, order_by, descending, after):
+    """Yield NDJSON lines, reading the table in keyset batches on a private session.
+
+    The request-scoped session may be closed before the body is fully sent, so
+    the stream owns its own session for its whole lifetime.
+    """
+    db = database.ReadSessionLocal()
+    try:
+        while True:
+            rows = db.execute(stream_stmt(selected, filters, order_by, descending, after)).all()
+            if not rows:
+                break
+            lines, after = ndjson_batch(rows, selected)
+            yield lines
+            if after is None:
+                break
+    finally:
+        db.close()
+
+
 @router.get("/", response_model=List[schemas.Note])
-def read_notes(db: Session = Depends(database.get_db)):
-    return db.query(models.Note).all()
+def read_notes(
+    request: Request,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    order_by: Literal["id", "date"] = "id",
+    descending: bool = False,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of note fields"),
+    output_format: Optional[Literal["json", "ndjson", "msgpack"]] = Query(
+        None, alias="format", description="Overrides the Accept header"
+    ),
+    db: Session = Depends(database.get_read_db),
+):
+    """List notes, newest-last by default, one keyset page at a time.
+
+    The cursor for the next page is returned in the ``X-Next-Cursor`` header.
+    Pages carry a strong ``ETag``; send it back in ``If-None-Match`` to get a
+    ``304`` while the page is unchanged. With ``Accept: application/x-ndjson``
+    (or ``format=ndjson``) every matching row from ``cursor`` onwards is
+    streamed, one JSON object per line, and ``limit`` is ignored;
+    ``Accept: application/msgpack`` returns the page as MessagePack.
+    """
+    selected, after, representation = list_params(request, cursor, order_by, fields, output_format)
+    filters = {"status": status, "date_from": date_from, "date_to": date_to}
+    if representation == "ndjson":
+        return ndjson_response(_stream_notes(selected, filters, order_by, descending, after))
+
+    # Validate against (id, version, updated_at) only; rows are loaded and serialized on a miss
+    key = response_cache.list_key(request, representation)
+    validators = db.execute(validators_stmt(filters, order_by, descending, after, limit)).all()
+    cached = cached_response(request, key, response_cache.page_etag(key, validators))
+    if cached is not None:
+        return cached
+    rows = db.execute(rows_stmt(selected, filters, order_by, descending, after, limit)).all()
+    return page_response(key, rows, limit, order_by, selected, representation)
 
 
 @router.get("/{note_id}", response_model=schemas.Note)
-def read_note(note_id: int, db: Session = Depends(database.get_db)):
+def read_note(note_id: int, request: Request, db: Session = Depends(database.get_read_db)):
+    """Read one note. Supports ``If-None-Match`` with the returned ``ETag``."""
+    key = response_cache.note_key(note_id)
+    etag = note_etag(note_id, db.execute(note_etag_stmt(note_id)).first())
+    cached = cached_response(request, key, etag)
+    if cached is not None:
+        return cached
+    return note_response(key, note_id, db.execute(note_stmt(note_id)))
+
+
+@router.get("/{note_id}/enrichment", response_model=schemas.EnrichmentStatus)
+def read_enrichment(note_id: int, db: Session = Depends(database.get_read_db)):
     note = db.query(models.Note).filter(models.Note.id == note_id).first()
     if note is None:
         raise HTTPException(status_code=404, detail="Note not found")
-    return note
+    job = (
+        db.query(models.EnrichmentJob)
+        .filter(models.EnrichmentJob.note_id == note_id)
+        .order_by(models.EnrichmentJob.id.desc())
+        .first()
+    )
+    return schemas.EnrichmentStatus(
+        note_id=note.id,
+        status=note.enrichment_status,
+        attempts=job.attempts if job else 0,
+        last_error=job.last_error if job else None,
+        action_items=note.action_items or [],
+    )
 
 
 @router.put("/{note_id}", response_model=schemas.Note)
@@ -47,17 +263,65 @@ def update_note(note_id: int, note: schemas.NoteUpdate, db: Session = Depends(da
         setattr(db_note, key, value)
     db.commit()
     db.refresh(db_note)
+    response_cache.invalidate(note_id)
     return db_note
 
 
+def ai_unavailable(exc: AIUnavailable) -> HTTPException:
+    """503 for calls the OpenAI guard shed (circuit open, over quota or too many in flight)."""
+    return HTTPException(
+        status_code=503,
+        detail="AI service temporarily unavailable",
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
 @router.post("/ai-action-items", response_model=List[str])
 def ai_action_items(description: str):
     if not description or not description.strip():
         raise HTTPException(status_code=400, detail="Description is required")
     try:
         return generate_action_items(description)
+    except AIUnavailable as exc:
+        raise ai_unavailable(exc) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=502, detail="Failed to generate action items") from exc
+
+
+@router.post("/ai-action-items/batch", response_model=schemas.AIBatchActionItemsResponse, tags=["ai"])
+def ai_action_items_batch(payload: schemas.AIBatchActionItemsRequest):
+    if any(not d or not d.strip() for d in payload.descriptions):
+        raise HTTPException(status_code=400, detail="Every description must be non-empty")
+    try:
+        results = generate_action_items_batch(payload.descriptions)
+    except AIUnavailable as exc:
+        raise ai_unavailable(exc) from exc
     except Exception as exc:
         raise HTTPException(status_code=502, detail="Failed to generate action items") from exc
+    return {"results": results}
+
+
+@router.get("/ai-cache/stats", tags=["ai"])
+def ai_cache_stats():
+    return ai_cache.snapshot()
+
+
+@router.get("/response-cache/stats")
+def response_cache_stats():
+    return response_cache.cache.snapshot()
+
+
+def note_create_from_fields(description: str, inferred: dict) -> schemas.NoteCreate:
+    """Validate AI-inferred fields as a ``NoteCreate``; a missing date defaults to now (UTC)."""
+    if not inferred.get("date"):
+        inferred["date"] = datetime.now(timezone.utc).isoformat()
+    return schemas.NoteCreate(
+        title=inferred.get("title") or "Untitled",
+        description=description,
+        status=inferred.get("status") or "open",
+        date=inferred.get("date"),
+        action_items=inferred.get("action_items") or [],
+    )
 
 
 @router.post("/ai-note", response_model=schemas.Note, tags=["ai"])
@@ -66,24 +330,14 @@ def ai_create_note(payload: schemas.AINoteCreateRequest, db: Session = Depends(d
         raise HTTPException(status_code=400, detail="Description is required")
     try:
         inferred = generate_note_fields(payload.description)
+    except AIUnavailable as exc:
+        raise ai_unavailable(exc) from exc
     except Exception as exc:
         raise HTTPException(status_code=502, detail="Failed to infer note fields") from exc
 
     # Coerce to NoteCreate via Pydantic to validate types/formats
     try:
-        # If model returns empty date, default to now in UTC-compatible ISO string
-        from datetime import datetime, timezone
-
-        if not inferred.get("date"):
-            inferred["date"] = datetime.now(timezone.utc).isoformat()
-
-        note_create = schemas.NoteCreate(
-            title=inferred.get("title") or "Untitled",
-            description=payload.description,
-            status=inferred.get("status") or "open",
-            date=inferred.get("date"),
-            action_items=inferred.get("action_items") or [],
-        )
+        note_create = note_create_from_fields(payload.description, inferred)
     except Exception:
         raise HTTPException(status_code=422, detail="Invalid fields inferred from description")
 
@@ -91,9 +345,94 @@ def ai_create_note(payload: schemas.AINoteCreateRequest, db: Session = Depends(d
     db.add(db_note)
     db.commit()
     db.refresh(db_note)
+    response_cache.invalidate()
     return db_note
 
 
+class AINoteEvents:
+    """SSE shaping for ``/ai-note/stream``, shared with notes_async.
+
+    ``event`` turns each ``(field, value)`` from the model into SSE text (None
+    for the final ``fields``, which it keeps); ``note_create`` validates what
+    was kept, and ``note`` is the last event once it is stored.
+    """
+
+    def __init__(self, description: str):
+        self.description = description
+        self.inferred: Optional[dict] = None
+        self.items = 0
+
+    def event(self, name: str, value) -> Optional[str]:
+        if name == "fields":
+            self.inferred = value
+            return None
+        if name == "action_item":
+            self.items += 1
+            return sse_event(name, {"index": self.items - 1, "value": value})
+        return sse_event(name, {"value": value})
+
+    @staticmethod
+    def error(exc: Exception) -> str:
+        if isinstance(exc, AIUnavailable):
+            return sse_event("error", {"status": 503, "detail": "AI service temporarily unavailable"})
+        return sse_event("error", {"status": 502, "detail": "Failed to infer note fields"})
+
+    def note_create(self) -> Tuple[Optional[schemas.NoteCreate], Optional[str]]:
+        """The note to store, or the ``error`` event when the inferred fields are invalid."""
+        try:
+            return note_create_from_fields(self.description, self.inferred), None
+        except Exception:
+            return None, sse_event("error", {"status": 422, "detail": "Invalid fields inferred from description"})
+
+    @staticmethod
+    def note(db_note: models.Note) -> str:
+        return sse_event("note", jsonable_encoder(schemas.Note.model_validate(db_note)))
+
+
+def _stream_ai_note(description: str):
+    """Yield SSE events as fields arrive, then persist the note on a private session."""
+    events = AINoteEvents(description)
+    try:
+        for name, value in stream_note_fields(description):
+            event = events.event(name, value)
+            if event is not None:
+                yield event
+    except Exception as exc:
+        yield events.error(exc)
+        return
+    note_create, error = events.note_create()
+    if error is not None:
+        yield error
+        return
+
+    db = database.SessionLocal()
+    try:
+        db_note = models.Note(**note_create.model_dump())
+        db.add(db_note)
+        db.commit()
+        db.refresh(db_note)
+        note = events.note(db_note)
+    finally:
+        db.close()
+    response_cache.invalidate()
+    yield note
+
+
+@router.post("/ai-note/stream", tags=["ai"])
+def ai_create_note_stream(payload: schemas.AINoteCreateRequest):
+    """Like ``POST /notes/ai-note`` but streams Server-Sent Events while the model writes.
+
+    Events: ``title``, ``status``, ``date`` (``{"value": ...}``), one
+    ``action_item`` per item (``{"index": n, "value": ...}``), then ``note``
+    with the stored note, or ``error`` (``{"status": ..., "detail": ...}``).
+    """
+    if not payload.description or not payload.description.strip():
+        raise HTTPException(status_code=400, detail="Description is required")
+    return StreamingResponse(
+        _stream_ai_note(payload.description), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
 @router.delete("/{note_id}")
 def delete_note(note_id: int, db: Session = Depends(database.get_db)):
     db_note = db.query(models.Note).filter(models.Note.id == note_id).first()
@@ -101,4 +440,5 @@ def delete_note(note_id: int, db: Session = Depends(database.get_db)):
         raise HTTPException(status_code=404, detail="Note not found")
     db.delete(db_note)
     db.commit()
+    response_cache.invalidate(note_id)
     return {"detail": "Note deleted"}
@@ -0,0 +1,197 @@
+"""Async versions of the hot Notes routes, mounted ahead of ``notes.router`` in ASYNC_MODE.
+
+Handlers await ``AsyncSession`` and ``AsyncOpenAI`` instead of holding a
+threadpool worker for the duration of an LLM call. Routes not defined here are
+served by the sync router. Path ids use the ``int`` convertor so literal paths
+such as ``/notes/ai-cache/stats`` are never captured by ``/{note_id}``.
+"""
+from datetime import datetime
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models, schemas, database, pagination, response_cache
+from ..services import enrichment
+from ..services.ai import AIUnavailable, agenerate_action_items, agenerate_note_fields, astream_note_fields
+from ..services.streaming import SSE_HEADERS
+from . import notes
+from .notes import ai_unavailable, note_create_from_fields
+
+router = APIRouter()
+
+
+async def _get_note(db: AsyncSession, note_id: int) -> models.Note:
+    note = await db.get(models.Note, note_id)
+    if note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return note
+
+
+@router.post("/", response_model=schemas.Note)
+async def create_note(note: schemas.NoteCreate, db: AsyncSession = Depends(database.get_async_db)):
+    payload = note.model_dump()
+    needs_ai = (not payload.get("action_items")) and payload.get("description")
+    deferred = needs_ai and enrichment.is_deferred()
+    if needs_ai and not deferred:
+        # Auto-generate action items if not provided
+        try:
+            payload["action_items"] = await agenerate_action_items(payload["description"])
+            payload["enrichment_status"] = "done"
+        except Exception:
+            # Fail open: if AI fails, proceed without auto items
+            payload["action_items"] = payload.get("action_items") or []
+            payload["enrichment_status"] = "failed"
+    db_note = models.Note(**payload)
+    db.add(db_note)
+    if deferred:
+        db_note.enrichment_status = "pending"
+        await db.flush()
+        db.add(enrichment.new_job(db_note.id))
+    await db.commit()
+    await db.refresh(db_note)
+    response_cache.invalidate()
+    if deferred:
+        enrichment.notify()
+    return db_note
+
+
+async def _stream_notes(selected, filters, order_by, descending, after):
+    async with database.AsyncSessionLocal() as db:
+        while True:
+            rows = (await db.execute(notes.stream_stmt(selected, filters, order_by, descending, after))).all()
+            if not rows:
+                break
+            lines, after = notes.ndjson_batch(rows, selected)
+            yield lines
+            if after is None:
+                break
+
+
+@router.get("/", response_model=List[schemas.Note])
+async def read_notes(
+    request: Request,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    order_by: Literal["id", "date"] = "id",
+    descending: bool = False,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of note fields"),
+    output_format: Optional[Literal["json", "ndjson", "msgpack"]] = Query(
+        None, alias="format", description="Overrides the Accept header"
+    ),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    selected, after, representation = notes.list_params(request, cursor, order_by, fields, output_format)
+    filters = {"status": status, "date_from": date_from, "date_to": date_to}
+    if representation == "ndjson":
+        return notes.ndjson_response(_stream_notes(selected, filters, order_by, descending, after))
+
+    key = response_cache.list_key(request, representation)
+    validators = (await db.execute(notes.validators_stmt(filters, order_by, descending, after, limit))).all()
+    cached = notes.cached_response(request, key, response_cache.page_etag(key, validators))
+    if cached is not None:
+        return cached
+    rows = (await db.execute(notes.rows_stmt(selected, filters, order_by, descending, after, limit))).all()
+    return notes.page_response(key, rows, limit, order_by, selected, representation)
+
+
+@router.get("/{note_id:int}", response_model=schemas.Note)
+async def read_note(note_id: int, request: Request, db: AsyncSession = Depends(database.get_async_db)):
+    key = response_cache.note_key(note_id)
+    etag = notes.note_etag(note_id, (await db.execute(notes.note_etag_stmt(note_id))).first())
+    cached = notes.cached_response(request, key, etag)
+    if cached is not None:
+        return cached
+    return notes.note_response(key, note_id, await db.execute(notes.note_stmt(note_id)))
+
+
+@router.put("/{note_id:int}", response_model=schemas.Note)
+async def update_note(note_id: int, note: schemas.NoteUpdate, db: AsyncSession = Depends(database.get_async_db)):
+    db_note = await _get_note(db, note_id)
+    for key, value in note.model_dump(exclude_unset=True).items():
+        setattr(db_note, key, value)
+    await db.commit()
+    await db.refresh(db_note)
+    response_cache.invalidate(note_id)
+    return db_note
+
+
+@router.post("/ai-action-items", response_model=List[str])
+async def ai_action_items(description: str):
+    if not description or not description.strip():
+        raise HTTPException(status_code=400, detail="Description is required")
+    try:
+        return await agenerate_action_items(description)
+    except AIUnavailable as exc:
+        raise ai_unavailable(exc) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=502, detail="Failed to generate action items") from exc
+
+
+@router.post("/ai-note", response_model=schemas.Note, tags=["ai"])
+async def ai_create_note(payload: schemas.AINoteCreateRequest, db: AsyncSession = Depends(database.get_async_db)):
+    if not payload.description or not payload.description.strip():
+        raise HTTPException(status_code=400, detail="Description is required")
+    try:
+        inferred = await agenerate_note_fields(payload.description)
+    except AIUnavailable as exc:
+        raise ai_unavailable(exc) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=502, detail="Failed to infer note fields") from exc
+
+    try:
+        note_create = note_create_from_fields(payload.description, inferred)
+    except Exception:
+        raise HTTPException(status_code=422, detail="Invalid fields inferred from description")
+
+    db_note = models.Note(**note_create.model_dump())
+    db.add(db_note)
+    await db.commit()
+    await db.refresh(db_note)
+    response_cache.invalidate()
+    return db_note
+
+
+async def _stream_ai_note(description: str):
+    events = notes.AINoteEvents(description)
+    try:
+        async for name, value in astream_note_fields(description):
+            event = events.event(name, value)
+            if event is not None:
+                yield event
+    except Exception as exc:
+        yield events.error(exc)
+        return
+    note_create, error = events.note_create()
+    if error is not None:
+        yield error
+        return
+
+    async with database.AsyncSessionLocal() as db:
+        db_note = models.Note(**note_create.model_dump())
+        db.add(db_note)
+        await db.commit()
+        await db.refresh(db_note)
+        note = events.note(db_note)
+    response_cache.invalidate()
+    yield note
+
+
+@router.post("/ai-note/stream", tags=["ai"])
+async def ai_create_note_stream(payload: schemas.AINoteCreateRequest):
+    if not payload.description or not payload.description.strip():
+        raise HTTPException(status_code=400, detail="Description is required")
+    return StreamingResponse(
+        _stream_ai_note(payload.description), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+@router.delete("/{note_id:int}")
+async def delete_note(note_id: int, db: AsyncSession = Depends(database.get_async_db)):
+    db_note = await _get_note(db, note_id)
+    await db.delete(db_note)
+    await db.commit()
+    response_cache.invalidate(note_id)
+    return {"detail": "Note deleted"}
@@ -0,0 +1,69 @@
+from typing import List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from .. import database, embeddings, models, schemas, search
+
+router = APIRouter()
+
+
+@router.get("/search", response_model=List[schemas.NoteSearchHit])
+def search_notes(
+    q: str = Query(..., min_length=1, description="Words to match in title, description or action items"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(database.get_read_db),
+):
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query is required")
+    try:
+        hits = search.search(db, q, limit, offset)
+    except OperationalError as exc:
+        raise HTTPException(status_code=400, detail="Invalid search query") from exc
+    return [{"note": note, "rank": rank, "snippet": snippet} for note, rank, snippet in hits]
+
+
+def _similar_hits(db: Session, hits: List[Tuple[int, float]], min_score: float) -> List[dict]:
+    hits = [(note_id, score) for note_id, score in hits if score >= min_score]
+    if not hits:
+        return []
+    notes = {
+        note.id: note
+        for note in db.query(models.Note).filter(models.Note.id.in_([note_id for note_id, _ in hits]))
+    }
+    # Skip ids deleted since the index last saw them
+    return [{"note": notes[note_id], "score": score} for note_id, score in hits if note_id in notes]
+
+
+@router.get("/semantic-search", response_model=List[schemas.NoteSimilarHit])
+def semantic_search(
+    q: str = Query(..., min_length=1, description="Free text, e.g. a new meeting description"),
+    limit: int = Query(10, ge=1, le=100),
+    min_score: float = Query(0.0, ge=0.0, le=1.0),
+    db: Session = Depends(database.get_read_db),
+):
+    """Notes whose title and description are closest to ``q``, best first. No LLM call is made."""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query is required")
+    return _similar_hits(db, embeddings.search(q, limit), min_score)
+
+
+@router.get("/{note_id}/similar", response_model=List[schemas.NoteSimilarHit])
+def similar_notes(
+    note_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    min_score: float = Query(0.0, ge=0.0, le=1.0),
+    db: Session = Depends(database.get_read_db),
+):
+    """Notes most similar to ``note_id``, excluding the note itself."""
+    row = (
+        db.query(models.Note.title, models.Note.description, models.Note.embedding)
+        .filter(models.Note.id == note_id)
+        .first()
+    )
+    if row is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    vector = embeddings.from_blob(row.embedding)
+    if vector is None:
+        vector = embeddings.embed(row.title, row.description)
+    return _similar_hits(db, embeddings.nearest(vector, limit, exclude=note_id), min_score)
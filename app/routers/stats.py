@@ -0,0 +1,25 @@
+"""Dashboard aggregates served from the trigger-maintained ``note_stats`` table."""
+from datetime import date
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from .. import database, schemas, stats
+
+router = APIRouter()
+
+
+@router.get("/stats", response_model=schemas.NoteStats)
+def read_stats(
+    granularity: Optional[Literal["day", "week", "month"]] = Query(
+        None, description="Also return per-period buckets"
+    ),
+    date_from: Optional[date] = Query(None, alias="from", description="First note date to include"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last note date to include"),
+    status: Optional[str] = None,
+    db: Session = Depends(database.get_read_db),
+):
+    """Note counts by status, action-item totals and optional per-day/week/month buckets.
+
+    Reads one pre-aggregated row per day and status, never the notes themselves.
+    """
+    return stats.summary(db, granularity, date_from, date_to, status)
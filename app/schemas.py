@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 
 class NoteBase(BaseModel):
@@ -25,10 +25,127 @@ class NoteUpdate(BaseModel):
 
 class Note(NoteBase):
     id: int
+    enrichment_status: Optional[str] = None
+    version: int = 1
+    # Unix timestamp of the last write; None for rows written before the column existed
+    updated_at: Optional[float] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class NoteSearchHit(BaseModel):
+    note: Note
+    # bm25 score; lower is a better match
+    rank: float
+    snippet: str
+
+
+class NoteSimilarHit(BaseModel):
+    note: Note
+    # cosine similarity of the hashed title + description vectors; 1.0 is identical
+    score: float
+
+
+class ActionItem(BaseModel):
+    id: int
+    note_id: int
+    # Index into the note's ``action_items`` list
+    position: int
+    text: str
+    done: bool
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ActionItemUpdate(BaseModel):
+    done: Optional[bool] = None
+    text: Optional[str] = Field(None, min_length=1)
+
+
+class ActionItemCount(BaseModel):
+    note_status: str
+    done: bool
+    count: int
+
+
+class NoteStatsBucket(BaseModel):
+    # First day of the period (YYYY-MM-DD); weeks start on Monday
+    period: str
+    notes: int
+    action_items: int
+    action_items_done: int
+    by_status: Dict[str, int]
+
+
+class NoteStats(BaseModel):
+    notes: int
+    action_items: int
+    action_items_done: int
+    by_status: Dict[str, int]
+    # Only present when a granularity was requested
+    buckets: Optional[List[NoteStatsBucket]] = None
+
+
+class NoteChange(BaseModel):
+    seq: int
+    op: Literal["create", "update", "delete"]
+    note_id: int
+    version: Optional[int] = None
+    changed_at: float
+    # Current state of the note; None for deletes
+    note: Optional[Note] = None
+
+
+class NoteChanges(BaseModel):
+    changes: List[NoteChange]
+    # Pass as ``since`` to continue after this batch
+    cursor: int
+    has_more: bool
+
+
+class NoteBulkUpdate(NoteUpdate):
+    id: int
+
+    @field_validator("title", "status", "date")
+    @classmethod
+    def _not_null(cls, value):
+        # Omit a field to leave it unchanged; these columns are NOT NULL
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+
+class NoteBulkDelete(BaseModel):
+    ids: List[int] = Field(min_length=1)
+
+
+class NoteBulkDeleteItem(BaseModel):
+    """One entry of a bulk delete body: a note id, bare or as ``{"id": ...}``."""
+
+    id: int
+
+    @model_validator(mode="before")
+    @classmethod
+    def _bare_id(cls, value):
+        return {"id": value} if isinstance(value, (int, str)) else value
+
+
+class BulkItemResult(BaseModel):
+    # Position of the item in the request body (array index or NDJSON line)
+    index: int
+    id: Optional[int] = None
+    # Per-item HTTP-style status: 200/201 on success, 404 or 422 on failure
+    status: int
+    error: Optional[str] = None
+    note: Optional[Note] = None
+
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+
 class AIGenerateActionItemsRequest(BaseModel):
     description: str
 
@@ -37,5 +154,22 @@ class AIGenerateActionItemsResponse(BaseModel):
     action_items: List[str]
 
 
+class AIBatchActionItemsRequest(BaseModel):
+    descriptions: List[str] = Field(min_length=1, max_length=500)
+
+
+class AIBatchActionItemsResponse(BaseModel):
+    # One list per description, in request order
+    results: List[List[str]]
+
+
 class AINoteCreateRequest(BaseModel):
     description: str
+
+
+class EnrichmentStatus(BaseModel):
+    note_id: int
+    status: Optional[str] = None
+    attempts: int = 0
+    last_error: Optional[str] = None
+    action_items: List[str] = Field(default_factory=list)
@@ -0,0 +1,86 @@
+import logging
+from typing import List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+from . import models
+
+logger = logging.getLogger("app.search")
+
+FTS_TABLE = "notes_fts"
+
+# External-content FTS5 index over notes; the triggers keep it in sync with
+# every write to ``notes``, including Core bulk statements that bypass the ORM.
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, action_items,
+        content='notes', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, action_items)
+        VALUES (new.id, new.title, new.description, new.action_items);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, action_items)
+        VALUES ('delete', old.id, old.title, old.description, old.action_items);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE OF title, description, action_items ON notes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, action_items)
+        VALUES ('delete', old.id, old.title, old.description, old.action_items);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, action_items)
+        VALUES (new.id, new.title, new.description, new.action_items);
+    END""",
+]
+
+# bm25 column weights: title matches count most, action items least
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+
+
+def ensure_fts(conn) -> None:
+    """Create the FTS table and triggers, populating the index on first creation."""
+    if conn.dialect.name != "sqlite":
+        return
+    created = FTS_TABLE not in inspect(conn).get_table_names()
+    for ddl in FTS_DDL:
+        conn.execute(text(ddl))
+    if created:
+        logger.info("Created %s; indexing existing notes", FTS_TABLE)
+        rebuild(conn)
+
+
+def rebuild(conn) -> None:
+    """Re-index every note from the ``notes`` table."""
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def to_match_query(q: str) -> str:
+    """Quote each term so user input is matched literally, never parsed as FTS syntax.
+
+    Terms are ANDed; the last one also matches as a prefix for search-as-you-type.
+    """
+    terms = ['"' + term.replace('"', '""') + '"' for term in q.split()]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search(db: Session, q: str, limit: int, offset: int) -> List[Tuple[models.Note, float, str]]:
+    """Return (note, bm25 rank, snippet) tuples, best match first."""
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    rows = db.execute(
+        text(
+            f"SELECT rowid, bm25({FTS_TABLE}, {weights}) AS rank, "
+            f"snippet({FTS_TABLE}, -1, '<mark>', '</mark>', '…', 12) AS snippet "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+            "ORDER BY rank LIMIT :limit OFFSET :offset"
+        ),
+        {"match": to_match_query(q), "limit": limit, "offset": offset},
+    ).all()
+    if not rows:
+        return []
+    notes = {
+        note.id: note
+        for note in db.query(models.Note).filter(models.Note.id.in_([row.rowid for row in rows]))
+    }
+    return [(notes[row.rowid], row.rank, row.snippet) for row in rows if row.rowid in notes]
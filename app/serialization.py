@@ -0,0 +1,114 @@
+"""JSON encoding of note read responses.
+
+By default each row is validated into ``schemas.Note`` and then dumped, which is
+what a ``response_model`` would do. With ``FAST_RESPONSES`` enabled, routes read
+rows as plain mappings and dump them through a precompiled TypedDict adapter
+built from the same schema: no model instances, no second validation pass, and
+bytes come straight out of pydantic-core. Both paths produce identical JSON.
+
+Note collections can also be requested as NDJSON or, with the optional
+``msgpack`` package installed, MessagePack; ``negotiate`` picks the
+representation from the ``Accept`` header (or an explicit ``format=``).
+"""
+import importlib.util
+import json
+import os
+from typing import Any, List, Mapping, Optional, Sequence, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+from . import models, schemas
+
+FAST_RESPONSES = os.getenv("FAST_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+# Row-shaped twin of schemas.Note; total=False so sparse ``fields=`` rows fit too
+NoteRow = TypedDict(
+    "NoteRow", {name: field.annotation for name, field in schemas.Note.model_fields.items()}, total=False
+)
+
+NOTE_LIST = TypeAdapter(List[schemas.Note])
+NOTE_ROW = TypeAdapter(NoteRow)
+NOTE_ROWS = TypeAdapter(List[NoteRow])
+
+NOTE_COLUMNS = tuple(getattr(models.Note, name) for name in schemas.Note.model_fields)
+
+JSON_TYPE = "application/json"
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+MEDIA_TYPES = {"json": JSON_TYPE, "ndjson": NDJSON_TYPES[0], "msgpack": MSGPACK_TYPES[0]}
+
+MSGPACK_AVAILABLE = importlib.util.find_spec("msgpack") is not None
+
+
+def dump_note(note: Any) -> bytes:
+    """Encode one note: an ORM instance, or a row mapping in fast mode."""
+    if FAST_RESPONSES:
+        return NOTE_ROW.dump_json(note)
+    return schemas.Note.model_validate(note).model_dump_json().encode()
+
+
+def dump_page(items: List[Mapping[str, Any]], fields: Optional[Sequence[str]]) -> bytes:
+    """Encode a list page of projected row mappings."""
+    if FAST_RESPONSES:
+        return NOTE_ROWS.dump_json(items)
+    if fields is None:
+        return NOTE_LIST.dump_json(NOTE_LIST.validate_python(items))
+    # Sparse rows do not satisfy the full Note schema
+    return json.dumps(jsonable_encoder(items), separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def dump_page_msgpack(items: List[Mapping[str, Any]]) -> bytes:
+    """MessagePack twin of ``dump_page``: the same values, datetimes as ISO strings."""
+    import msgpack
+
+    return msgpack.packb(NOTE_ROWS.dump_python(items, mode="json"))
+
+
+def available_types() -> List[str]:
+    return [MEDIA_TYPES[name] for name in ("json", "ndjson", "msgpack") if name != "msgpack" or MSGPACK_AVAILABLE]
+
+
+def _media_ranges(accept: str) -> List[Tuple[str, float]]:
+    ranges = []
+    for part in accept.split(","):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type:
+            ranges.append((media_type.lower(), quality))
+    return ranges
+
+
+def negotiate(accept: Optional[str], explicit: Optional[str] = None) -> Optional[str]:
+    """Representation of a note collection: ``json``, ``ndjson`` or ``msgpack``.
+
+    An explicit ``format=`` wins; otherwise the ``Accept`` media range with the
+    highest quality does, JSON first on ties. ``None`` when nothing acceptable
+    can be produced (the route answers 406).
+    """
+    if explicit:
+        return explicit if explicit != "msgpack" or MSGPACK_AVAILABLE else None
+    if not accept:
+        return "json"
+    offered = {JSON_TYPE: "json", **{t: "ndjson" for t in NDJSON_TYPES}}
+    if MSGPACK_AVAILABLE:
+        offered.update({t: "msgpack" for t in MSGPACK_TYPES})
+    best, best_quality = None, 0.0
+    for media_type, quality in _media_ranges(accept):
+        if media_type in ("*/*", "application/*"):
+            choice = "json"
+        else:
+            choice = offered.get(media_type)
+        if choice is None or quality <= 0:
+            continue
+        if quality > best_quality or (quality == best_quality and choice == "json"):
+            best, best_quality = choice, quality
+    return best
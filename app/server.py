@@ -0,0 +1,228 @@
+"""Production server: ``python -m app.server``.
+
+A small pre-fork supervisor around uvicorn, configured from the environment:
+
+- the parent imports the app once (``preload``) and runs the schema migration
+  once, then forks ``WEB_CONCURRENCY`` workers (default: one per available
+  core) that share the listening socket and the already-imported modules;
+- each worker is a plain ``uvicorn.Server``: uvloop and httptools are used when
+  installed (``SERVER_LOOP``/``SERVER_HTTP`` override), with the configured
+  backlog and keep-alive timeout;
+- a worker exits after ``SERVER_MAX_REQUESTS`` requests (plus a random jitter so
+  they do not all recycle together) and is replaced, bounding memory growth;
+- SIGTERM/SIGINT stop accepting connections and give in-flight requests,
+  including OpenAI calls, ``SERVER_GRACEFUL_TIMEOUT`` seconds to finish before
+  the lifespan shutdown drains enrichment jobs and closes the clients.
+
+``run.py`` remains the single-process auto-reloading development server.
+Platforms without ``fork`` fall back to uvicorn's own multi-process mode.
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import random
+import signal
+import socket
+import time
+from typing import Dict
+
+import uvicorn
+
+logger = logging.getLogger("app.server")
+
+APP = "app.main:app"
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def default_workers() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        return os.cpu_count() or 1
+
+
+def event_loop() -> str:
+    setting = os.getenv("SERVER_LOOP", "auto")
+    if setting != "auto":
+        return setting
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    setting = os.getenv("SERVER_HTTP", "auto")
+    if setting != "auto":
+        return setting
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.server", description="Multi-worker production server")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")) or default_workers())
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("SERVER_BACKLOG", "2048")))
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("SERVER_KEEPALIVE_TIMEOUT", "5")))
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("SERVER_MAX_REQUESTS", "0")))
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0")))
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "60")))
+    parser.add_argument("--limit-concurrency", type=int, default=int(os.getenv("SERVER_LIMIT_CONCURRENCY", "0")))
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info").lower())
+    parser.add_argument(
+        "--preload", action=argparse.BooleanOptionalAction, default=_env_flag("SERVER_PRELOAD", "true"),
+        help="Fork workers from a parent that imported the app; --no-preload lets every worker import it itself",
+    )
+    return parser.parse_args(argv)
+
+
+def uvicorn_options(args: argparse.Namespace) -> dict:
+    return dict(
+        host=args.host,
+        port=args.port,
+        loop=event_loop(),
+        http=http_protocol(),
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_concurrency=args.limit_concurrency or None,
+        limit_max_requests=args.max_requests or None,
+        log_level=args.log_level,
+        access_log=False,
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS"),
+    )
+
+
+def preload():
+    """Import the app and migrate once in the parent; workers inherit both through fork.
+
+    The OpenAI SDK, which the app itself imports lazily, is loaded here too so
+    that workers share it instead of each importing it on their first AI call.
+    """
+    from . import database, main, migrations
+    from .services import ai
+
+    ai.import_sdk()
+
+    if main.AUTO_MIGRATE:
+        migrations.upgrade(database.engine)
+        # Workers must not repeat (and race on) the DDL
+        main.AUTO_MIGRATE = False
+    # Forked children must open their own connections
+    database.engine.dispose()
+    database.read_engine.dispose()
+    return main.app
+
+
+class Supervisor:
+    """Forks workers sharing one listening socket, replaces the ones that exit and stops them on signals."""
+
+    def __init__(self, args: argparse.Namespace, app):
+        self.args = args
+        self.app = app
+        self.sock: socket.socket = uvicorn.Config(app, **uvicorn_options(args)).bind_socket()
+        self.workers: Dict[int, float] = {}  # pid -> start time
+        self.stopping = False
+
+    def spawn(self) -> None:
+        max_requests = self.args.max_requests
+        if max_requests and self.args.max_requests_jitter:
+            max_requests += random.randint(0, self.args.max_requests_jitter)
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return
+        # Child: uvicorn installs its own SIGTERM/SIGINT handlers for a graceful stop
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        random.seed()
+        code = 0
+        try:
+            options = dict(uvicorn_options(self.args), limit_max_requests=max_requests or None)
+            uvicorn.Server(uvicorn.Config(self.app, **options)).run(sockets=[self.sock])
+        except BaseException:
+            logger.exception("Worker %d crashed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+
+    def stop(self, signum, frame) -> None:
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info("Received %s; stopping %d workers", signal.Signals(signum).name, len(self.workers))
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info(
+            "Serving on %s:%d with %d workers (loop=%s, http=%s, max_requests=%s)",
+            self.args.host, self.args.port, self.args.workers, event_loop(), http_protocol(),
+            self.args.max_requests or "unlimited",
+        )
+        for _ in range(self.args.workers):
+            self.spawn()
+
+        deadline = None
+        while self.workers:
+            if self.stopping and deadline is None:
+                # Workers wait up to graceful_timeout for requests, then run the lifespan shutdown
+                deadline = time.monotonic() + self.args.graceful_timeout + 10
+            if deadline is not None and time.monotonic() > deadline:
+                for pid in list(self.workers):
+                    logger.warning("Worker %d did not stop in time; killing it", pid)
+                    os.kill(pid, signal.SIGKILL)
+                deadline = float("inf")
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.2)
+                continue
+            started = self.workers.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code == 0:
+                logger.info("Worker %d recycled after %.0fs", pid, time.monotonic() - started)
+            else:
+                logger.warning("Worker %d exited with %d; replacing it", pid, code)
+                if time.monotonic() - started < 5:
+                    time.sleep(1)  # avoid a tight crash loop
+            self.spawn()
+        self.sock.close()
+        logger.info("All workers stopped")
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+    )
+    if args.preload and hasattr(os, "fork"):
+        Supervisor(args, preload()).run()
+        return
+    # No fork (or preload disabled): uvicorn spawns workers that each import the app
+    if args.workers > 1:
+        from . import database, main as app_main, migrations
+
+        if app_main.AUTO_MIGRATE:
+            migrations.upgrade(database.engine)
+            os.environ["AUTO_MIGRATE"] = "false"
+    uvicorn.run(
+        APP, workers=args.workers, limit_max_requests_jitter=args.max_requests_jitter, **uvicorn_options(args)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,48 @@
+import asyncio
+import contextvars
 import os
+import json
 import logging
-from typing import List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterator, List, Optional, Tuple
 
-from openai import OpenAI
-from dotenv import load_dotenv
+from .. import metrics
+from . import budget
+from .batching import MicroBatcher, pack_batches
+from .cache import ai_cache, make_key
+from .guard import AIUnavailable, estimate_tokens, guard  # noqa: F401  (AIUnavailable re-exported)
+from .streaming import NoteFieldsParser
 
+# httpx, openai and dotenv are imported on first use, not with this module, so
+# CRUD-only processes and test runs never pay for loading the SDK
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
 
 logger = logging.getLogger("app.services.ai")
 
+# Shared clients, created once (normally from the app lifespan) and reused so the
+# underlying HTTP connection pool and TLS sessions survive across requests.
+_client: Optional["OpenAI"] = None
+_async_client: Optional["AsyncOpenAI"] = None
+_client_lock = threading.Lock()
 
-def _get_client() -> OpenAI:
+
+def import_sdk() -> None:
+    """Load httpx and the OpenAI SDK now rather than on the first call (e.g. before forking workers)."""
+    import httpx  # noqa: F401
+    import openai  # noqa: F401
+
+
+def load_dotenv() -> None:
+    from dotenv import load_dotenv as _load_dotenv
+
+    _load_dotenv()
+
+
+def _read_api_key() -> str:
     # Load variables from .env if present
     load_dotenv()
     raw_api_key = os.getenv("OPENAI_API_KEY")
@@ -21,21 +54,378 @@ def _get_client() -> OpenAI:
         logger.warning("OPENAI_API_KEY contained surrounding whitespace; stripping")
     if any(ch in raw_api_key for ch in ("\n", "\r", "\t")):
         logger.warning("OPENAI_API_KEY contained control whitespace characters (e.g., newline)")
-    logger.debug("OpenAI client initialized (api key present: %s)", bool(api_key))
-    return OpenAI(api_key=api_key)
+    return api_key
+
+
+def http_limits() -> "httpx.Limits":
+    import httpx
+
+    return httpx.Limits(
+        max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
+def http_timeout() -> "httpx.Timeout":
+    import httpx
+
+    return httpx.Timeout(
+        float(os.getenv("OPENAI_TIMEOUT", "60")),
+        connect=float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5")),
+    )
+
+
+def build_client(
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    transport: Optional["httpx.BaseTransport"] = None,
+) -> "OpenAI":
+    """Build an OpenAI client over a pooled, keep-alive HTTP client.
+
+    ``base_url`` (or ``OPENAI_BASE_URL``) points the client at another server,
+    e.g. a local fake; ``transport`` replaces the network layer entirely.
+    Retries with exponential backoff are handled by the SDK (``OPENAI_MAX_RETRIES``).
+    """
+    import httpx
+    from openai import OpenAI
+
+    http_client = httpx.Client(limits=http_limits(), timeout=http_timeout(), transport=transport)
+    client = OpenAI(
+        api_key=api_key or _read_api_key(),
+        base_url=base_url or os.getenv("OPENAI_BASE_URL") or None,
+        max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2")),
+        timeout=http_timeout(),
+        http_client=http_client,
+    )
+    logger.debug("OpenAI client initialized (base_url=%s)", client.base_url)
+    return client
+
+
+def init_client(client: Optional["OpenAI"] = None) -> "OpenAI":
+    """Install ``client`` (or a newly built one) as the shared client."""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client or build_client()
+    if previous is not None and previous is not _client:
+        previous.close()
+    return _client
+
+
+def close_client() -> None:
+    """Close the shared client and its connection pool."""
+    global _client
+    with _client_lock:
+        previous, _client = _client, None
+    if previous is not None:
+        previous.close()
+        logger.debug("OpenAI client closed")
 
 
+def build_async_client(
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    transport: Optional["httpx.AsyncBaseTransport"] = None,
+) -> "AsyncOpenAI":
+    """Async counterpart of ``build_client`` used when ``ASYNC_MODE`` is enabled."""
+    import httpx
+    from openai import AsyncOpenAI
+
+    http_client = httpx.AsyncClient(limits=http_limits(), timeout=http_timeout(), transport=transport)
+    return AsyncOpenAI(
+        api_key=api_key or _read_api_key(),
+        base_url=base_url or os.getenv("OPENAI_BASE_URL") or None,
+        max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2")),
+        timeout=http_timeout(),
+        http_client=http_client,
+    )
+
+
+def init_async_client(client: Optional["AsyncOpenAI"] = None) -> "AsyncOpenAI":
+    """Install ``client`` (or a newly built one) as the shared async client."""
+    global _async_client
+    _async_client = client or build_async_client()
+    return _async_client
+
+
+async def close_async_client() -> None:
+    global _async_client
+    previous, _async_client = _async_client, None
+    if previous is not None:
+        await previous.close()
+
+
+def _get_async_client() -> "AsyncOpenAI":
+    global _async_client
+    if _async_client is None:
+        _async_client = build_async_client()
+    return _async_client
+
+
+def _get_client() -> "OpenAI":
+    # Normally set up by the app lifespan; build lazily for callers outside it
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = build_client()
+    return _client
+
+
+def _chat(client: "OpenAI", operation: str, **kwargs):
+    """``chat.completions.create`` behind the guard, with latency and token usage recorded in metrics.
+
+    Raises ``AIUnavailable`` without calling OpenAI when the guard sheds the call.
+    """
+    with guard.call(estimate_tokens(kwargs["messages"])) as call:
+        started = time.perf_counter()
+        try:
+            response = client.chat.completions.create(**kwargs)
+        except Exception:
+            metrics.observe_openai(operation, kwargs["model"], started, error=True)
+            raise
+        metrics.observe_openai(operation, kwargs["model"], started, response)
+        call.usage = getattr(response, "usage", None)
+    return response
+
+
+async def _achat(client: "AsyncOpenAI", operation: str, **kwargs):
+    async with guard.acall(estimate_tokens(kwargs["messages"])) as call:
+        started = time.perf_counter()
+        try:
+            response = await client.chat.completions.create(**kwargs)
+        except Exception:
+            metrics.observe_openai(operation, kwargs["model"], started, error=True)
+            raise
+        metrics.observe_openai(operation, kwargs["model"], started, response)
+        call.usage = getattr(response, "usage", None)
+    return response
+
+
+def _chat_stream(client: "OpenAI", operation: str, **kwargs) -> Iterator[str]:
+    """Streaming ``chat.completions.create`` yielding content deltas; guard slot and metrics cover the whole stream."""
+    with guard.call(estimate_tokens(kwargs["messages"])) as call:
+        started = time.perf_counter()
+        usage_chunk = None
+        try:
+            stream = client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **kwargs)
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage_chunk = chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception:
+            metrics.observe_openai(operation, kwargs["model"], started, error=True)
+            raise
+        metrics.observe_openai(operation, kwargs["model"], started, usage_chunk)
+        call.usage = getattr(usage_chunk, "usage", None)
+
+
+async def _achat_stream(client: "AsyncOpenAI", operation: str, **kwargs) -> AsyncIterator[str]:
+    async with guard.acall(estimate_tokens(kwargs["messages"])) as call:
+        started = time.perf_counter()
+        usage_chunk = None
+        try:
+            stream = await client.chat.completions.create(
+                stream=True, stream_options={"include_usage": True}, **kwargs
+            )
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage_chunk = chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception:
+            metrics.observe_openai(operation, kwargs["model"], started, error=True)
+            raise
+        metrics.observe_openai(operation, kwargs["model"], started, usage_chunk)
+        call.usage = getattr(usage_chunk, "usage", None)
+
+
+# Chat model for every endpoint unless overridden per endpoint, e.g. a cheaper
+# model for action items (keeps its own cache entries)
+MODEL = os.getenv("AI_MODEL", "gpt-4o")
+ACTION_ITEMS_MODEL = os.getenv("AI_ACTION_ITEMS_MODEL") or MODEL
+NOTE_FIELDS_MODEL = os.getenv("AI_NOTE_FIELDS_MODEL") or MODEL
+TEMPERATURE = 0.3
+
 SYSTEM_PROMPT = (
     "You are an assistant that extracts concise, actionable action items from a meeting or note description. "
     "Return 3-7 bullet points. Each item should be a short imperative sentence."
 )
 
+BATCH_PROMPT = (
+    "You extract concise, actionable action items from several meeting or note descriptions at once. "
+    "For each description return 3-7 short imperative sentences. "
+    "Respond with a JSON object whose keys are the description indexes (as strings) "
+    "and whose values are arrays of strings."
+)
+
+# Upstream packing limits for batch extraction
+BATCH_MAX_INPUT_TOKENS = int(os.getenv("AI_BATCH_MAX_INPUT_TOKENS", "6000"))
+BATCH_MAX_ITEMS = int(os.getenv("AI_BATCH_MAX_ITEMS", "20"))
+# >0 merges concurrent single-item calls arriving within this window into one call
+MICROBATCH_WINDOW_MS = float(os.getenv("AI_MICROBATCH_WINDOW_MS", "0"))
+
+# Cleaned descriptions longer than this are map-reduced for action items
+# (chunks extracted in parallel, results merged) and trimmed for note fields
+INPUT_TOKEN_BUDGET = int(os.getenv("AI_INPUT_TOKEN_BUDGET", "3000"))
+CHUNK_TOKENS = int(os.getenv("AI_CHUNK_TOKENS", "1500"))
+MAP_CONCURRENCY = int(os.getenv("AI_MAP_CONCURRENCY", "4"))
+MAX_MERGED_ITEMS = int(os.getenv("AI_MAX_MERGED_ITEMS", "15"))
+
+NOTE_FIELDS_PROMPT = (
+    "You extract structured note fields from a free-form description. "
+    "Return strictly valid JSON with keys: title (short phrase), status (one of: open, in_progress, done), "
+    "date (ISO8601), action_items (array of 3-7 short strings)."
+)
+
+
+def prepare(description: str) -> str:
+    """The description as sent upstream (and cached): boilerplate and repeated lines removed."""
+    return budget.clean(description) or (description or "").strip()
+
+
+def _over_budget(text: str) -> bool:
+    return budget.count_tokens(text) > INPUT_TOKEN_BUDGET
+
+
+def _run_in_context(pool: ThreadPoolExecutor, fn, *args):
+    # Worker threads report OpenAI time and usage to the request that started them
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _action_items_messages(description: str) -> List[dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                "Description:\n" + description + "\n\n"
+                "Extract only the action items as a JSON array of strings."
+            ),
+        },
+    ]
+
+
+def _note_fields_messages(description: str) -> List[dict]:
+    return [
+        {"role": "system", "content": NOTE_FIELDS_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                "Description:\n" + description + "\n\n"
+                "Return only JSON, no markdown wrapper."
+            ),
+        },
+    ]
+
+
+def _parse_action_items(content: str) -> List[str]:
+    # Try to parse a JSON array from the model's content
+    try:
+        data = json.loads(content)
+        if isinstance(data, list) and all(isinstance(x, str) for x in data):
+            logger.debug("Parsed JSON array from model response (count=%d)", len(data))
+            return data
+    except Exception:
+        logger.debug("Model response was not valid JSON array; falling back to line split")
+
+    # Fallback: split lines if model responded with bullets
+    lines = [line.strip("- ").strip() for line in content.splitlines() if line.strip()]
+    lines = [line for line in lines if line]
+    logger.debug("Returning %d items from fallback parsing", len(lines[:7]))
+    return lines[:7]
+
+
+def _parse_note_fields(content: str) -> Optional[dict]:
+    """Parse the note-fields JSON, or return ``None`` if the model ignored the format."""
+    try:
+        # Control characters inside strings are accepted, as in NoteFieldsParser
+        data = json.loads(content, strict=False)
+        title = str(data.get("title") or "Untitled")
+        status = str(data.get("status") or "open")
+        date = str(data.get("date") or "")
+        action_items = data.get("action_items") or []
+        if not isinstance(action_items, list):
+            action_items = []
+        action_items = [str(x) for x in action_items][:7]
+        return {
+            "title": title,
+            "status": status,
+            "date": date,
+            "action_items": action_items,
+        }
+    except Exception:
+        logger.debug("Model response not strict JSON; falling back to minimal fields")
+        return None
+
+
+def _fallback_note_fields(description: str, action_items: List[str]) -> dict:
+    return {
+        "title": description.split(".\n")[0][:60] if description else "Untitled",
+        "status": "open",
+        "date": "",
+        "action_items": action_items,
+    }
+
 
-def generate_action_items(description: str) -> List[str]:
+class MapReduceCancelled(Exception):
+    """The caller of a map-reduce set its ``cancel`` event; no further chunk is sent."""
+
+
+def generate_action_items(description: str, cancel: Optional[threading.Event] = None) -> List[str]:
     """Generate action items from a free-form description using OpenAI GPT-4o.
 
     Returns a list of short strings. Falls back to an empty list on parsing issues.
+    Results are cached by (model, prompt, temperature, normalized description).
+    Descriptions over ``AI_INPUT_TOKEN_BUDGET`` are map-reduced; setting
+    ``cancel`` stops one between chunk calls. With ``AI_MICROBATCH_WINDOW_MS``
+    set, concurrent misses share one batch call.
+    """
+    text = prepare(description)
+    key = make_key(ACTION_ITEMS_MODEL, SYSTEM_PROMPT, TEMPERATURE, text)
+    if _over_budget(text):
+        return ai_cache.get_or_compute(key, lambda: _map_reduce_action_items(text, cancel))
+    if MICROBATCH_WINDOW_MS > 0:
+        return ai_cache.get_or_compute(key, lambda: _microbatcher.submit(text))
+    return ai_cache.get_or_compute(key, lambda: _generate_action_items(text))
+
+
+def _check_cancel(cancel: Optional[threading.Event]) -> None:
+    if cancel is not None and cancel.is_set():
+        raise MapReduceCancelled()
+
+
+def _map_chunk(piece: str, stop: threading.Event, cancel: Optional[threading.Event]) -> List[str]:
+    _check_cancel(stop)
+    _check_cancel(cancel)
+    return _generate_action_items(piece)
+
+
+def _map_reduce_action_items(text: str, cancel: Optional[threading.Event] = None) -> List[str]:
+    """Extract from each chunk of ``text`` in parallel and merge the results.
+
+    Chunks not sent yet are skipped once ``cancel`` is set or a chunk fails;
+    calls already in flight finish, but nothing is sent after them.
     """
+    chunks = budget.chunk(text, CHUNK_TOKENS)
+    logger.info("Map-reducing action items (chunks=%d, tokens=%d)", len(chunks), budget.count_tokens(text))
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=max(1, min(MAP_CONCURRENCY, len(chunks))))
+    try:
+        futures = [_run_in_context(pool, _map_chunk, piece, stop, cancel) for piece in chunks]
+        results = []
+        for future in futures:
+            _check_cancel(cancel)
+            results.append(future.result())
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+    _check_cancel(cancel)
+    return budget.merge_items(results, MAX_MERGED_ITEMS)
+
+
+def _generate_action_items(description: str) -> List[str]:
     client = _get_client()
 
     logger.info(
@@ -43,102 +433,350 @@ def generate_action_items(description: str) -> List[str]:
         len(description or ""),
     )
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {
-                    "role": "user",
-                    "content": (
-                        "Description:\n" + description + "\n\n"
-                        "Extract only the action items as a JSON array of strings."
-                    ),
-                },
-            ],
-            temperature=0.3,
+        response = _chat(
+            client,
+            "action_items",
+            model=ACTION_ITEMS_MODEL,
+            messages=_action_items_messages(description),
+            temperature=TEMPERATURE,
         )
     except Exception:
         logger.exception("OpenAI chat.completions.create failed")
         raise
 
-    content = response.choices[0].message.content or "[]"
+    return _parse_action_items(response.choices[0].message.content or "[]")
 
-    # Try to parse a JSON array from the model's content
-    import json
 
+def _batch_messages(descriptions: List[str]) -> List[dict]:
+    numbered = "\n\n".join(f"[{i}]\n{text}" for i, text in enumerate(descriptions))
+    return [
+        {"role": "system", "content": BATCH_PROMPT},
+        {"role": "user", "content": "Descriptions:\n\n" + numbered + "\n\nReturn only the JSON object."},
+    ]
+
+
+def _parse_batch(content: str, count: int) -> List[Optional[List[str]]]:
+    """Map the keyed JSON response back to input order; ``None`` marks unusable entries."""
     try:
         data = json.loads(content)
-        if isinstance(data, list) and all(isinstance(x, str) for x in data):
-            logger.debug("Parsed JSON array from model response (count=%d)", len(data))
-            return data
     except Exception:
-        logger.debug("Model response was not valid JSON array; falling back to line split")
+        logger.debug("Batch response was not valid JSON; falling back per item")
+        return [None] * count
+    if not isinstance(data, dict):
+        return [None] * count
+    results: List[Optional[List[str]]] = []
+    for index in range(count):
+        value = data.get(str(index))
+        if isinstance(value, list) and all(isinstance(x, str) for x in value):
+            results.append(value[:7])
+        elif isinstance(value, str) and value.strip():
+            # Model put bullets in a string; reuse the single-item parser
+            results.append(_parse_action_items(value))
+        else:
+            results.append(None)
+    return results
 
-    # Fallback: split lines if model responded with bullets
-    lines = [line.strip("- ").strip() for line in content.splitlines() if line.strip()]
-    lines = [line for line in lines if line]
-    logger.debug("Returning %d items from fallback parsing", len(lines[:7]))
-    return lines[:7]
+
+def _extract_batch(descriptions: List[str]) -> List[List[str]]:
+    """One upstream call for ``descriptions``, with per-item fallback to single calls."""
+    if len(descriptions) == 1:
+        return [_generate_action_items(descriptions[0])]
+
+    client = _get_client()
+    logger.info("Generating action items for a batch via OpenAI (items=%d)", len(descriptions))
+    try:
+        response = _chat(
+            client,
+            "batch_action_items",
+            model=ACTION_ITEMS_MODEL,
+            messages=_batch_messages(descriptions),
+            temperature=TEMPERATURE,
+            response_format={"type": "json_object"},
+        )
+    except Exception:
+        logger.exception("OpenAI chat.completions.create failed for batch")
+        raise
+
+    parsed = _parse_batch(response.choices[0].message.content or "{}", len(descriptions))
+    missing = [i for i, items in enumerate(parsed) if items is None]
+    if missing:
+        logger.debug("Batch response missed %d items; extracting them individually", len(missing))
+    return [items if items is not None else _generate_action_items(descriptions[i]) for i, items in enumerate(parsed)]
+
+
+def generate_action_items_batch(descriptions: List[str]) -> List[List[str]]:
+    """Extract action items for many descriptions using as few upstream calls as possible.
+
+    Cached descriptions are answered from the cache; the rest are packed into
+    calls that respect ``AI_BATCH_MAX_INPUT_TOKENS``/``AI_BATCH_MAX_ITEMS``,
+    except those over ``AI_INPUT_TOKEN_BUDGET``, which are map-reduced alone.
+    Results are returned in input order and cached per description.
+    """
+    descriptions = [prepare(d) for d in descriptions]
+    keys = [make_key(ACTION_ITEMS_MODEL, SYSTEM_PROMPT, TEMPERATURE, d) for d in descriptions]
+    results: List[Optional[List[str]]] = [ai_cache.get(key) for key in keys]
+
+    # Identical descriptions in one request are sent upstream once
+    todo: dict = {}
+    for index, items in enumerate(results):
+        if items is None:
+            todo.setdefault(keys[index], []).append(index)
+    unique = [indexes[0] for indexes in todo.values()]
+    long = [i for i in unique if _over_budget(descriptions[i])]
+    unique = [i for i in unique if i not in long]
+    texts = [descriptions[i] for i in unique]
+
+    def store(key: str, items: List[str]) -> None:
+        ai_cache.set(key, items)
+        for index in todo[key]:
+            results[index] = list(items)
+
+    for group in pack_batches(texts, BATCH_MAX_INPUT_TOKENS, BATCH_MAX_ITEMS):
+        extracted = _extract_batch([texts[i] for i in group])
+        for position, items in zip(group, extracted):
+            store(keys[unique[position]], items)
+    for index in long:
+        store(keys[index], _map_reduce_action_items(descriptions[index]))
+    return results
+
+
+_microbatcher = MicroBatcher(_extract_batch, window=MICROBATCH_WINDOW_MS / 1000.0, max_items=BATCH_MAX_ITEMS)
 
 
 def generate_note_fields(description: str) -> dict:
     """Infer a full note payload from a description using GPT-4o.
 
     Returns dict with keys: title (str), status (str), date (ISO8601 str), action_items (List[str]).
+    Results are cached like ``generate_action_items``. A description over
+    ``AI_INPUT_TOKEN_BUDGET`` is trimmed to its beginning and end for the
+    prompt, while its action items are map-reduced over the whole text at the
+    same time.
     """
+    text = prepare(description)
+    key = make_key(NOTE_FIELDS_MODEL, NOTE_FIELDS_PROMPT, TEMPERATURE, text)
+    return ai_cache.get_or_compute(key, lambda: _generate_note_fields(text))
+
+
+def _generate_note_fields(description: str) -> dict:
     client = _get_client()
     logger.info("Generating full note fields via OpenAI (desc_len=%d)", len(description or ""))
+    long = _over_budget(description)
+    cancel = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        items = _run_in_context(pool, generate_action_items, description, cancel) if long else None
+        try:
+            response = _chat(
+                client,
+                "note_fields",
+                model=NOTE_FIELDS_MODEL,
+                messages=_note_fields_messages(budget.trim(description, INPUT_TOKEN_BUDGET)),
+                temperature=TEMPERATURE,
+            )
+        except Exception:
+            logger.exception("OpenAI chat.completions.create failed for note fields")
+            raise
+
+        fields = _parse_note_fields(response.choices[0].message.content or "{}")
+        if fields is None:
+            fields = _fallback_note_fields(description, items.result() if long else generate_action_items(description))
+        elif long:
+            fields["action_items"] = items.result()
+    finally:
+        # A failed call neither waits for the map-reduce nor lets it send more chunks
+        cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+    return fields
+
+
+def _cached_field_events(fields: dict) -> Iterator[Tuple[str, Any]]:
+    for name in ("title", "status", "date"):
+        if fields.get(name):
+            yield name, fields[name]
+    for item in fields.get("action_items") or []:
+        yield "action_item", item
+    yield "fields", fields
+
+
+def stream_note_fields(description: str) -> Iterator[Tuple[str, Any]]:
+    """Streaming variant of ``generate_note_fields``.
+
+    Yields ``(field, value)`` pairs (``title``, ``status``, ``date``, one
+    ``action_item`` per item) as soon as the model has produced them, then
+    ``("fields", dict)`` with the complete result, which is also cached.
+    A cache hit replays the cached fields immediately. For a description over
+    ``AI_INPUT_TOKEN_BUDGET`` the action items come from the map-reduce
+    extraction, after the other fields.
+    """
+    text = prepare(description)
+    key = make_key(NOTE_FIELDS_MODEL, NOTE_FIELDS_PROMPT, TEMPERATURE, text)
+    cached = ai_cache.get(key)
+    if cached is not None:
+        yield from _cached_field_events(cached)
+        return
+
+    client = _get_client()
+    logger.info("Streaming note fields via OpenAI (desc_len=%d)", len(text))
+    long = _over_budget(text)
+    parser = NoteFieldsParser()
+    content: List[str] = []
+    cancel = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        items = _run_in_context(pool, generate_action_items, text, cancel) if long else None
+        try:
+            for delta in _chat_stream(
+                client,
+                "note_fields_stream",
+                model=NOTE_FIELDS_MODEL,
+                messages=_note_fields_messages(budget.trim(text, INPUT_TOKEN_BUDGET)),
+                temperature=TEMPERATURE,
+            ):
+                content.append(delta)
+                for event in parser.feed(delta):
+                    # Items from the trimmed prompt are replaced by the merged ones
+                    if not (long and event[0] == "action_item"):
+                        yield event
+        except Exception:
+            logger.exception("OpenAI streaming chat.completions.create failed for note fields")
+            raise
+
+        fields = _parse_note_fields("".join(content) or "{}")
+        if fields is None:
+            fields = _fallback_note_fields(text, items.result() if long else generate_action_items(text))
+        elif long:
+            fields["action_items"] = items.result()
+    finally:
+        # Also reached when the client disconnects and the generator is closed
+        cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+    if long:
+        for item in fields["action_items"]:
+            yield "action_item", item
+    ai_cache.set(key, fields)
+    yield "fields", fields
+
+
+# -------------------- async variants (ASYNC_MODE) --------------------
+
+
+async def agenerate_action_items(description: str) -> List[str]:
+    """Async counterpart of ``generate_action_items`` using ``AsyncOpenAI``."""
+    text = prepare(description)
+    key = make_key(ACTION_ITEMS_MODEL, SYSTEM_PROMPT, TEMPERATURE, text)
+    if _over_budget(text):
+        return await ai_cache.aget_or_compute(key, lambda: _amap_reduce_action_items(text))
+    return await ai_cache.aget_or_compute(key, lambda: _agenerate_action_items(text))
+
+
+async def _amap_reduce_action_items(text: str) -> List[str]:
+    chunks = budget.chunk(text, CHUNK_TOKENS)
+    logger.info("Map-reducing action items (chunks=%d, tokens=%d)", len(chunks), budget.count_tokens(text))
+    semaphore = asyncio.Semaphore(max(1, MAP_CONCURRENCY))
+
+    async def extract(piece: str) -> List[str]:
+        async with semaphore:
+            return await _agenerate_action_items(piece)
+
+    results = await asyncio.gather(*(extract(piece) for piece in chunks))
+    return budget.merge_items(results, MAX_MERGED_ITEMS)
+
+
+async def _agenerate_action_items(description: str) -> List[str]:
+    client = _get_async_client()
+    logger.info("Generating action items via AsyncOpenAI (desc_len=%d)", len(description or ""))
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You extract structured note fields from a free-form description. "
-                        "Return strictly valid JSON with keys: title (short phrase), status (one of: open, in_progress, done), "
-                        "date (ISO8601), action_items (array of 3-7 short strings)."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        "Description:\n" + description + "\n\n"
-                        "Return only JSON, no markdown wrapper."
-                    ),
-                },
-            ],
-            temperature=0.3,
+        response = await _achat(
+            client,
+            "action_items",
+            model=ACTION_ITEMS_MODEL,
+            messages=_action_items_messages(description),
+            temperature=TEMPERATURE,
         )
     except Exception:
-        logger.exception("OpenAI chat.completions.create failed for note fields")
+        logger.exception("AsyncOpenAI chat.completions.create failed")
         raise
 
-    content = response.choices[0].message.content or "{}"
-    import json
+    return _parse_action_items(response.choices[0].message.content or "[]")
+
+
+async def agenerate_note_fields(description: str) -> dict:
+    """Async counterpart of ``generate_note_fields`` using ``AsyncOpenAI``."""
+    text = prepare(description)
+    key = make_key(NOTE_FIELDS_MODEL, NOTE_FIELDS_PROMPT, TEMPERATURE, text)
+    return await ai_cache.aget_or_compute(key, lambda: _agenerate_note_fields(text))
+
 
+async def _agenerate_note_fields(description: str) -> dict:
+    client = _get_async_client()
+    logger.info("Generating full note fields via AsyncOpenAI (desc_len=%d)", len(description or ""))
+    long = _over_budget(description)
+    items = asyncio.ensure_future(agenerate_action_items(description)) if long else None
     try:
-        data = json.loads(content)
-        title = str(data.get("title") or "Untitled")
-        status = str(data.get("status") or "open")
-        date = str(data.get("date") or "")
-        action_items = data.get("action_items") or []
-        if not isinstance(action_items, list):
-            action_items = []
-        action_items = [str(x) for x in action_items][:7]
-        return {
-            "title": title,
-            "status": status,
-            "date": date,
-            "action_items": action_items,
-        }
+        response = await _achat(
+            client,
+            "note_fields",
+            model=NOTE_FIELDS_MODEL,
+            messages=_note_fields_messages(budget.trim(description, INPUT_TOKEN_BUDGET)),
+            temperature=TEMPERATURE,
+        )
     except Exception:
-        logger.debug("Model response not strict JSON; falling back to minimal fields")
-        return {
-            "title": description.split(".\n")[0][:60] if description else "Untitled",
-            "status": "open",
-            "date": "",
-            "action_items": generate_action_items(description),
-        }
+        logger.exception("AsyncOpenAI chat.completions.create failed for note fields")
+        if items is not None:
+            items.cancel()
+        raise
+
+    fields = _parse_note_fields(response.choices[0].message.content or "{}")
+    if fields is None:
+        fields = _fallback_note_fields(description, await (items if long else agenerate_action_items(description)))
+    elif long:
+        fields["action_items"] = await items
+    return fields
+
 
+async def astream_note_fields(description: str) -> AsyncIterator[Tuple[str, Any]]:
+    """Async counterpart of ``stream_note_fields`` using ``AsyncOpenAI``."""
+    text = prepare(description)
+    key = make_key(NOTE_FIELDS_MODEL, NOTE_FIELDS_PROMPT, TEMPERATURE, text)
+    cached = await asyncio.to_thread(ai_cache.get, key)
+    if cached is not None:
+        for event in _cached_field_events(cached):
+            yield event
+        return
+
+    client = _get_async_client()
+    logger.info("Streaming note fields via AsyncOpenAI (desc_len=%d)", len(text))
+    long = _over_budget(text)
+    items = asyncio.ensure_future(agenerate_action_items(text)) if long else None
+    parser = NoteFieldsParser()
+    content: List[str] = []
+    try:
+        async for delta in _achat_stream(
+            client,
+            "note_fields_stream",
+            model=NOTE_FIELDS_MODEL,
+            messages=_note_fields_messages(budget.trim(text, INPUT_TOKEN_BUDGET)),
+            temperature=TEMPERATURE,
+        ):
+            content.append(delta)
+            for event in parser.feed(delta):
+                if not (long and event[0] == "action_item"):
+                    yield event
+    except BaseException as exc:
+        # Also when the client disconnects mid-stream: stop the map-reduce with it
+        if items is not None:
+            items.cancel()
+        if isinstance(exc, Exception):
+            logger.exception("AsyncOpenAI streaming chat.completions.create failed for note fields")
+        raise
 
+    fields = _parse_note_fields("".join(content) or "{}")
+    if fields is None:
+        fields = _fallback_note_fields(text, await (items if long else agenerate_action_items(text)))
+    elif long:
+        fields["action_items"] = await items
+    if long:
+        for item in fields["action_items"]:
+            yield "action_item", item
+    await asyncio.to_thread(ai_cache.set, key, fields)
+    yield "fields", fields
@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence
+
+from . import budget
+
+logger = logging.getLogger("app.services.batching")
+
+
+def pack_batches(texts: Sequence[str], max_tokens: int, max_items: int) -> List[List[int]]:
+    """Greedily group indexes of ``texts`` so each group fits the token and item budgets.
+
+    A single text larger than ``max_tokens`` still gets a group of its own.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, text in enumerate(texts):
+        tokens = budget.count_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class _Pending:
+    def __init__(self, item: Any):
+        self.item = item
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """Merge single-item calls arriving within ``window`` seconds into one batch call.
+
+    The first caller of a window becomes the leader: it sleeps for the window,
+    takes everything queued meanwhile and runs ``run_batch(items) -> results``
+    on behalf of all of them, in groups of up to ``max_items``. Callers that
+    arrive after the window closed elect the next leader, so a leader only
+    ever runs the groups it took and returns.
+    """
+
+    def __init__(self, run_batch: Callable[[List[Any]], List[Any]], window: float, max_items: int = 20):
+        self.run_batch = run_batch
+        self.window = window
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._queue: List[_Pending] = []
+        self._leader_active = False
+        self.stats = {"calls": 0, "batches": 0}
+
+    def submit(self, item: Any) -> Any:
+        pending = _Pending(item)
+        with self._lock:
+            self._queue.append(pending)
+            self.stats["calls"] += 1
+            leader = not self._leader_active
+            if leader:
+                self._leader_active = True
+
+        if leader:
+            time.sleep(self.window)
+            self._flush()
+        pending.event.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _flush(self) -> None:
+        with self._lock:
+            queued, self._queue = self._queue, []
+            self._leader_active = False
+        for start in range(0, len(queued), self.max_items):
+            group = queued[start : start + self.max_items]
+            with self._lock:
+                self.stats["batches"] += 1
+            try:
+                results = self.run_batch([p.item for p in group])
+                for p, result in zip(group, results):
+                    p.result = result
+            except BaseException as exc:
+                for p in group:
+                    p.error = exc
+            finally:
+                for p in group:
+                    p.event.set()
@@ -0,0 +1,156 @@
+"""Prompt preprocessing: token counting, cleanup, chunking and merging.
+
+Long descriptions (pasted meeting transcripts, email threads) are cleaned
+before they reach the model: repeated lines, signatures, disclaimers and
+transcript timestamps carry no action items but cost prompt tokens and
+latency. Whatever is still over the budget is split into chunks for a
+map-reduce extraction, whose per-chunk results ``merge_items`` combines.
+"""
+import logging
+import re
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger("app.services.budget")
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    # tiktoken is optional; without it tokens are estimated from the length
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:  # not installed, or the encoding cannot be loaded offline
+            _encoding = None
+        _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in ``text``: exact with tiktoken installed, otherwise ~4 characters per token.
+
+    The one estimator for prompt sizes: the guard's rate budget, batch
+    packing and the map-reduce chunking all count with it.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text or "") // 4 + 1
+    return len(encoding.encode(text or "", disallowed_special=()))
+
+
+# Whole lines that never hold action items
+BOILERPLATE = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"^sent from my \w+",
+        r"^get outlook for \w+",
+        r"^(confidentiality notice|disclaimer)\b",
+        r"^this (e-?mail|message)\b.*\b(confidential|intended (solely )?for)\b",
+        r"^(unsubscribe|view (this email )?in (your )?browser)\b",
+        r"^\[?\(?\d{1,2}:\d{2}(:\d{2})?\)?\]?$",  # timestamp-only transcript lines
+    )
+]
+# "[00:12:31] Alice: ..." -> "Alice: ..."
+_TIMESTAMP_PREFIX = re.compile(r"^\[?\(?\d{1,2}:\d{2}(:\d{2})?(\.\d+)?\)?\]?\s*(-\s*)?")
+# Everything after a "-- " signature delimiter is the sender's signature
+_SIGNATURE = re.compile(r"^--\s*$")
+_SPACES = re.compile(r"[ \t\f\v]+")
+
+
+def clean(text: str) -> str:
+    """Drop boilerplate and repeated lines and collapse whitespace, keeping paragraph breaks."""
+    lines: List[str] = []
+    seen = set()
+    for raw in (text or "").splitlines():
+        if _SIGNATURE.match(raw):
+            break
+        line = _SPACES.sub(" ", raw).strip()
+        if any(pattern.match(line) for pattern in BOILERPLATE):
+            continue
+        line = _TIMESTAMP_PREFIX.sub("", line)
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        key = line.casefold()
+        if key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def trim(text: str, max_tokens: int) -> str:
+    """Fit ``text`` into ``max_tokens`` by keeping its beginning and end."""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    # Token counts are proportional enough to characters to cut by length
+    keep = int(len(text) * max_tokens / tokens)
+    head = text[: keep * 2 // 3]
+    tail = text[len(text) - keep // 3:]
+    return head.rstrip() + "\n[...]\n" + tail.lstrip()
+
+
+def _split(text: str, max_tokens: int) -> List[str]:
+    """Pieces of ``text`` under ``max_tokens``: paragraphs, then lines, then sentences, then words."""
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    for separator in ("\n\n", "\n", ". ", " "):
+        parts = text.split(separator)
+        if len(parts) > 1:
+            pieces = [part + separator.rstrip() for part in parts[:-1]] + [parts[-1]]
+            return [piece for part in pieces if part.strip() for piece in _split(part.strip(), max_tokens)]
+    # A single "word" over the budget: cut it by length
+    step = max(1, len(text) * max_tokens // count_tokens(text))
+    return [text[i:i + step] for i in range(0, len(text), step)]
+
+
+def chunk(text: str, max_tokens: int) -> List[str]:
+    """Split ``text`` into chunks of at most ``max_tokens``, on the coarsest boundaries that fit."""
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece in _split(text, max_tokens):
+        tokens = count_tokens(piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+_WORD = re.compile(r"\w+")
+
+
+def _words(item: str) -> frozenset:
+    return frozenset(word.casefold() for word in _WORD.findall(item))
+
+
+def merge_items(results: Iterable[List[str]], limit: Optional[int] = None, similarity: float = 0.8) -> List[str]:
+    """Combine per-chunk action items in order, dropping (near-)duplicates.
+
+    Two items are duplicates when their word sets overlap by at least
+    ``similarity`` (Jaccard), so "Send the deck to Bob" and "send deck to Bob"
+    count once.
+    """
+    merged: List[str] = []
+    kept: List[frozenset] = []
+    for items in results:
+        for item in items:
+            item = item.strip()
+            words = _words(item)
+            if not words:
+                continue
+            if any(len(words & other) / len(words | other) >= similarity for other in kept):
+                continue
+            merged.append(item)
+            kept.append(words)
+    return merged[:limit] if limit else merged
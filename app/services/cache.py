@@ -0,0 +1,253 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+logger = logging.getLogger("app.services.cache")
+
+
+def normalize_description(description: str) -> str:
+    """Collapse whitespace so trivially different resubmissions share a key."""
+    return " ".join((description or "").split())
+
+
+def make_key(model: str, prompt: str, temperature: float, description: str) -> str:
+    raw = json.dumps(
+        [model, prompt, temperature, normalize_description(description)],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """An upstream call in progress that concurrent callers can wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class AICache:
+    """Two-tier cache for AI results: in-process LRU with TTL over a SQLite table.
+
+    Values must be JSON-serializable and are deep-copied on the way out, so
+    callers may mutate what they get back. Concurrent callers asking for the same key
+    while it is being computed wait for that single computation instead of
+    issuing their own upstream call.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400.0, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[str, "asyncio.Future"] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "persistent_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "coalesced": 0,
+        }
+
+    # -------------------- persistent tier --------------------
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _load(self, key: str, now: float) -> Any:
+        try:
+            with self._db_lock:
+                conn = self._db()
+                if conn is None:
+                    return None
+                row = conn.execute(
+                    "SELECT value, created_at FROM ai_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                value, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+                    conn.commit()
+                    self.stats["expirations"] += 1
+                    return None
+            return json.loads(value), created_at
+        except sqlite3.Error:
+            logger.exception("AI cache persistent read failed; treating as miss")
+            return None
+
+    def _store(self, key: str, value: Any, now: float) -> None:
+        try:
+            with self._db_lock:
+                conn = self._db()
+                if conn is None:
+                    return
+                conn.execute(
+                    "INSERT OR REPLACE INTO ai_cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), now),
+                )
+                conn.commit()
+        except sqlite3.Error:
+            logger.exception("AI cache persistent write failed; keeping in-memory entry only")
+
+    # -------------------- memory tier --------------------
+
+    def _remember(self, key: str, value: Any, created_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get(self, key: str) -> Any:
+        """Return the cached value for ``key`` or ``None``."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+                self.stats["expirations"] += 1
+        loaded = self._load(key, now)
+        if loaded is None:
+            return None
+        value, created_at = loaded
+        self._remember(key, value, created_at)
+        self.stats["persistent_hits"] += 1
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        self._remember(key, value, now)
+        self._store(key, value, now)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value, or compute it once even under concurrency."""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            # Another caller may have finished computing since our lookup
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[1] <= self.ttl_seconds:
+                self.stats["hits"] += 1
+                return copy.deepcopy(entry[0])
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.value)
+
+        self.stats["misses"] += 1
+        try:
+            flight.value = compute()
+            self.set(key, flight.value)
+            return copy.deepcopy(flight.value)
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Async ``get_or_compute``: concurrent tasks for one key await a single call.
+
+        The persistent tier is read and written off the event loop.
+        """
+        value = await asyncio.to_thread(self.get, key)
+        if value is not None:
+            return value
+
+        flight = self._async_flights.get(key)
+        if flight is not None:
+            self.stats["coalesced"] += 1
+            return copy.deepcopy(await asyncio.shield(flight))
+
+        flight = asyncio.get_running_loop().create_future()
+        self._async_flights[key] = flight
+        self.stats["misses"] += 1
+        try:
+            value = await compute()
+            await asyncio.to_thread(self.set, key, value)
+            flight.set_result(value)
+            return copy.deepcopy(value)
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as exc:
+            flight.set_exception(exc)
+            # Mark retrieved so an unawaited failure is not logged as lost
+            flight.exception()
+            raise
+        finally:
+            self._async_flights.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        with self._db_lock:
+            conn = self._db()
+            if conn is not None:
+                conn.execute("DELETE FROM ai_cache")
+                conn.commit()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+        return {
+            **self.stats,
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": bool(self.path),
+        }
+
+
+ai_cache = AICache(
+    max_entries=int(os.getenv("AI_CACHE_MAX_ENTRIES", "1024")),
+    ttl_seconds=float(os.getenv("AI_CACHE_TTL_SECONDS", "86400")),
+    # Set AI_CACHE_PATH to an empty string to keep the cache in memory only
+    path=os.getenv("AI_CACHE_PATH", "./ai_cache.db") or None,
+)
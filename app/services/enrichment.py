@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .. import database, models, response_cache
+from .ai import generate_action_items
+
+
+logger = logging.getLogger("app.services.enrichment")
+
+# inline: generate action items inside POST /notes/ (original behaviour)
+# background: persist immediately, in-process asyncio workers enrich later
+# external: persist immediately, a separate ``python -m app.worker`` process enriches
+ENRICHMENT_MODE = os.getenv("ENRICHMENT_MODE", "inline").lower()
+ENRICHMENT_WORKERS = int(os.getenv("ENRICHMENT_WORKERS", "4"))
+ENRICHMENT_MAX_ATTEMPTS = int(os.getenv("ENRICHMENT_MAX_ATTEMPTS", "3"))
+ENRICHMENT_RETRY_BACKOFF = float(os.getenv("ENRICHMENT_RETRY_BACKOFF", "2.0"))
+ENRICHMENT_POLL_INTERVAL = float(os.getenv("ENRICHMENT_POLL_INTERVAL", "1.0"))
+# A job left "running" this long is assumed orphaned by a crashed worker
+ENRICHMENT_STALE_AFTER = float(os.getenv("ENRICHMENT_STALE_AFTER", "300"))
+
+
+def is_deferred() -> bool:
+    return ENRICHMENT_MODE in ("background", "external")
+
+
+def new_job(note_id: int) -> models.EnrichmentJob:
+    now = time.time()
+    return models.EnrichmentJob(
+        note_id=note_id, status="queued", attempts=0, run_after=0.0, created_at=now, updated_at=now
+    )
+
+
+def claim_next(db: Session) -> Optional[models.EnrichmentJob]:
+    """Atomically move the oldest runnable job to ``running`` and return it.
+
+    The conditional UPDATE makes the claim safe across worker threads and
+    processes sharing the SQLite file: only one of them sees rowcount == 1.
+    """
+    job_table = models.EnrichmentJob
+    while True:
+        now = time.time()
+        candidate = (
+            db.query(job_table.id)
+            .filter(job_table.status == "queued", job_table.run_after <= now)
+            .order_by(job_table.id)
+            .first()
+        )
+        if candidate is None:
+            return None
+        claimed = (
+            db.query(job_table)
+            .filter(job_table.id == candidate.id, job_table.status == "queued")
+            .update({"status": "running", "updated_at": now}, synchronize_session=False)
+        )
+        db.commit()
+        if claimed == 1:
+            return db.get(job_table, candidate.id)
+
+
+def process_job(db: Session, job: models.EnrichmentJob) -> None:
+    note = db.get(models.Note, job.note_id)
+    now = time.time()
+    job.attempts += 1
+    job.updated_at = now
+    if note is None:
+        # Deleted before we got to it; nothing to enrich
+        job.status = "done"
+        db.commit()
+        return
+
+    try:
+        items = generate_action_items(note.description or "")
+    except Exception as exc:
+        job.last_error = str(exc)[:500]
+        if job.attempts >= ENRICHMENT_MAX_ATTEMPTS:
+            logger.warning("Enrichment of note %s failed permanently: %s", note.id, exc)
+            job.status = "failed"
+            note.enrichment_status = "failed"
+        else:
+            job.status = "queued"
+            job.run_after = now + ENRICHMENT_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+        db.commit()
+        response_cache.invalidate(note.id)
+        return
+
+    job.status = "done"
+    job.last_error = None
+    # Respect items a client set via PUT while the job was queued
+    if not note.action_items:
+        note.action_items = items
+    note.enrichment_status = "done"
+    db.commit()
+    response_cache.invalidate(note.id)
+
+
+def run_once(session_factory: Callable[[], Session] = None) -> bool:
+    """Claim and process one job. Returns False when the queue had nothing runnable."""
+    db = (session_factory or database.SessionLocal)()
+    try:
+        job = claim_next(db)
+        if job is None:
+            return False
+        process_job(db, job)
+        return True
+    finally:
+        db.close()
+
+
+def requeue_stale(session_factory: Callable[[], Session] = None) -> int:
+    db = (session_factory or database.SessionLocal)()
+    try:
+        job_table = models.EnrichmentJob
+        count = (
+            db.query(job_table)
+            .filter(job_table.status == "running", job_table.updated_at < time.time() - ENRICHMENT_STALE_AFTER)
+            .update({"status": "queued"}, synchronize_session=False)
+        )
+        db.commit()
+        return count
+    finally:
+        db.close()
+
+
+class WorkerPool:
+    """A fixed number of asyncio workers draining the job table.
+
+    Each worker runs one job at a time in a thread, so ``workers`` bounds the
+    number of concurrent OpenAI calls made for enrichment.
+    """
+
+    def __init__(self, workers: int = ENRICHMENT_WORKERS, poll_interval: float = ENRICHMENT_POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        requeued = await asyncio.to_thread(requeue_stale)
+        if requeued:
+            logger.info("Re-queued %d stale enrichment jobs", requeued)
+        self._tasks = [asyncio.create_task(self._run(i)) for i in range(self.workers)]
+
+    def notify(self) -> None:
+        """Wake idle workers; safe to call from request threads."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stop taking jobs and wait for the ones in progress to finish."""
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+        if self._tasks:
+            done, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+        self._tasks = []
+
+    async def _run(self, index: int) -> None:
+        while not self._stopping:
+            try:
+                ran = await asyncio.to_thread(run_once)
+            except Exception:
+                logger.exception("Enrichment worker %d crashed on a job; continuing", index)
+                ran = False
+            if ran:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+
+pool: Optional[WorkerPool] = None
+
+
+def notify() -> None:
+    if pool is not None:
+        pool.notify()
@@ -0,0 +1,298 @@
+"""Client-side protection around OpenAI calls.
+
+Every chat completion passes through one ``OpenAIGuard`` that combines:
+
+- token buckets for requests and tokens per minute, sized to the account's
+  quota (``AI_RPM_LIMIT``/``AI_TPM_LIMIT``) and adapted to the upstream: a 429
+  halves the refill rate and pauses calls for ``Retry-After``; each success
+  wins back part of the rate;
+- a cap on in-flight calls (``AI_MAX_CONCURRENCY``), so a slow upstream ties up
+  a bounded number of worker threads instead of the whole threadpool;
+- a circuit breaker that opens after ``AI_BREAKER_FAILURES`` consecutive
+  upstream failures (timeouts, connection errors, 429 and 5xx), rejects calls
+  for ``AI_BREAKER_RESET_SECONDS``, then lets a single probe decide whether to
+  close again.
+
+A call that would wait longer than ``AI_MAX_WAIT_SECONDS`` for a slot is
+rejected right away with ``AIUnavailable``; callers already treat any AI error
+as a reason to fail open (or answer 502), so rejections take the same path
+without holding a thread.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from .. import metrics
+from . import budget
+
+logger = logging.getLogger("app.services.guard")
+
+AI_RPM_LIMIT = float(os.getenv("AI_RPM_LIMIT", "0"))
+AI_TPM_LIMIT = float(os.getenv("AI_TPM_LIMIT", "0"))
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "10"))
+AI_MAX_WAIT_SECONDS = float(os.getenv("AI_MAX_WAIT_SECONDS", "2"))
+AI_BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", "5"))
+AI_BREAKER_RESET_SECONDS = float(os.getenv("AI_BREAKER_RESET_SECONDS", "30"))
+# Completion tokens assumed per call when charging the TPM bucket up front
+AI_EXPECTED_COMPLETION_TOKENS = int(os.getenv("AI_EXPECTED_COMPLETION_TOKENS", "300"))
+
+# The adaptive rate never drops below this fraction of the configured limits
+MIN_RATE_FACTOR = 0.1
+RATE_RECOVERY_STEP = 0.05
+DEFAULT_RETRY_AFTER = 1.0
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class AIUnavailable(RuntimeError):
+    """Raised instead of calling OpenAI when the guard sheds the call."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"OpenAI call rejected ({reason}); retry in {retry_after:.1f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Per-minute quota refilled continuously; ``limit`` 0 disables it. Not locked itself."""
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.tokens = limit
+        self.updated = time.monotonic()
+
+    def refill(self, now: float, factor: float) -> None:
+        if self.limit:
+            self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.limit * factor / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float, factor: float) -> float:
+        """Seconds until ``amount`` is available (a call larger than the quota needs a full bucket)."""
+        if not self.limit:
+            return 0.0
+        missing = min(amount, self.limit) - self.tokens
+        return max(0.0, missing * 60.0 / (self.limit * factor))
+
+    def take(self, amount: float) -> None:
+        if self.limit:
+            self.tokens -= amount
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    # The SDK is loaded by the time it can have raised, so never import it here
+    openai = sys.modules.get("openai")
+    if openai is not None and isinstance(exc, openai.APIStatusError):
+        return exc.status_code
+    return None
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Errors that say OpenAI is overloaded or unreachable (not that our request was bad)."""
+    openai = sys.modules.get("openai")
+    if openai is not None and isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    status = _status_code(exc)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def _retry_after(exc: BaseException) -> float:
+    response = getattr(exc, "response", None)
+    try:
+        return max(0.0, float(response.headers["retry-after"]))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+class Call:
+    """Handle yielded for one admitted call; set ``usage`` to reconcile the TPM charge."""
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.usage = None
+
+
+class OpenAIGuard:
+    def __init__(
+        self,
+        rpm: float = AI_RPM_LIMIT,
+        tpm: float = AI_TPM_LIMIT,
+        max_concurrency: int = AI_MAX_CONCURRENCY,
+        max_wait: float = AI_MAX_WAIT_SECONDS,
+        failure_threshold: int = AI_BREAKER_FAILURES,
+        reset_seconds: float = AI_BREAKER_RESET_SECONDS,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._cond = threading.Condition()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.cooldown_until = 0.0
+        self.rate_factor = 1.0
+        self.in_flight = 0
+        self.rejected = {"circuit_open": 0, "rate_limited": 0, "concurrency": 0}
+
+    # -------------------- admission --------------------
+
+    def _reject(self, reason: str, retry_after: float) -> AIUnavailable:
+        self.rejected[reason] += 1
+        metrics.OPENAI_REJECTIONS.inc(reason)
+        return AIUnavailable(reason, retry_after)
+
+    def _try_admit(self, tokens: int, now: float) -> Optional[tuple]:
+        """Admit the call (None) or return (reason, seconds to wait; None = until a release).
+
+        Raises ``AIUnavailable`` while the breaker is open. Caller holds the lock.
+        """
+        if self.state == OPEN:
+            remaining = self.opened_at + self.reset_seconds - now
+            if remaining > 0:
+                raise self._reject("circuit_open", remaining)
+            self.state = HALF_OPEN
+            logger.info("OpenAI circuit half-open; sending a probe")
+        if self.state == HALF_OPEN and self.probing:
+            raise self._reject("circuit_open", self.reset_seconds)
+
+        self._requests.refill(now, self.rate_factor)
+        self._tokens.refill(now, self.rate_factor)
+        wait = max(
+            self.cooldown_until - now,
+            self._requests.wait_time(1, self.rate_factor),
+            self._tokens.wait_time(tokens, self.rate_factor),
+        )
+        if wait > 0:
+            return "rate_limited", wait
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            return "concurrency", None
+
+        self._requests.take(1)
+        self._tokens.take(tokens)
+        self.in_flight += 1
+        if self.state == HALF_OPEN:
+            self.probing = True
+        return None
+
+    def acquire(self, tokens: int) -> None:
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                blocked = self._try_admit(tokens, now)
+                if blocked is None:
+                    return
+                reason, wait = blocked
+                # Fail fast when the slot cannot come in time, rather than sleeping first
+                if (wait if wait is not None else 0) > deadline - now or now >= deadline:
+                    raise self._reject(reason, wait or 0.0)
+                self._cond.wait(timeout=min(wait, deadline - now) if wait is not None else deadline - now)
+
+    async def aacquire(self, tokens: int) -> None:
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            now = time.monotonic()
+            with self._cond:
+                blocked = self._try_admit(tokens, now)
+                if blocked is None:
+                    return
+                reason, wait = blocked
+                if (wait if wait is not None else 0) > deadline - now or now >= deadline:
+                    raise self._reject(reason, wait or 0.0)
+            # No awaitable condition shared with threads; poll for a freed slot
+            await asyncio.sleep(min(wait if wait is not None else 0.01, deadline - now))
+
+    # -------------------- outcome --------------------
+
+    def release(self, call: Call, exc: Optional[BaseException] = None) -> None:
+        now = time.monotonic()
+        with self._cond:
+            self.in_flight -= 1
+            probe = self.state == HALF_OPEN and self.probing
+            self.probing = False
+            if exc is not None and is_upstream_failure(exc):
+                self._on_failure(exc, now, probe)
+            elif exc is None or not isinstance(exc, (GeneratorExit, asyncio.CancelledError)):
+                self._on_success(call, probe)
+            self._cond.notify_all()
+
+    def _on_success(self, call: Call, probe: bool) -> None:
+        self.failures = 0
+        self.rate_factor = min(1.0, self.rate_factor + RATE_RECOVERY_STEP)
+        if probe:
+            self.state = CLOSED
+            logger.info("OpenAI circuit closed")
+        total = getattr(call.usage, "total_tokens", None)
+        if total:
+            # Charge what the call really cost instead of the estimate
+            self._tokens.take(total - call.tokens)
+
+    def _on_failure(self, exc: BaseException, now: float, probe: bool) -> None:
+        self.failures += 1
+        if _status_code(exc) == 429:
+            self.rate_factor = max(MIN_RATE_FACTOR, self.rate_factor / 2)
+            self.cooldown_until = max(self.cooldown_until, now + _retry_after(exc))
+        if probe or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.state = OPEN
+            self.opened_at = now
+            logger.warning("OpenAI circuit open after %d upstream failures", self.failures)
+
+    # -------------------- call wrappers --------------------
+
+    @contextmanager
+    def call(self, tokens: int):
+        self.acquire(tokens)
+        handle = Call(tokens)
+        try:
+            yield handle
+        except BaseException as exc:
+            self.release(handle, exc)
+            raise
+        self.release(handle)
+
+    @asynccontextmanager
+    async def acall(self, tokens: int):
+        await self.aacquire(tokens)
+        handle = Call(tokens)
+        try:
+            yield handle
+        except BaseException as exc:
+            self.release(handle, exc)
+            raise
+        self.release(handle)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._cond:
+            self._requests.refill(now, self.rate_factor)
+            self._tokens.refill(now, self.rate_factor)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "retry_after_seconds": round(max(0.0, self.opened_at + self.reset_seconds - now), 3)
+                if self.state == OPEN
+                else 0.0,
+                "in_flight": self.in_flight,
+                "max_concurrency": self.max_concurrency,
+                "rate_factor": round(self.rate_factor, 3),
+                "cooldown_seconds": round(max(0.0, self.cooldown_until - now), 3),
+                "requests_per_minute": {"limit": self._requests.limit, "available": round(self._requests.tokens, 1)},
+                "tokens_per_minute": {"limit": self._tokens.limit, "available": round(self._tokens.tokens, 1)},
+                "rejected": dict(self.rejected),
+            }
+
+
+def estimate_tokens(messages) -> int:
+    """Prompt size (``budget.count_tokens`` per message) plus the expected completion."""
+    return sum(budget.count_tokens(m.get("content") or "") for m in messages) + AI_EXPECTED_COMPLETION_TOKENS
+
+
+guard = OpenAIGuard()
@@ -0,0 +1,77 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+SCALAR_FIELDS = ("title", "status", "date")
+ARRAY_ITEM_EVENTS = {"action_items": "action_item"}
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+class NoteFieldsParser:
+    """Incremental parser for the flat note-fields JSON object the model streams back.
+
+    ``feed`` takes raw text deltas and returns ``(field, value)`` pairs for each
+    of ``SCALAR_FIELDS`` as soon as its string value is complete, plus one
+    ``("action_item", value)`` per finished element of the ``action_items``
+    array. Anything before the first
+    ``{`` (e.g. a markdown fence) and after the closing ``}`` is ignored, as are
+    unknown keys, nested objects and non-string scalars.
+    """
+
+    def __init__(self):
+        self._stack: List[str] = []
+        self._key: Optional[str] = None
+        self._expect_key = False
+        self._in_string = False
+        self._escape = False
+        self._raw: List[str] = []
+        self._done = False
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        events: List[Tuple[str, Any]] = []
+        for ch in text:
+            if self._done:
+                break
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    # Not strict: models emit raw tabs and newlines inside strings
+                    self._string_done(json.loads('"' + "".join(self._raw) + '"', strict=False), events)
+                    continue
+                self._raw.append(ch)
+                continue
+
+            if ch == '"' and self._stack:
+                self._in_string = True
+                self._raw = []
+            elif ch == "{":
+                self._stack.append(ch)
+                self._expect_key = len(self._stack) == 1
+            elif ch == "[":
+                self._stack.append(ch)
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+                self._done = not self._stack
+            elif ch == "," and self._stack == ["{"]:
+                self._expect_key = True
+            elif ch == ":" and self._stack == ["{"]:
+                self._expect_key = False
+        return events
+
+    def _string_done(self, value: str, events: List[Tuple[str, Any]]) -> None:
+        if self._stack == ["{"]:
+            if self._expect_key:
+                self._key = value
+            elif self._key in SCALAR_FIELDS:
+                events.append((self._key, value))
+        elif self._stack == ["{", "["] and self._key in ARRAY_ITEM_EVENTS:
+            events.append((ARRAY_ITEM_EVENTS[self._key], value))
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
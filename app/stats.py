@@ -0,0 +1,168 @@
+"""Incrementally maintained note counts for dashboards.
+
+``note_stats`` holds one row per (day, status) with the number of notes, their
+action items and how many of those are done. SQLite triggers adjust the
+affected rows inside the same statement (and so the same transaction) as every
+write to ``notes`` or ``action_items``, so a stats read touches one row per day
+and status instead of every note.
+
+Moving a note between buckets is done by a BEFORE trigger that subtracts the
+old row's contribution and an AFTER trigger that adds the new one. The done
+count added back only includes items that survive the update (same position
+and text in the new ``action_items``), which is exactly what the action-item
+sync trigger keeps, so the result does not depend on trigger firing order.
+"""
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from . import models
+
+logger = logging.getLogger("app.stats")
+
+TABLE = "note_stats"
+
+
+def _items(ref: str) -> str:
+    return f"(SELECT count(*) FROM json_each({ref}.action_items) WHERE type = 'text')"
+
+
+def _done(ref: str) -> str:
+    return f"(SELECT count(*) FROM action_items WHERE note_id = {ref}.id AND done)"
+
+
+_SURVIVING_DONE = """(SELECT count(*) FROM action_items AS a WHERE a.note_id = new.id AND a.done AND EXISTS (
+    SELECT 1 FROM json_each(new.action_items) AS j WHERE j.key = a.position AND j.value = a.text
+))"""
+
+
+def _add(ref: str, sign: str, done: str) -> str:
+    return f"""INSERT INTO {TABLE}(day, status, notes, action_items, action_items_done)
+        VALUES (date({ref}.date), {ref}.status, {sign}1, {sign}{_items(ref)}, {sign}{done})
+        ON CONFLICT(day, status) DO UPDATE SET
+            notes = notes + excluded.notes,
+            action_items = action_items + excluded.action_items,
+            action_items_done = action_items_done + excluded.action_items_done;"""
+
+
+_PRUNE_OLD = f"DELETE FROM {TABLE} WHERE day = date(old.date) AND status = old.status AND notes = 0;"
+
+SYNC_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS notes_stats_ai AFTER INSERT ON notes BEGIN
+        {_add("new", "+", "0")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS notes_stats_bu BEFORE UPDATE OF status, date, action_items ON notes BEGIN
+        {_add("old", "-", _done("old"))}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS notes_stats_au AFTER UPDATE OF status, date, action_items ON notes BEGIN
+        {_add("new", "+", _SURVIVING_DONE)}
+        {_PRUNE_OLD}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS notes_stats_bd BEFORE DELETE ON notes BEGIN
+        {_add("old", "-", _done("old"))}
+        {_PRUNE_OLD}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS action_items_stats_au AFTER UPDATE OF done ON action_items
+    WHEN old.done IS NOT new.done BEGIN
+        UPDATE {TABLE} SET action_items_done = action_items_done + (CASE WHEN new.done THEN 1 ELSE -1 END)
+        WHERE (day, status) = (SELECT date(date), status FROM notes WHERE id = new.note_id);
+    END""",
+]
+
+# The same numbers computed from scratch; used to (re)build the table
+AGGREGATE = f"""SELECT date(n.date) AS day, n.status AS status, count(*) AS notes,
+    coalesce(sum({_items("n")}), 0) AS action_items, coalesce(sum({_done("n")}), 0) AS action_items_done
+    FROM notes AS n GROUP BY date(n.date), n.status"""
+
+
+def ensure_sync(conn) -> None:
+    """Create the triggers, filling the table from existing notes the first time."""
+    if conn.dialect.name != "sqlite":
+        return
+    created = not conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'notes_stats_ai'")
+    ).first()
+    for ddl in SYNC_DDL:
+        conn.execute(text(ddl))
+    if created:
+        logger.info("Computing %s from existing notes", TABLE)
+        rebuild(conn)
+
+
+def rebuild(conn) -> None:
+    """Replace the table's contents with a full aggregation over ``notes``."""
+    conn.execute(text(f"DELETE FROM {TABLE}"))
+    conn.execute(text(f"INSERT INTO {TABLE}(day, status, notes, action_items, action_items_done) {AGGREGATE}"))
+
+
+def _period(granularity: str):
+    day = models.NoteStat.day
+    if granularity == "week":
+        # Monday of the ISO week
+        return func.date(day, "weekday 0", "-6 days")
+    if granularity == "month":
+        return func.strftime("%Y-%m-01", day)
+    return day
+
+
+def summary(
+    db: Session,
+    granularity: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None,
+) -> Dict:
+    """Totals, counts per status and (with ``granularity``) per-period buckets."""
+    filters = []
+    if date_from is not None:
+        filters.append(models.NoteStat.day >= date_from.isoformat())
+    if date_to is not None:
+        filters.append(models.NoteStat.day <= date_to.isoformat())
+    if status is not None:
+        filters.append(models.NoteStat.status == status)
+
+    sums = (
+        func.coalesce(func.sum(models.NoteStat.notes), 0),
+        func.coalesce(func.sum(models.NoteStat.action_items), 0),
+        func.coalesce(func.sum(models.NoteStat.action_items_done), 0),
+    )
+    by_status = (
+        db.query(models.NoteStat.status, *sums)
+        .filter(*filters)
+        .group_by(models.NoteStat.status)
+        .order_by(models.NoteStat.status)
+        .all()
+    )
+    result = {
+        "notes": sum(row[1] for row in by_status),
+        "action_items": sum(row[2] for row in by_status),
+        "action_items_done": sum(row[3] for row in by_status),
+        "by_status": {row[0]: row[1] for row in by_status if row[1]},
+        "buckets": None,
+    }
+    if granularity is not None:
+        period = _period(granularity).label("period")
+        rows = (
+            db.query(period, models.NoteStat.status, *sums)
+            .filter(*filters)
+            .group_by(period, models.NoteStat.status)
+            .order_by(period, models.NoteStat.status)
+            .all()
+        )
+        buckets: List[Dict] = []
+        for row in rows:
+            if not buckets or buckets[-1]["period"] != row.period:
+                buckets.append(
+                    {"period": row.period, "notes": 0, "action_items": 0, "action_items_done": 0, "by_status": {}}
+                )
+            bucket = buckets[-1]
+            bucket["notes"] += row[2]
+            bucket["action_items"] += row[3]
+            bucket["action_items_done"] += row[4]
+            if row[2]:
+                bucket["by_status"][row.status] = row[2]
+        result["buckets"] = buckets
+    return result
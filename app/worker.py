@@ -0,0 +1,38 @@
+"""Standalone enrichment worker: ``python -m app.worker``.
+
+Drains the ``enrichment_jobs`` table of the configured ``DATABASE_URL`` so the
+API can run with ``ENRICHMENT_MODE=external`` and never call OpenAI itself.
+"""
+import asyncio
+import logging
+import os
+import signal
+
+from . import migrations
+from .database import engine
+from .services import enrichment
+
+logging.basicConfig(
+    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO),
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+)
+logger = logging.getLogger("app.worker")
+
+
+async def main() -> None:
+    migrations.upgrade(engine)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    pool = enrichment.WorkerPool()
+    await pool.start()
+    logger.info("Enrichment worker started (workers=%d)", pool.workers)
+    await stop.wait()
+    logger.info("Shutting down; draining in-flight jobs")
+    await pool.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+"""Compare two ``benchmarks.load`` result files.
+
+    python -m benchmarks.compare results/before.json results/after.json
+
+Prints per-scenario throughput and latency with the relative change; latency
+increases and throughput drops beyond ``--threshold`` percent are flagged.
+"""
+import argparse
+import json
+import sys
+
+METRICS = (("rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False))
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before * 100.0 if before else 0.0
+
+
+def compare(before: dict, after: dict, threshold: float) -> int:
+    regressions = 0
+    for name, old in before["scenarios"].items():
+        new = after["scenarios"].get(name)
+        if new is None:
+            continue
+        cells = []
+        for metric, higher_is_better in METRICS:
+            change = _change(old[metric], new[metric])
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > threshold else ""
+            regressions += bool(flag)
+            cells.append(f"{metric} {old[metric]:>9.2f} -> {new[metric]:>9.2f} ({change:+6.1f}%){flag}")
+        print(f"{name:>7}: " + "  ".join(cells))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare", description="Compare two benchmark runs")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args(argv)
+    with open(args.before) as fh:
+        before = json.load(fh)
+    with open(args.after) as fh:
+        after = json.load(fh)
+    return 1 if compare(before, after, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Size and CPU cost of each note list representation and content encoding.
+
+    python -m benchmarks.encodings --rows 1000 --repeat 20 --output results/encodings.json
+
+The same rows (see ``benchmarks.serialization.make_session``) are rendered as
+a JSON page, an NDJSON stream and, when msgpack is installed, MessagePack.
+Each body is then compressed with every codec ``app.compression`` can use
+here (gzip always; brotli and zstd when their packages are installed).
+
+For each pair the report gives the body size, the ratio to the identity
+JSON page, the CPU time to encode and compress on the server, and the CPU
+time a client spends decompressing. CPU time is ``time.process_time``, so
+it is not inflated by other processes on a busy machine.
+"""
+import argparse
+import gzip
+import json
+import os
+import platform
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from app import compression, models, serialization
+from benchmarks.serialization import make_session
+
+
+def load_rows(rows: int) -> List[dict]:
+    db = make_session(rows)
+    try:
+        return [dict(r._mapping) for r in db.query(*serialization.NOTE_COLUMNS).order_by(models.Note.id)]
+    finally:
+        db.close()
+
+
+def representations(items: List[dict]) -> Dict[str, Callable[[], bytes]]:
+    def page() -> bytes:
+        return serialization.NOTE_ROWS.dump_json(items)
+
+    def ndjson() -> bytes:
+        return "".join(json.dumps(row) + "\n" for row in serialization.NOTE_ROWS.dump_python(items, mode="json")).encode()
+
+    selected = {"json": page, "ndjson": ndjson}
+    if serialization.MSGPACK_AVAILABLE:
+        selected["msgpack"] = lambda: serialization.dump_page_msgpack(items)
+    return selected
+
+
+def decoders() -> Dict[str, Callable[[bytes], bytes]]:
+    selected = {"identity": lambda data: data, "gzip": gzip.decompress}
+    available = compression.available_encodings()
+    if "br" in available:
+        import brotli
+
+        selected["br"] = brotli.decompress
+    if "zstd" in available:
+        import zstandard
+
+        # One-shot frames record their content size, so plain decompress works
+        selected["zstd"] = zstandard.ZstdDecompressor().decompress
+    return selected
+
+
+def cpu_ms(fn: Callable[[], object], repeat: int) -> float:
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        fn()
+        timings.append(time.process_time() - started)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def run(rows: int, repeat: int) -> dict:
+    items = load_rows(rows)
+    results: Dict[str, dict] = {}
+    codecs = decoders()
+    for name, encode in representations(items).items():
+        body = encode()
+        for encoding, decode in codecs.items():
+            if encoding == "identity":
+                data = body
+                encode_ms = cpu_ms(encode, repeat)
+            else:
+                data = compression.compress(body, encoding)
+                encode_ms = cpu_ms(lambda: compression.compress(encode(), encoding), repeat)
+            assert decode(data) == body
+            results[f"{name}+{encoding}"] = {
+                "bytes": len(data),
+                "encode_cpu_ms": encode_ms,
+                "decode_cpu_ms": cpu_ms(lambda: decode(data), repeat),
+            }
+    baseline = results["json+identity"]["bytes"]
+    for result in results.values():
+        result["ratio"] = round(result["bytes"] / baseline, 3)
+    return results
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.encodings", description="Representation and compression benchmark")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "rows": args.rows,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "encodings": compression.available_encodings(),
+            "levels": compression.LEVELS,
+        },
+        "results": run(args.rows, args.repeat),
+    }
+    for name, result in report["results"].items():
+        print(f"{name:>16}: {result['bytes']:>9} B  x{result['ratio']:<6} "
+              f"encode {result['encode_cpu_ms']:>8.3f} ms  decode {result['decode_cpu_ms']:>8.3f} ms")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""A local stand-in for the OpenAI chat completions API with a configurable delay.
+
+Usable three ways:
+
+- as an httpx transport (``SyncTransport``/``AsyncTransport``) for in-process runs,
+- as an ASGI app served by uvicorn: ``python -m benchmarks.fake_openai --port 8100 --delay-ms 300``,
+- through ``completion()`` directly in tests.
+
+Responses mimic the real API closely enough for ``app.services.ai``: a JSON
+array of action items, a JSON object of note fields, or an index-keyed object
+for batch prompts, always with a ``usage`` block. ``stream=True`` requests get
+the same content as SSE chunks.
+
+``status`` (``--status``) makes every call fail with that HTTP status instead,
+e.g. 429 (with ``Retry-After``) or 503, to exercise the OpenAI guard; the
+transports' ``status`` attribute can be flipped mid-run to simulate an outage
+and its recovery.
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+
+import httpx
+
+DEFAULT_DELAY_MS = 200.0
+
+
+def _content(body: dict) -> str:
+    messages = body.get("messages") or []
+    system = messages[0]["content"] if messages else ""
+    user = messages[-1]["content"] if messages else ""
+    if "several meeting or note descriptions" in system:
+        indexes = re.findall(r"^\[(\d+)\]$", user, re.M)
+        return json.dumps({i: [f"Follow up on item {i}", "Share notes"] for i in indexes})
+    if "structured note fields" in system:
+        return json.dumps(
+            {
+                "title": "Benchmark note",
+                "status": "open",
+                "date": "2024-01-01T00:00:00Z",
+                "action_items": ["Send summary", "Book follow-up"],
+            }
+        )
+    return json.dumps(["Send summary", "Create tickets", "Book follow-up"])
+
+
+def completion(body: dict) -> dict:
+    prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages") or []) // 4 + 1
+    content = _content(body)
+    return {
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o"),
+        "choices": [
+            {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4 + 1,
+            "total_tokens": prompt_tokens + len(content) // 4 + 1,
+        },
+    }
+
+
+def stream_body(body: dict, piece: int = 8) -> bytes:
+    """The same completion as ``completion`` in ``stream=True`` wire format (SSE chunks)."""
+    full = completion(body)
+    content = full["choices"][0]["message"]["content"]
+    base = {k: full[k] for k in ("id", "created", "model")}
+    chunks = [
+        {**base, "object": "chat.completion.chunk",
+         "choices": [{"index": 0, "delta": {"content": content[i:i + piece]}, "finish_reason": None}]}
+        for i in range(0, len(content), piece)
+    ]
+    chunks.append({**base, "object": "chat.completion.chunk",
+                   "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+    chunks.append({**base, "object": "chat.completion.chunk", "choices": [], "usage": full["usage"]})
+    return "".join(f"data: {json.dumps(c)}\n\n" for c in chunks).encode() + b"data: [DONE]\n\n"
+
+
+def error_body(status: int) -> dict:
+    kind = "rate_limit_exceeded" if status == 429 else "server_error"
+    return {"error": {"message": f"Simulated upstream error {status}", "type": kind, "code": kind}}
+
+
+def error_headers(status: int) -> dict:
+    return {"retry-after": "1"} if status == 429 else {}
+
+
+def _response(body: dict, status: int = 200) -> httpx.Response:
+    if status != 200:
+        return httpx.Response(status, headers=error_headers(status), json=error_body(status))
+    if body.get("stream"):
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=stream_body(body))
+    return httpx.Response(200, json=completion(body))
+
+
+class SyncTransport(httpx.BaseTransport):
+    def __init__(self, delay_ms: float = DEFAULT_DELAY_MS, status: int = 200):
+        self.delay = delay_ms / 1000.0
+        self.status = status
+        self.calls = 0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        time.sleep(self.delay)
+        return _response(json.loads(request.read()), self.status)
+
+
+class AsyncTransport(httpx.AsyncBaseTransport):
+    def __init__(self, delay_ms: float = DEFAULT_DELAY_MS, status: int = 200):
+        self.delay = delay_ms / 1000.0
+        self.status = status
+        self.calls = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return _response(json.loads(await request.aread()), self.status)
+
+
+def make_app(delay_ms: float = DEFAULT_DELAY_MS, status: int = 200):
+    delay = delay_ms / 1000.0
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        await asyncio.sleep(delay)
+        request = json.loads(body or b"{}")
+        headers = []
+        if status != 200:
+            payload, content_type = json.dumps(error_body(status)).encode(), b"application/json"
+            headers = [(k.encode(), v.encode()) for k, v in error_headers(status).items()]
+        elif request.get("stream"):
+            payload, content_type = stream_body(request), b"text/event-stream"
+        else:
+            payload, content_type = json.dumps(completion(request)).encode(), b"application/json"
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", content_type), (b"content-length", str(len(payload)).encode())]
+                + headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--delay-ms", type=float, default=DEFAULT_DELAY_MS)
+    parser.add_argument("--status", type=int, default=200, help="Fail every call with this HTTP status")
+    args = parser.parse_args()
+    uvicorn.run(make_app(args.delay_ms, args.status), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
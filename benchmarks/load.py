@@ -0,0 +1,283 @@
+"""Load-test the Notes API and write latency/throughput results as JSON.
+
+In-process (ASGI, no sockets)::
+
+    python -m benchmarks.load --notes 10000 --requests 2000 --concurrency 32
+
+Over a real uvicorn server (plus a fake OpenAI server subprocess)::
+
+    python -m benchmarks.load --mode uvicorn --workers 1 --output results/uvicorn.json
+
+Every run uses a fresh SQLite file seeded with ``--notes`` rows, and a fake
+OpenAI upstream whose latency is set with ``--openai-delay-ms``. Compare runs
+with ``python -m benchmarks.compare before.json after.json``.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from . import fake_openai
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCENARIOS = ("list", "get", "create", "update", "delete", "ai")
+SEED_BATCH = 1000
+
+RequestSpec = Tuple[str, str, dict]
+
+
+def note_payload(i: int) -> dict:
+    return {
+        "title": f"Bench note {i}",
+        "description": f"Weekly sync {i}: review roadmap, assign owners, prepare KPI dashboard.",
+        "status": ("open", "in_progress", "done")[i % 3],
+        "date": f"2024-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}T10:00:00Z",
+        "action_items": ["Send summary", "Create tickets"],
+    }
+
+
+def scenario_requests(name: str, ids: List[int]) -> Callable[[int], RequestSpec]:
+    """Map request number -> (method, url, httpx kwargs) for a scenario."""
+    n = len(ids)
+    if name == "list":
+        return lambda i: ("GET", "/notes/", {"params": {"limit": 50}})
+    if name == "get":
+        return lambda i: ("GET", f"/notes/{ids[i % n]}", {})
+    if name == "create":
+        return lambda i: ("POST", "/notes/", {"json": note_payload(i)})
+    if name == "update":
+        return lambda i: ("PUT", f"/notes/{ids[i % n]}", {"json": {"title": f"Updated {i}"}})
+    if name == "delete":
+        # Deletes walk the seeded ids from the end so each request hits a live row
+        return lambda i: ("DELETE", f"/notes/{ids[n - 1 - (i % n)]}", {})
+    if name == "ai":
+        # Unique descriptions so the AI cache never short-circuits the upstream call
+        return lambda i: ("POST", "/notes/ai-action-items", {"params": {"description": f"Bench {time.time_ns()} {i}"}})
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank method
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, ids: List[int], requests: int, concurrency: int) -> dict:
+    make = scenario_requests(name, ids)
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, url, kwargs = make(i)
+            started = time.perf_counter()
+            try:
+                resp = await client.request(method, url, **kwargs)
+                ok = resp.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 4),
+        "rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+async def seed(client: httpx.AsyncClient, count: int) -> List[int]:
+    ids: List[int] = []
+    for start in range(0, count, SEED_BATCH):
+        body = [note_payload(i) for i in range(start, min(count, start + SEED_BATCH))]
+        resp = await client.post("/notes/bulk", json=body)
+        resp.raise_for_status()
+        ids.extend(r["id"] for r in resp.json()["results"] if r.get("id") is not None)
+    return ids
+
+
+async def run_all(client: httpx.AsyncClient, args) -> Dict[str, dict]:
+    ids = await seed(client, args.notes)
+    results = {}
+    for name in args.scenarios:
+        # AI calls are slow by design; cap them so a run stays short
+        count = min(args.requests, args.ai_requests) if name == "ai" else args.requests
+        results[name] = await run_scenario(client, name, ids, count, args.concurrency)
+        print(f"{name:>7}: {results[name]['rps']:>9.1f} req/s  p50 {results[name]['p50_ms']:.2f} ms  "
+              f"p95 {results[name]['p95_ms']:.2f} ms  p99 {results[name]['p99_ms']:.2f} ms  "
+              f"errors {results[name]['errors']}", file=sys.stderr)
+    return results
+
+
+def _in_process(args) -> Dict[str, dict]:
+    # The app reads its configuration at import time
+    from app import migrations
+    from app.database import engine
+    from app.main import app
+    from app.services import ai
+
+    # ASGITransport does not run the lifespan, where the app creates its schema
+    migrations.upgrade(engine)
+
+    ai.init_client(ai.build_client(api_key="bench", transport=fake_openai.SyncTransport(args.openai_delay_ms)))
+    ai.init_async_client(
+        ai.build_async_client(api_key="bench", transport=fake_openai.AsyncTransport(args.openai_delay_ms))
+    )
+
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            return await run_all(client, args)
+
+    return asyncio.run(go())
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def _uvicorn(args, env: dict) -> Dict[str, dict]:
+    fake_port, api_port = _free_port(), _free_port()
+    env = dict(
+        env,
+        OPENAI_BASE_URL=f"http://127.0.0.1:{fake_port}/v1",
+        OPENAI_API_KEY="bench",
+    )
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_openai", "--port", str(fake_port), "--delay-ms", str(args.openai_delay_ms)],
+        cwd=ROOT, env=env,
+    )
+    server_cmd = args.server_cmd.split() if args.server_cmd else [
+        sys.executable, "-m", "uvicorn", "app.main:app", "--log-level", "warning", "--workers", str(args.workers),
+    ]
+    server = subprocess.Popen(server_cmd + ["--port", str(api_port)], cwd=ROOT, env=env)
+    try:
+        _wait_for_port(fake_port)
+        _wait_for_port(api_port)
+
+        async def go():
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{api_port}", limits=limits, timeout=120) as client:
+                return await run_all(client, args)
+
+        return asyncio.run(go())
+    finally:
+        for proc in (server, fake):
+            proc.terminate()
+            try:
+                proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--notes", type=int, default=5000, help="Rows to seed before measuring")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario")
+    parser.add_argument("--ai-requests", type=int, default=200, help="Cap on requests for the ai scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--openai-delay-ms", type=float, default=fake_openai.DEFAULT_DELAY_MS)
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS))
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (uvicorn mode)")
+    parser.add_argument("--server-cmd", default="", help="Command to start the API (uvicorn mode); --port is appended")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the app, e.g. --env ASYNC_MODE=1")
+    parser.add_argument("--output", default="", help="Write results JSON here")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="notes-bench-")
+    app_env = {
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "AI_CACHE_PATH": "",
+        "LOG_LEVEL": "WARNING",
+    }
+    app_env.update(item.split("=", 1) for item in args.env)
+
+    if args.mode == "inprocess":
+        os.environ.update(app_env)
+        scenarios = _in_process(args)
+    else:
+        scenarios = _uvicorn(args, dict(os.environ, **app_env))
+
+    report = {
+        "meta": {
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "uvicorn" else None,
+            "notes": args.notes,
+            "concurrency": args.concurrency,
+            "openai_delay_ms": args.openai_delay_ms,
+            "env": {k: v for k, v in app_env.items() if k != "DATABASE_URL"},
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "scenarios": scenarios,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
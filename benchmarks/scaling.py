@@ -0,0 +1,78 @@
+"""Throughput by worker count for the production server (``python -m app.server``).
+
+    python -m benchmarks.scaling --workers 1,2,4 --scenarios list,get,ai --output results/scaling.json
+
+Runs ``benchmarks.load`` in uvicorn mode once per worker count, each time
+against a fresh database and fake OpenAI server, and reports requests/sec per
+scenario with the speedup over the first (smallest) worker count. Reads scale
+with cores; writes are bounded by SQLite's single writer whatever the count.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from typing import Dict, List
+
+from . import load
+
+
+def run(workers: List[int], load_args: List[str]) -> Dict[str, Dict[str, dict]]:
+    results = {}
+    for count in workers:
+        print(f"--- {count} worker(s)", file=sys.stderr)
+        server_cmd = f"{sys.executable} -m app.server --host 127.0.0.1 --workers {count} --log-level warning"
+        report = load.main(
+            ["--mode", "uvicorn", "--workers", str(count), "--server-cmd", server_cmd, "--output", os.devnull]
+            + load_args
+        )
+        results[str(count)] = report["scenarios"]
+    return results
+
+
+def summarize(results: Dict[str, Dict[str, dict]]) -> Dict[str, Dict[str, dict]]:
+    """Scenario -> worker count -> {rps, p99_ms, speedup}."""
+    counts = list(results)
+    summary: Dict[str, Dict[str, dict]] = {}
+    for scenario in results[counts[0]]:
+        baseline = results[counts[0]][scenario]["rps"]
+        summary[scenario] = {
+            count: {
+                "rps": results[count][scenario]["rps"],
+                "p99_ms": results[count][scenario]["p99_ms"],
+                "speedup": round(results[count][scenario]["rps"] / baseline, 2) if baseline else None,
+            }
+            for count in counts
+        }
+    return summary
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.scaling",
+        description="Server throughput by worker count",
+        epilog="Unrecognised options (--requests, --concurrency, --scenarios, ...) are passed to benchmarks.load.",
+    )
+    parser.add_argument("--workers", type=lambda s: [int(n) for n in s.split(",")], default=[1, 2, 4])
+    parser.add_argument("--output", default="")
+    args, load_args = parser.parse_known_args(argv)
+
+    summary = summarize(run(args.workers, load_args))
+    report = {
+        "meta": {"workers": args.workers, "load_args": load_args, "cpu_count": os.cpu_count(),
+                 "python": platform.python_version(), "git_revision": load._git_revision()},
+        "scenarios": summary,
+    }
+    print(f"{'scenario':>9} " + " ".join(f"{str(n) + 'w rps':>12}" for n in args.workers))
+    for scenario, by_count in summary.items():
+        cells = " ".join(f"{by_count[str(n)]['rps']:>8.1f} x{by_count[str(n)]['speedup']:<3}" for n in args.workers)
+        print(f"{scenario:>9} {cells}")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
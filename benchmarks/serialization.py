@@ -0,0 +1,127 @@
+"""Micro-benchmark of note list serialization paths.
+
+    python -m benchmarks.serialization --rows 1000 --repeat 50 --output results/serialization.json
+
+Each path starts from the same in-memory SQLite table and ends with JSON bytes:
+
+- ``orm``: ORM instances -> ``schemas.Note`` via ``from_attributes`` -> ``jsonable_encoder`` -> ``json.dumps``
+  (how a ``response_model`` list was rendered before pre-encoded responses)
+- ``validated``: row tuples -> ``TypeAdapter(List[Note])`` validate + ``dump_json`` (the default path)
+- ``fast``: row tuples -> precompiled TypedDict ``dump_json``, no validation (``FAST_RESPONSES``)
+- ``orjson``: row tuples -> ``orjson.dumps``, when orjson is installed (reference only)
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models, schemas, serialization
+from app.database import Base
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+
+def make_session(rows: int) -> Session:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2024, 1, 1, 9, 0)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(models.Note),
+            [
+                {
+                    "title": f"Note {i}",
+                    "description": f"Weekly sync {i}: review roadmap, assign owners, prepare the KPI dashboard.",
+                    "status": ("open", "in_progress", "done")[i % 3],
+                    "date": start + timedelta(hours=i),
+                    "action_items": ["Send summary", "Create tickets", "Book follow-up"],
+                }
+                for i in range(rows)
+            ],
+        )
+    return sessionmaker(bind=engine)()
+
+
+def paths(db: Session) -> Dict[str, Callable[[], bytes]]:
+    def orm() -> bytes:
+        notes = db.query(models.Note).order_by(models.Note.id).all()
+        return json.dumps(jsonable_encoder([schemas.Note.model_validate(n) for n in notes])).encode()
+
+    def rows() -> List[dict]:
+        return [dict(r._mapping) for r in db.query(*serialization.NOTE_COLUMNS).order_by(models.Note.id)]
+
+    def validated() -> bytes:
+        items = rows()
+        return serialization.NOTE_LIST.dump_json(serialization.NOTE_LIST.validate_python(items))
+
+    def fast() -> bytes:
+        return serialization.NOTE_ROWS.dump_json(rows())
+
+    selected = {"orm": orm, "validated": validated, "fast": fast}
+    if orjson is not None:
+        selected["orjson"] = lambda: orjson.dumps(rows())
+    return selected
+
+
+def measure(fn: Callable[[], bytes], repeat: int) -> dict:
+    fn()  # warm-up: compiles statements, fills caches
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(timings[0] * 1000, 3),
+        "max_ms": round(timings[-1] * 1000, 3),
+    }
+
+
+def run(rows: int, repeat: int) -> dict:
+    db = make_session(rows)
+    try:
+        results = {name: measure(fn, repeat) for name, fn in paths(db).items()}
+    finally:
+        db.close()
+    baseline = results["orm"]["median_ms"]
+    for result in results.values():
+        result["speedup_vs_orm"] = round(baseline / result["median_ms"], 2) if result["median_ms"] else None
+        result["rows_per_s"] = round(rows / (result["median_ms"] / 1000)) if result["median_ms"] else None
+    return results
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization", description="Note serialization micro-benchmark")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {"rows": args.rows, "repeat": args.repeat, "python": platform.python_version()},
+        "paths": run(args.rows, args.repeat),
+    }
+    for name, result in report["paths"].items():
+        print(f"{name:>9}: {result['median_ms']:>9.3f} ms  x{result['speedup_vs_orm']:<5}  {result['rows_per_s']} rows/s")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
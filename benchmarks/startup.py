@@ -0,0 +1,113 @@
+"""Cold-start import time of the app, measured with ``python -X importtime``.
+
+    python -m benchmarks.startup --runs 5 --output results/startup.json
+
+Each run imports the module (``app.main`` by default) in a fresh interpreter and
+parses the ``-X importtime`` report: the module's cumulative import time, the
+slowest top-level packages, and whether any module that should load lazily
+(the OpenAI SDK, httpx, dotenv, numpy) was imported anyway. Exits with status 1
+when the median exceeds ``--budget-ms`` or a lazy module shows up, so it can
+gate CI.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Modules only the AI endpoints and note vectors need; importing the app must not load them
+LAZY_MODULES = ("openai", "httpx", "dotenv", "numpy")
+# Default --budget-ms: about 1.7x a cold ``import app.main`` on a developer laptop
+DEFAULT_BUDGET_MS = 1500.0
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> Dict[str, dict]:
+    """Module -> {"self_us", "cumulative_us", "depth"} from an ``-X importtime`` report."""
+    modules = {}
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us), "depth": len(indent) // 2}
+    return modules
+
+
+def measure_once(module: str, env: Dict[str, str]) -> Dict[str, dict]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def run(module: str, runs: int, top: int = 10) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+            "AI_CACHE_PATH": "",
+        }
+        measure_once(module, env)  # warm-up: writes .pyc files so every run is comparable
+        reports = [measure_once(module, env) for _ in range(runs)]
+
+    totals = [report[module]["cumulative_us"] / 1000 for report in reports]
+    last = reports[-1]
+    packages = sorted(
+        ((name, info["cumulative_us"]) for name, info in last.items() if info["depth"] == 1 and name != module),
+        key=lambda item: -item[1],
+    )
+    return {
+        "module": module,
+        "runs_ms": [round(t, 1) for t in totals],
+        "median_ms": round(statistics.median(totals), 1),
+        "modules_imported": len(last),
+        "slowest": [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in packages[:top]],
+        "lazy_modules_loaded": sorted(m for m in LAZY_MODULES if m in last),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description="App import-time benchmark")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Fail if the median import exceeds this (0: no budget)")
+    parser.add_argument("--output", default="")
+    args = parser.parse_args(argv)
+
+    result = run(args.module, args.runs)
+    report = {"meta": {"runs": args.runs, "python": platform.python_version(), "budget_ms": args.budget_ms}, **result}
+    print(f"import {args.module}: median {result['median_ms']} ms over {args.runs} runs "
+          f"({result['modules_imported']} modules)")
+    for entry in result["slowest"]:
+        print(f"  {entry['cumulative_ms']:>8.1f} ms  {entry['module']}")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+    failures: List[str] = []
+    if args.budget_ms and result["median_ms"] > args.budget_ms:
+        failures.append(f"median {result['median_ms']} ms exceeds the {args.budget_ms} ms budget")
+    if result["lazy_modules_loaded"]:
+        failures.append("imported at startup: " + ", ".join(result["lazy_modules_loaded"]))
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
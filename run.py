@@ -1,3 +1,4 @@
+"""Development server with auto-reload. For production use ``python -m app.server``."""
 import uvicorn
 
 if __name__ == "__main__":
@@ -6,3 +6,13 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 # Use an in-memory SQLite database for tests to avoid state leakage
 os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+# Keep the AI response cache in memory so tests never write ai_cache.db
+os.environ.setdefault("AI_CACHE_PATH", "")
+
+# The app creates its schema in its lifespan, which a bare TestClient(app) never
+# runs; set the shared in-memory database up once for the whole session
+from app import migrations  # noqa: E402
+from app.database import engine  # noqa: E402
+
+migrations.upgrade(engine)
@@ -0,0 +1,117 @@
+import sqlite3
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app import migrations
+from app.main import app
+
+client = TestClient(app)
+
+
+def create_note(items, status="open", title="Items"):
+    payload = {
+        "title": title,
+        "description": "Action item fixture",
+        "status": status,
+        "date": "2024-06-01T10:00:00Z",
+        "action_items": items,
+    }
+    return client.post("/notes/", json=payload).json()["id"]
+
+
+def note_items(note_id):
+    resp = client.get(f"/notes/{note_id}/action-items")
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_items_mirror_note_writes():
+    note_id = create_note(["Draft agenda", "Book room"])
+    items = note_items(note_id)
+    assert [(i["position"], i["text"], i["done"]) for i in items] == [(0, "Draft agenda", False), (1, "Book room", False)]
+
+    # Toggling keeps the note untouched
+    toggled = client.patch(f"/notes/action-items/{items[1]['id']}", json={"done": True}).json()
+    assert toggled["done"] is True
+    assert client.get(f"/notes/{note_id}").json()["action_items"] == ["Draft agenda", "Book room"]
+
+    # Rewriting the list keeps rows (and done flags) whose position and text are unchanged
+    client.put(f"/notes/{note_id}", json={"action_items": ["New first", "Book room", "Send invite"]})
+    items = note_items(note_id)
+    assert [(i["text"], i["done"]) for i in items] == [("New first", False), ("Book room", True), ("Send invite", False)]
+    assert items[1]["id"] == toggled["id"]
+
+    client.delete(f"/notes/{note_id}")
+    assert client.get(f"/notes/{note_id}/action-items").status_code == 404
+    assert all(i["note_id"] != note_id for i in client.get("/notes/action-items", params={"limit": 1000}).json())
+
+
+def test_editing_item_text_updates_the_note():
+    note_id = create_note(["Typo itme"])
+    item = note_items(note_id)[0]
+    client.patch(f"/notes/action-items/{item['id']}", json={"done": True})
+    etag = client.get(f"/notes/{note_id}").headers["etag"]
+
+    edited = client.patch(f"/notes/action-items/{item['id']}", json={"text": "Fixed item"})
+    assert edited.json() == {**item, "text": "Fixed item", "done": True}
+
+    note = client.get(f"/notes/{note_id}", headers={"If-None-Match": etag})
+    assert note.status_code == 200
+    assert note.json()["action_items"] == ["Fixed item"]
+
+    assert client.patch("/notes/action-items/999999", json={"done": True}).status_code == 404
+    assert client.patch(f"/notes/action-items/{item['id']}", json={"text": ""}).status_code == 422
+
+
+def test_filters_counts_and_paging():
+    a = create_note(["Ship 50% of zq_items", "Review zq_items"], status="zq-open")
+    b = create_note(["Close zq_items"], status="zq-done")
+    client.patch(f"/notes/action-items/{note_items(b)[0]['id']}", json={"done": True})
+
+    open_items = client.get("/notes/action-items", params={"done": "false", "q": "ZQ_ITEMS"}).json()
+    assert {i["note_id"] for i in open_items} == {a}
+    assert [i["text"] for i in client.get("/notes/action-items", params={"q": "50%"}).json()] == ["Ship 50% of zq_items"]
+    assert [i["note_id"] for i in client.get("/notes/action-items", params={"note_status": "zq-done"}).json()] == [b]
+
+    first = client.get("/notes/action-items", params={"q": "zq_items", "limit": 2})
+    rest = client.get("/notes/action-items", params={"q": "zq_items", "cursor": first.headers["x-next-cursor"]})
+    assert len(first.json()) + len(rest.json()) == 3
+    assert "x-next-cursor" not in rest.headers
+
+    counts = {(c["note_status"], c["done"]): c["count"] for c in client.get("/notes/action-items/counts").json()}
+    assert counts[("zq-open", False)] == 2
+    assert counts[("zq-done", True)] == 1
+
+
+def test_bulk_inserts_are_mirrored():
+    resp = client.post(
+        "/notes/bulk",
+        json=[{"title": "Bulk", "status": "open", "date": "2024-06-01T10:00:00Z", "action_items": ["From bulk"]}],
+    )
+    note_id = resp.json()["results"][0]["id"]
+    assert [i["text"] for i in note_items(note_id)] == ["From bulk"]
+
+
+def test_upgrade_backfills_existing_notes(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE notes (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, description TEXT, "
+        "status VARCHAR NOT NULL, date DATETIME NOT NULL, action_items JSON)"
+    )
+    conn.execute(
+        "INSERT INTO notes (title, status, date, action_items) VALUES "
+        "('Old', 'open', '2024-01-01 00:00:00', '[\"First\", \"Second\"]'), "
+        "('Empty', 'open', '2024-01-01 00:00:00', NULL)"
+    )
+    conn.commit()
+    conn.close()
+
+    engine = create_engine(f"sqlite:///{path}")
+    migrations.upgrade(engine)
+    migrations.upgrade(engine)  # idempotent
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT note_id, position, text, done FROM action_items ORDER BY id")).all()
+    assert rows == [(1, 0, "First", 0), (1, 1, "Second", 0)]
@@ -0,0 +1,177 @@
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.services.ai as ai
+from app.main import app
+from app.services.batching import MicroBatcher, pack_batches
+from app.services.cache import AICache
+
+client = TestClient(app)
+
+
+class FakeCompletions:
+    """Answers batch prompts with a keyed JSON object and single prompts with an array."""
+
+    def __init__(self, drop_indexes=()):
+        self.calls = []
+        self.drop_indexes = set(drop_indexes)
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        system, user = kwargs["messages"][0]["content"], kwargs["messages"][1]["content"]
+        if system == ai.BATCH_PROMPT:
+            parts = re.findall(r"\[(\d+)\]\n(.*?)(?=\n\n\[|\n\nReturn only)", user, re.S)
+            content = json.dumps(
+                {i: [f"Do {text.strip()}"] for i, text in parts if int(i) not in self.drop_indexes}
+            )
+        else:
+            text = user.split("Description:\n", 1)[1].split("\n\n")[0]
+            content = json.dumps([f"Do {text.strip()}"])
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    def install(**kwargs):
+        completions = FakeCompletions(**kwargs)
+        fake = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        monkeypatch.setattr(ai, "_get_client", lambda: fake)
+        return completions
+
+    monkeypatch.setattr(ai, "ai_cache", AICache())
+    return install
+
+
+def test_pack_batches_respects_item_and_token_budgets():
+    texts = ["a" * 40] * 5
+    assert pack_batches(texts, max_tokens=1000, max_items=2) == [[0, 1], [2, 3], [4]]
+    assert pack_batches(texts, max_tokens=25, max_items=10) == [[0, 1], [2, 3], [4]]
+    assert pack_batches(["a" * 400], max_tokens=10, max_items=10) == [[0]]
+
+
+def test_batch_packs_calls_keeps_order_and_caches(fake_upstream, monkeypatch):
+    completions = fake_upstream()
+    monkeypatch.setattr(ai, "BATCH_MAX_ITEMS", 2)
+
+    descriptions = ["alpha", "beta", "gamma", "alpha", "delta"]
+    results = ai.generate_action_items_batch(descriptions)
+
+    assert results == [["Do alpha"], ["Do beta"], ["Do gamma"], ["Do alpha"], ["Do delta"]]
+    # 4 unique descriptions in groups of 2
+    assert len(completions.calls) == 2
+
+    assert ai.generate_action_items_batch(["beta", "delta"]) == [["Do beta"], ["Do delta"]]
+    assert ai.generate_action_items("gamma") == ["Do gamma"]
+    assert len(completions.calls) == 2
+
+
+def test_missing_batch_entries_fall_back_to_single_calls(fake_upstream):
+    completions = fake_upstream(drop_indexes={1})
+
+    results = ai.generate_action_items_batch(["one", "two", "three"])
+
+    assert results == [["Do one"], ["Do two"], ["Do three"]]
+    assert [c["messages"][0]["content"] for c in completions.calls] == [ai.BATCH_PROMPT, ai.SYSTEM_PROMPT]
+
+
+def test_microbatcher_merges_concurrent_calls():
+    batches = []
+
+    def run_batch(items):
+        batches.append(list(items))
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(run_batch, window=0.05)
+    results = {}
+    threads = [
+        threading.Thread(target=lambda t=t: results.__setitem__(t, batcher.submit(t)))
+        for t in ("a", "b", "c")
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {"a": "A", "b": "B", "c": "C"}
+    assert len(batches) == 1
+
+
+def test_microbatcher_leader_returns_under_steady_load():
+    def run_batch(items):
+        time.sleep(0.02)
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(run_batch, window=0.01)
+    stop = threading.Event()
+    callers = []
+    leader = {}
+
+    def lead():
+        started = time.monotonic()
+        leader["result"] = batcher.submit("leader")
+        leader["elapsed"] = time.monotonic() - started
+
+    def feed():
+        # A new caller every few milliseconds, all through the leader's window and batches
+        while not stop.is_set():
+            thread = threading.Thread(target=batcher.submit, args=("x",))
+            thread.start()
+            callers.append(thread)
+            time.sleep(0.003)
+
+    lead_thread = threading.Thread(target=lead)
+    lead_thread.start()
+    while not batcher._leader_active:
+        time.sleep(0.001)
+    feeder = threading.Thread(target=feed)
+    feeder.start()
+    lead_thread.join(timeout=1)
+    time.sleep(0.1)  # later callers are served by the leaders after it
+    stop.set()
+    feeder.join()
+    lead_thread.join()
+    for thread in callers:
+        thread.join()
+    assert leader["result"] == "LEADER"
+    # One window plus its own batch, although callers never stopped arriving
+    assert leader["elapsed"] < 0.3
+    assert batcher.stats["batches"] > 3
+
+
+def test_microbatcher_propagates_errors():
+    def run_batch(items):
+        raise RuntimeError("OpenAI failure")
+
+    with pytest.raises(RuntimeError):
+        MicroBatcher(run_batch, window=0).submit("x")
+
+
+def test_batch_endpoint(monkeypatch):
+    import app.routers.notes as notes_router
+
+    monkeypatch.setattr(
+        notes_router, "generate_action_items_batch", lambda descriptions: [[d.upper()] for d in descriptions]
+    )
+    resp = client.post("/notes/ai-action-items/batch", json={"descriptions": ["x", "y"]})
+    assert resp.status_code == 200
+    assert resp.json() == {"results": [["X"], ["Y"]]}
+
+
+def test_batch_endpoint_validation_and_upstream_error(monkeypatch):
+    assert client.post("/notes/ai-action-items/batch", json={"descriptions": ["ok", " "]}).status_code == 400
+    assert client.post("/notes/ai-action-items/batch", json={"descriptions": []}).status_code == 422
+
+    import app.routers.notes as notes_router
+
+    def raising(descriptions):
+        raise RuntimeError("OpenAI failure")
+
+    monkeypatch.setattr(notes_router, "generate_action_items_batch", raising)
+    assert client.post("/notes/ai-action-items/batch", json={"descriptions": ["x"]}).status_code == 502
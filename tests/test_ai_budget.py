@@ -0,0 +1,176 @@
+import asyncio
+import json
+import re
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app.services.ai as ai
+from app.main import app
+from app.services import budget
+from app.services.cache import AICache
+
+client = TestClient(app)
+
+EXPECTED = [f"Follow up on topic {i}" for i in range(12)] + ["Send the notes to the team"]
+
+
+def transcript(sections):
+    """A long meeting transcript with one ``Action:`` line per section and plenty of repeated filler."""
+    lines = []
+    for i in range(sections):
+        lines.append(f"[00:{i:02d}:00] Alice: Section {i} covers topic number {i} in some depth " + "detail " * 40)
+        lines.append(f"[00:{i:02d}:30] Bob: Action: Follow up on topic {i}")
+        lines.append("Sent from my iPhone")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def chat_transport(requests, usage=(100, 10)):
+    """Answer action-item prompts with their ``Action:`` lines and note-field prompts with fixed fields."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        system, user = body["messages"][0]["content"], body["messages"][1]["content"]
+        if system == ai.NOTE_FIELDS_PROMPT:
+            content = json.dumps({"title": "Sync", "status": "open", "date": "2024-05-01", "action_items": ["Trimmed"]})
+        else:
+            # Every chunk also "finds" the same generic item, which the merge must collapse
+            content = json.dumps(re.findall(r"Action: (.+)", user) + ["Send the notes to the team"])
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": usage[0], "completion_tokens": usage[1], "total_tokens": sum(usage)},
+        })
+
+    return handler
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    monkeypatch.setattr(ai, "ai_cache", AICache())
+    monkeypatch.setattr(ai, "INPUT_TOKEN_BUDGET", 400)
+    monkeypatch.setattr(ai, "CHUNK_TOKENS", 250)
+    requests = []
+    fake = ai.build_client(api_key="test-key", transport=httpx.MockTransport(chat_transport(requests)))
+    monkeypatch.setattr(ai, "_get_client", lambda: fake)
+    return requests
+
+
+def test_clean_drops_boilerplate_repeats_and_timestamps():
+    text = "\n".join([
+        "[00:01:02] Alice: Ship the beta",
+        "00:05",
+        "Alice:   Ship the  beta",
+        "alice: ship the beta",
+        "",
+        "",
+        "Bob: Update the docs",
+        "Sent from my iPhone",
+        "--",
+        "Bob Smith | Example Corp",
+    ])
+    assert budget.clean(text) == "Alice: Ship the beta\n\nBob: Update the docs"
+
+
+def test_chunks_respect_the_budget_and_keep_every_line():
+    text = budget.clean(transcript(12))
+    chunks = budget.chunk(text, 250)
+    assert len(chunks) > 1
+    assert all(budget.count_tokens(c) <= 250 for c in chunks)
+    assert "\n".join(chunks).split() == text.split()
+
+
+def test_merge_drops_near_duplicates_in_order():
+    merged = budget.merge_items([["Send the deck to Bob", "Book a room"], ["send deck to Bob", "Book a room", "Email Ann"]])
+    assert merged == ["Send the deck to Bob", "Book a room", "Email Ann"]
+    assert budget.merge_items([["a b"], ["c d"], ["e f"]], limit=2) == ["a b", "c d"]
+
+
+def test_long_description_is_map_reduced_and_usage_reported(fake_openai):
+    description = transcript(12)
+    resp = client.post("/notes/ai-action-items", params={"description": description})
+    assert resp.status_code == 200
+
+    chunks = len(fake_openai)
+    assert chunks > 1
+    for body in fake_openai:
+        assert "Sent from my iPhone" not in body["messages"][1]["content"]
+        assert budget.count_tokens(body["messages"][1]["content"]) < 400
+    # Chunk order is kept and the item every chunk found appears once
+    assert sorted(resp.json()) == sorted(EXPECTED)
+    assert resp.json()[0] == "Follow up on topic 0"
+    assert resp.headers["X-OpenAI-Calls"] == str(chunks)
+    assert resp.headers["X-OpenAI-Prompt-Tokens"] == str(100 * chunks)
+    assert resp.headers["X-OpenAI-Completion-Tokens"] == str(10 * chunks)
+
+    # Cached: the same transcript with different boilerplate costs nothing
+    again = client.post("/notes/ai-action-items", params={"description": description.replace("iPhone", "iPad")})
+    assert again.json() == resp.json()
+    assert "X-OpenAI-Calls" not in again.headers
+    assert len(fake_openai) == chunks
+
+
+def test_short_description_makes_one_call_with_the_endpoint_model(fake_openai, monkeypatch):
+    monkeypatch.setattr(ai, "ACTION_ITEMS_MODEL", "gpt-4o-mini")
+    resp = client.post("/notes/ai-action-items", params={"description": "Action: Book the room"})
+    assert resp.json() == ["Book the room", "Send the notes to the team"]
+    assert [body["model"] for body in fake_openai] == ["gpt-4o-mini"]
+    assert resp.headers["X-OpenAI-Calls"] == "1"
+
+
+def test_long_note_prompt_is_trimmed_and_items_come_from_every_chunk(fake_openai, monkeypatch):
+    monkeypatch.setattr(ai, "NOTE_FIELDS_MODEL", "gpt-4o-notes")
+    fields = ai.generate_note_fields(transcript(12))
+
+    note_calls = [body for body in fake_openai if body["messages"][0]["content"] == ai.NOTE_FIELDS_PROMPT]
+    assert [body["model"] for body in note_calls] == ["gpt-4o-notes"]
+    assert "[...]" in note_calls[0]["messages"][1]["content"]
+    assert budget.count_tokens(note_calls[0]["messages"][1]["content"]) < 450
+    assert fields["title"] == "Sync"
+    assert fields["action_items"][:2] == ["Follow up on topic 0", "Follow up on topic 1"]
+    assert len(fields["action_items"]) == 13
+
+
+def test_async_map_reduce_matches_sync(fake_openai, monkeypatch):
+    requests = []
+    fake = ai.build_async_client(api_key="test-key", transport=httpx.MockTransport(chat_transport(requests)))
+    monkeypatch.setattr(ai, "_get_async_client", lambda: fake)
+
+    items = asyncio.run(ai.agenerate_action_items(transcript(12)))
+    assert sorted(items) == sorted(EXPECTED)
+    assert len(requests) > 1
+
+
+def test_failed_note_call_stops_the_map_reduce(fake_openai, monkeypatch):
+    monkeypatch.setattr(ai, "MAP_CONCURRENCY", 1)
+    answer = chat_transport([])
+    chunk_calls = []
+    gate = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if json.loads(request.content)["messages"][0]["content"] == ai.NOTE_FIELDS_PROMPT:
+            return httpx.Response(400, json={"error": {"message": "bad request", "type": "invalid_request_error"}})
+        chunk_calls.append(request)
+        gate["release"].wait(5)
+        return answer(request)
+
+    fake = ai.build_client(api_key="test-key", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(ai, "_get_client", lambda: fake)
+    for run in (ai.generate_note_fields, lambda text: list(ai.stream_note_fields(text))):
+        gate["release"] = threading.Event()
+        chunk_calls.clear()
+        # Returns while the first chunk call is still held by the gate
+        with pytest.raises(Exception):
+            run(transcript(12))
+        gate["release"].set()
+        deadline = time.monotonic() + 5
+        while ai.ai_cache._flights and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # Only the call already in flight was made; no chunk after it, and no worker left behind
+        assert not ai.ai_cache._flights
+        assert len(chunk_calls) <= 1
@@ -0,0 +1,107 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.cache import AICache, make_key
+
+client = TestClient(app)
+
+
+def test_key_ignores_whitespace_but_not_model():
+    a = make_key("gpt-4o", "prompt", 0.3, "Plan  the\nsprint ")
+    b = make_key("gpt-4o", "prompt", 0.3, "Plan the sprint")
+    c = make_key("gpt-4o-mini", "prompt", 0.3, "Plan the sprint")
+    assert a == b
+    assert a != c
+
+
+def test_lru_eviction_and_counters():
+    cache = AICache(max_entries=2)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    assert cache.get("a") == [1]  # "a" is now most recently used
+    cache.set("c", [3])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1]
+    stats = cache.snapshot()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+
+
+def test_ttl_expiry():
+    cache = AICache(ttl_seconds=0.01)
+    cache.set("k", ["v"])
+    time.sleep(0.02)
+    assert cache.get("k") is None
+    assert cache.snapshot()["expirations"] == 1
+
+
+def test_persistent_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    AICache(path=path).set("k", {"title": "Saved"})
+
+    fresh = AICache(path=path)
+    assert fresh.get("k") == {"title": "Saved"}
+    assert fresh.snapshot()["persistent_hits"] == 1
+
+
+def test_returned_values_are_copies():
+    cache = AICache()
+    cache.set("k", {"date": ""})
+    cache.get("k")["date"] = "mutated"
+    assert cache.get("k") == {"date": ""}
+
+
+def test_concurrent_identical_calls_share_one_computation():
+    cache = AICache()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(1)
+        return ["shared"]
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [["shared"]] * 5
+
+
+def test_generate_action_items_hits_cache(monkeypatch):
+    import app.services.ai as ai
+
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content='["Ship it"]')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(ai, "_get_client", lambda: fake)
+    monkeypatch.setattr(ai, "ai_cache", AICache())
+
+    assert ai.generate_action_items("Cache   me") == ["Ship it"]
+    assert ai.generate_action_items("Cache me") == ["Ship it"]
+    assert len(calls) == 1
+
+
+def test_cache_stats_endpoint():
+    resp = client.get("/notes/ai-cache/stats")
+    assert resp.status_code == 200
+    assert {"hits", "misses", "evictions"} <= resp.json().keys()
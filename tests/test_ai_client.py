@@ -0,0 +1,103 @@
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+import app.services.ai as ai
+from app.main import app
+from app.services.cache import AICache
+
+
+def fake_openai_transport(requests):
+    """A local stand-in for the chat completions API that records each request."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        body = json.loads(request.content)
+        return httpx.Response(
+            200,
+            json={
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": '["Follow up"]'},
+                    }
+                ],
+            },
+        )
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    requests = []
+    client = ai.build_client(
+        api_key="test-key",
+        base_url="http://fake-openai.local/v1",
+        transport=fake_openai_transport(requests),
+    )
+    monkeypatch.setattr(ai, "ai_cache", AICache())
+    ai.init_client(client)
+    yield client, requests
+    ai.close_client()
+
+
+def test_client_is_reused_across_calls(fake_client):
+    client, requests = fake_client
+
+    assert ai.generate_action_items("First description") == ["Follow up"]
+    assert ai.generate_action_items("Second description") == ["Follow up"]
+
+    assert ai._get_client() is client
+    assert len(requests) == 2
+    assert all(r.url.host == "fake-openai.local" for r in requests)
+
+
+def test_pool_limits_from_environment(monkeypatch):
+    monkeypatch.setenv("OPENAI_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("OPENAI_MAX_KEEPALIVE", "3")
+    limits = ai.http_limits()
+    assert limits.max_connections == 7
+    assert limits.max_keepalive_connections == 3
+
+
+def test_lifespan_creates_and_closes_client(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(main, "AI_PRELOAD", True)
+    ai.close_client()
+
+    with TestClient(app):
+        client = ai._client
+        assert client is not None
+
+    assert ai._client is None
+    assert client.is_closed()
+
+
+def test_client_is_built_on_first_use_by_default(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    ai.close_client()
+
+    with TestClient(app):
+        assert ai._client is None
+        assert ai._get_client() is ai._client
+    assert ai._client is None
+
+
+def test_lifespan_tolerates_missing_key(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(main, "AI_PRELOAD", True)
+    monkeypatch.setattr(ai, "load_dotenv", lambda: None)
+    ai.close_client()
+
+    with TestClient(app) as client:
+        assert client.get("/notes/").status_code == 200
+    assert ai._client is None
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.services.ai as ai
+from app.main import app
+from app.services.cache import AICache
+from app.services import budget, guard as guard_module
+from app.services.batching import pack_batches
+from app.services.guard import AIUnavailable, OpenAIGuard
+from benchmarks import fake_openai
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """A fake OpenAI whose status can be flipped, with SDK retries off so each call hits it once."""
+    monkeypatch.setenv("OPENAI_MAX_RETRIES", "0")
+    transport = fake_openai.SyncTransport(delay_ms=0)
+    monkeypatch.setattr(ai, "ai_cache", AICache())
+    ai.init_client(ai.build_client(api_key="test-key", transport=transport))
+    yield transport
+    ai.close_client()
+
+
+def test_breaker_opens_fails_fast_and_recovers(upstream, monkeypatch):
+    guard = OpenAIGuard(failure_threshold=2, reset_seconds=0.2)
+    monkeypatch.setattr(ai, "guard", guard)
+    upstream.status = 503
+
+    for i in range(2):
+        assert client.post("/notes/ai-action-items", params={"description": f"outage {i}"}).status_code == 502
+    assert guard.state == "open"
+
+    shed = client.post("/notes/ai-action-items", params={"description": "outage 2"})
+    assert shed.status_code == 503
+    assert int(shed.headers["retry-after"]) >= 1
+    # Plain CRUD takes the fail-open path without waiting on the upstream
+    note = client.post(
+        "/notes/", json={"title": "T", "description": "d", "status": "open", "date": "2024-06-01T10:00:00Z"}
+    ).json()
+    assert note["enrichment_status"] == "failed"
+    assert upstream.calls == 2
+
+    health = client.get("/health").json()
+    assert health["status"] == "degraded"
+    assert health["openai"]["state"] == "open"
+    assert health["openai"]["rejected"]["circuit_open"] == 2
+
+    upstream.status = 200
+    time.sleep(0.25)
+    assert client.post("/notes/ai-action-items", params={"description": "recovered"}).status_code == 200
+    assert client.get("/health").json()["status"] == "ok"
+
+
+def test_failed_probe_reopens_the_circuit(upstream, monkeypatch):
+    guard = OpenAIGuard(failure_threshold=1, reset_seconds=0.05)
+    monkeypatch.setattr(ai, "guard", guard)
+    upstream.status = 500
+    with pytest.raises(Exception):
+        ai.generate_action_items("first")
+    time.sleep(0.06)
+    with pytest.raises(Exception):
+        ai.generate_action_items("probe")
+    assert guard.state == "open"
+    assert upstream.calls == 2
+
+
+def test_429_slows_down_and_honours_retry_after(upstream, monkeypatch):
+    guard = OpenAIGuard(rpm=600, max_wait=0.1)
+    monkeypatch.setattr(ai, "guard", guard)
+    upstream.status = 429
+    with pytest.raises(Exception):
+        ai.generate_action_items("throttled")
+    assert guard.rate_factor == 0.5
+    assert 0.5 < guard.snapshot()["cooldown_seconds"] <= 1.0
+
+    with pytest.raises(AIUnavailable) as exc:
+        ai.generate_action_items("during cooldown")
+    assert exc.value.reason == "rate_limited"
+    assert upstream.calls == 1
+
+
+def test_request_and_token_buckets():
+    guard = OpenAIGuard(rpm=2, tpm=1000, max_wait=0.01)
+    with guard.call(100) as call:
+        call.usage = type("Usage", (), {"total_tokens": 400})()
+    # Charged for the 400 tokens actually used, not the 100 estimated
+    assert 599 <= guard.snapshot()["tokens_per_minute"]["available"] < 602
+    with guard.call(100):
+        pass
+    with pytest.raises(AIUnavailable) as exc:
+        guard.acquire(1)
+    assert exc.value.reason == "rate_limited"
+    assert exc.value.retry_after > 1
+
+
+def test_guard_and_batcher_count_tokens_like_the_budget(monkeypatch):
+    monkeypatch.setattr(budget, "count_tokens", lambda text: 100 * len(text.split()))
+    messages = [{"role": "system", "content": "one two"}, {"role": "user", "content": "three"}]
+    assert guard_module.estimate_tokens(messages) == 300 + guard_module.AI_EXPECTED_COMPLETION_TOKENS
+    assert pack_batches(["a b", "c", "d"], max_tokens=250, max_items=10) == [[0], [1, 2]]
+
+
+def test_concurrency_cap_waits_then_sheds():
+    guard = OpenAIGuard(max_concurrency=1, max_wait=1.0)
+    held = threading.Event()
+
+    def hold():
+        with guard.call(1):
+            held.set()
+            time.sleep(0.1)
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    held.wait()
+    started = time.monotonic()
+    with guard.call(1):
+        assert guard.in_flight == 1
+    assert time.monotonic() - started >= 0.05
+    worker.join()
+
+    guard.max_wait = 0.05
+    with guard.call(1):
+        with pytest.raises(AIUnavailable) as exc:
+            guard.acquire(1)
+    assert exc.value.reason == "concurrency"
+    assert guard.in_flight == 0
+
+
+def test_async_callers_share_the_cap():
+    guard = OpenAIGuard(max_concurrency=1, max_wait=1.0)
+
+    async def run():
+        async def hold():
+            async with guard.acall(1):
+                await asyncio.sleep(0.05)
+
+        task = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        async with guard.acall(1):
+            assert task.done()
+
+    asyncio.run(run())
+    assert guard.in_flight == 0
+
+
+def test_non_upstream_errors_do_not_trip_the_breaker():
+    guard = OpenAIGuard(failure_threshold=1)
+    with pytest.raises(ValueError):
+        with guard.call(1):
+            raise ValueError("bad response")
+    assert guard.state == "closed"
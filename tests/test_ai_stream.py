@@ -0,0 +1,151 @@
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app.services.ai as ai
+from app.main import app
+from app.services.cache import AICache
+from app.services.streaming import NoteFieldsParser
+
+client = TestClient(app)
+
+FIELDS = {
+    "title": "Q3 \"kickoff\"",
+    "status": "in_progress",
+    "date": "2024-07-01T09:00:00Z",
+    "action_items": ["Draft plan", "Book room"],
+}
+
+
+def parse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def streaming_transport(content, requests, piece=3):
+    """Serve ``content`` as a chat completion stream in ``piece``-character deltas."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        base = {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o"}
+        chunks = [
+            {**base, "choices": [{"index": 0, "delta": {"content": content[i:i + piece]}, "finish_reason": None}]}
+            for i in range(0, len(content), piece)
+        ]
+        chunks.append({**base, "choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 7, "total_tokens": 12}})
+        body = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body.encode())
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def fake_stream(monkeypatch):
+    monkeypatch.setattr(ai, "ai_cache", AICache())
+
+    def install(content):
+        requests = []
+        fake = ai.build_client(api_key="test-key", transport=streaming_transport(content, requests))
+        monkeypatch.setattr(ai, "_get_client", lambda: fake)
+        return requests
+
+    return install
+
+
+def test_parser_emits_fields_as_they_complete():
+    parser = NoteFieldsParser()
+    text = "```json\n" + json.dumps({"extra": {"title": "nested"}, **FIELDS}) + "\n```"
+
+    events = []
+    for i in range(len(text)):
+        events.extend(parser.feed(text[i]))
+
+    assert events == [
+        ("title", 'Q3 "kickoff"'),
+        ("status", "in_progress"),
+        ("date", "2024-07-01T09:00:00Z"),
+        ("action_item", "Draft plan"),
+        ("action_item", "Book room"),
+    ]
+
+
+def test_parser_waits_for_closing_quote():
+    parser = NoteFieldsParser()
+    assert parser.feed('{"title": "Half') == []
+    assert parser.feed(' done", "action_items": ["a"') == [("title", "Half done"), ("action_item", "a")]
+
+
+def test_parser_accepts_raw_control_characters_and_split_escapes():
+    parser = NoteFieldsParser()
+    assert parser.feed('{"title": "Line one\nline\ttwo", "status": "caf\\u00') == [
+        ("title", "Line one\nline\ttwo")
+    ]
+    assert parser.feed('e9"}') == [("status", "caf\u00e9")]
+    assert ai._parse_note_fields('{"title": "Raw\nbreak"}')["title"] == "Raw\nbreak"
+
+
+def test_stream_endpoint_emits_fields_then_persists(fake_stream):
+    requests = fake_stream(json.dumps(FIELDS))
+
+    resp = client.post("/notes/ai-note/stream", json={"description": "Plan the Q3 kickoff"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(resp.text)
+    assert events[:5] == [
+        ("title", {"value": 'Q3 "kickoff"'}),
+        ("status", {"value": "in_progress"}),
+        ("date", {"value": "2024-07-01T09:00:00Z"}),
+        ("action_item", {"index": 0, "value": "Draft plan"}),
+        ("action_item", {"index": 1, "value": "Book room"}),
+    ]
+    name, note = events[-1]
+    assert name == "note"
+    assert client.get(f"/notes/{note['id']}").json()["action_items"] == ["Draft plan", "Book room"]
+    assert requests[0]["stream"] is True
+
+    # Same description again replays from the cache without calling upstream
+    replay = parse_events(client.post("/notes/ai-note/stream", json={"description": "Plan the Q3 kickoff"}).text)
+    assert [e[0] for e in replay] == ["title", "status", "date", "action_item", "action_item", "note"]
+    assert len(requests) == 1
+
+
+def test_stream_endpoint_reports_upstream_errors(monkeypatch):
+    import app.routers.notes as notes_router
+
+    def raising(description):
+        raise RuntimeError("OpenAI failure")
+        yield
+
+    monkeypatch.setattr(notes_router, "stream_note_fields", raising)
+
+    resp = client.post("/notes/ai-note/stream", json={"description": "Kickoff"})
+    assert parse_events(resp.text) == [("error", {"status": 502, "detail": "Failed to infer note fields"})]
+    assert client.post("/notes/ai-note/stream", json={"description": "  "}).status_code == 400
+
+
+def test_async_stream_keeps_cache_io_off_the_event_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    cache = AICache()
+    threads = []
+    get, set_ = cache.get, cache.set
+    monkeypatch.setattr(cache, "get", lambda key: threads.append(threading.get_ident()) or get(key))
+    monkeypatch.setattr(cache, "set", lambda key, value: threads.append(threading.get_ident()) or set_(key, value))
+    monkeypatch.setattr(ai, "ai_cache", cache)
+    fake = ai.build_async_client(api_key="test-key", transport=streaming_transport(json.dumps(FIELDS), []))
+    monkeypatch.setattr(ai, "_get_async_client", lambda: fake)
+
+    async def go():
+        events = [event async for event in ai.astream_note_fields("Plan the Q3 kickoff")]
+        return events, threading.get_ident()
+
+    events, loop_thread = asyncio.run(go())
+    assert events[-1][0] == "fields"
+    assert len(threads) == 2 and loop_thread not in threads
@@ -0,0 +1,107 @@
+import asyncio
+import json
+from argparse import Namespace
+
+import httpx
+
+import app.services.ai as ai
+from app.main import app
+from app.services.cache import AICache
+from benchmarks import compare, fake_openai, load
+
+
+def test_fake_openai_answers_every_prompt_shape():
+    single = fake_openai.completion({"messages": [{"content": ai.SYSTEM_PROMPT}, {"content": "x"}]})
+    assert isinstance(json.loads(single["choices"][0]["message"]["content"]), list)
+    assert single["usage"]["total_tokens"] > 0
+
+    batch = fake_openai.completion(
+        {"messages": [{"content": ai.BATCH_PROMPT}, {"content": ai._batch_messages(["a", "b"])[1]["content"]}]}
+    )
+    assert set(json.loads(batch["choices"][0]["message"]["content"])) == {"0", "1"}
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert load.percentile(values, 50) == 50.0
+    assert load.percentile(values, 99) == 99.0
+    assert load.percentile([], 95) == 0.0
+
+
+def test_in_process_run_reports_every_scenario(monkeypatch):
+    client = ai.build_client(api_key="bench", transport=fake_openai.SyncTransport(delay_ms=0))
+    monkeypatch.setattr(ai, "_get_client", lambda: client)
+    monkeypatch.setattr(ai, "ai_cache", AICache())
+    # The test database is one shared in-memory connection, so requests run one at a time
+    args = Namespace(notes=20, requests=10, ai_requests=4, concurrency=1, scenarios=list(load.SCENARIOS))
+
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            return await load.run_all(http, args)
+
+    results = asyncio.run(go())
+
+    assert set(results) == set(load.SCENARIOS)
+    assert all(r["errors"] == 0 for r in results.values())
+    assert results["ai"]["requests"] == 4
+    assert results["list"]["p50_ms"] <= results["list"]["p99_ms"]
+
+
+def test_compare_flags_regressions(capsys):
+    def report(rps, p99):
+        return {"scenarios": {"get": {"rps": rps, "p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": p99}}}
+
+    assert compare.compare(report(100, 3.0), report(105, 3.1), threshold=10) == 0
+    assert compare.compare(report(100, 3.0), report(50, 6.0), threshold=10) == 2
+    assert "!" in capsys.readouterr().out
+
+
+def test_serialization_benchmark_paths_agree():
+    from benchmarks import serialization as bench
+
+    db = bench.make_session(5)
+    try:
+        outputs = {name: json.loads(fn()) for name, fn in bench.paths(db).items()}
+    finally:
+        db.close()
+    assert outputs["validated"] == outputs["fast"]
+    assert outputs["orm"] == outputs["fast"]
+    assert len(outputs["fast"]) == 5
+
+
+def test_startup_benchmark_keeps_the_ai_stack_lazy():
+    from benchmarks import startup
+
+    parsed = startup.parse_importtime(
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        300 |   app.schemas\n"
+        "import time:        40 |        900 | app.main\n"
+    )
+    assert parsed["app.main"] == {"self_us": 40, "cumulative_us": 900, "depth": 0}
+    assert parsed["app.schemas"]["depth"] == 1
+
+    result = startup.run("app.main", runs=1)
+    assert 0 < result["median_ms"] <= startup.DEFAULT_BUDGET_MS
+    assert result["lazy_modules_loaded"] == []
+
+
+def test_scaling_summary_reports_speedup_per_worker_count():
+    from benchmarks import scaling
+
+    results = {
+        "1": {"get": {"rps": 100.0, "p99_ms": 9.0}},
+        "4": {"get": {"rps": 350.0, "p99_ms": 4.0}},
+    }
+    assert scaling.summarize(results) == {
+        "get": {"1": {"rps": 100.0, "p99_ms": 9.0, "speedup": 1.0}, "4": {"rps": 350.0, "p99_ms": 4.0, "speedup": 3.5}}
+    }
+
+
+def test_encodings_benchmark_reports_every_pair():
+    from benchmarks import encodings
+
+    results = encodings.run(rows=20, repeat=1)
+    assert {"json+identity", "json+gzip", "ndjson+gzip"} <= set(results)
+    assert results["json+identity"]["ratio"] == 1.0
+    assert results["json+gzip"]["bytes"] < results["json+identity"]["bytes"]
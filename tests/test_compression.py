@@ -0,0 +1,132 @@
+import asyncio
+import json
+import zlib
+
+import anyio.to_thread
+from fastapi.testclient import TestClient
+
+from app import compression, serialization
+from app.main import app
+
+client = TestClient(app)
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def seed(status, count):
+    ids = []
+    for i in range(count):
+        payload = {
+            "title": f"{status} {i}",
+            "description": "Weekly sync about the roadmap, hiring and the launch checklist. " * 4,
+            "status": status,
+            "date": "2024-03-01T10:00:00Z",
+            "action_items": ["Update the roadmap", "Schedule interviews"],
+        }
+        ids.append(client.post("/notes/", json=payload).json()["id"])
+    return ids
+
+
+def test_choose_encoding_follows_quality_then_server_preference():
+    available = ["zstd", "br", "gzip"]
+    assert compression.choose_encoding("gzip, br", available) == "br"
+    assert compression.choose_encoding("gzip;q=1.0, br;q=0.5", available) == "gzip"
+    assert compression.choose_encoding("*;q=0.1, zstd;q=0", available) == "br"
+    assert compression.choose_encoding("identity", available) is None
+    assert compression.choose_encoding(None, available) is None
+    assert compression.choose_encoding("br", ["gzip"]) is None
+
+
+def test_large_list_is_compressed_and_revalidates():
+    seed("compressed", 20)
+    resp = client.get("/notes/", params={"status": "compressed"}, headers=GZIP)
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert int(resp.headers["content-length"]) < len(resp.content) / 3
+    assert "Accept-Encoding" in resp.headers["vary"] and "Accept" in resp.headers["vary"]
+    assert len(resp.json()) == 20
+
+    etag = resp.headers["etag"]
+    assert etag.startswith('W/"')
+    again = client.get("/notes/", params={"status": "compressed"}, headers={**GZIP, "If-None-Match": etag})
+    assert again.status_code == 304
+
+    plain = client.get("/notes/", params={"status": "compressed"}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == resp.json()
+    assert plain.headers["etag"] == etag[2:]
+
+
+def test_small_bodies_are_not_compressed():
+    note_id = seed("small-body", 1)[0]
+    resp = client.get(f"/notes/{note_id}", headers=GZIP)
+    assert len(resp.content) < compression.COMPRESSION_MIN_SIZE
+    assert "content-encoding" not in resp.headers
+
+
+def test_large_bodies_are_compressed_in_a_worker_thread(monkeypatch):
+    seed("threaded", 5)
+    calls = []
+    run_sync = anyio.to_thread.run_sync
+
+    async def spy(fn, *args, **kwargs):
+        calls.append(fn)
+        return await run_sync(fn, *args, **kwargs)
+
+    monkeypatch.setattr(anyio.to_thread, "run_sync", spy)
+    monkeypatch.setattr(compression, "COMPRESSION_THREAD_MIN_SIZE", 1)
+    resp = client.get("/notes/", params={"status": "threaded"}, headers=GZIP)
+    assert resp.headers["content-encoding"] == "gzip"
+    assert compression.CODECS["gzip"][2] in calls
+
+
+def test_streamed_chunks_are_flushed_as_they_are_produced():
+    chunks = [json.dumps({"id": i, "text": "x" * 2000}).encode() + b"\n" for i in range(3)]
+
+    async def ndjson_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(compression.CompressionMiddleware(ndjson_app)(scope, None, send))
+
+    start, *bodies = sent
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    assert not any(name == b"content-length" for name, _ in start["headers"])
+    decoder = zlib.decompressobj(31)
+    # Each chunk decodes on arrival: nothing is held back until the end of the stream
+    for body, chunk in zip(bodies, chunks):
+        assert decoder.decompress(body["body"]) == chunk
+    assert decoder.eof
+
+
+def test_ndjson_and_msgpack_are_negotiated_from_accept(monkeypatch):
+    import app.pagination as pagination
+
+    monkeypatch.setattr(pagination, "STREAM_BATCH_SIZE", 2)
+    ids = seed("negotiated", 5)
+    params = {"status": "negotiated"}
+
+    resp = client.get("/notes/", params=params, headers={"Accept": "application/json;q=0.5, application/x-ndjson"})
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in resp.text.splitlines()] == ids
+
+    assert client.get("/notes/", params=params, headers={"Accept": "text/html, */*;q=0.1"}).json()[0]["id"] == ids[0]
+    assert client.get("/notes/", params=params, headers={"Accept": "application/xml"}).status_code == 406
+
+    packed = client.get("/notes/", params=params, headers={"Accept": "application/msgpack"})
+    if not serialization.MSGPACK_AVAILABLE:
+        assert packed.status_code == 406
+        return
+    import msgpack
+
+    assert packed.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(packed.content) == client.get("/notes/", params={**params, "limit": 100}).json()
+    assert packed.headers["etag"] != client.get("/notes/", params=params).headers["etag"]
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app import database
+
+
+@pytest.fixture
+def file_engines(tmp_path):
+    url = f"sqlite:///{tmp_path / 'profile.db'}"
+    writer = create_engine(url)
+    reader = create_engine(url)
+    database.apply_sqlite_profile(writer)
+    database.apply_sqlite_profile(reader, read_only=True)
+    with writer.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+    yield writer, reader
+    writer.dispose()
+    reader.dispose()
+
+
+def test_performance_pragmas_applied(file_engines):
+    writer, _ = file_engines
+    with writer.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == database.SQLITE_PRAGMAS["busy_timeout"]
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == database.SQLITE_PRAGMAS["cache_size"]
+
+
+def test_read_pool_is_query_only(file_engines):
+    _, reader = file_engines
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT x FROM t")).scalar() == 1
+        with pytest.raises(OperationalError):
+            conn.execute(text("INSERT INTO t VALUES (2)"))
+
+
+def test_readers_do_not_wait_for_open_write_transaction(file_engines):
+    writer, reader = file_engines
+    with writer.connect() as write_conn:
+        write_conn.execute(text("BEGIN IMMEDIATE"))
+        write_conn.execute(text("INSERT INTO t VALUES (2)"))
+        # Under WAL the reader sees the last committed snapshot without blocking
+        with reader.connect() as read_conn:
+            assert read_conn.execute(text("SELECT count(*) FROM t")).scalar() == 1
+        write_conn.execute(text("COMMIT"))
+    with reader.connect() as read_conn:
+        assert read_conn.execute(text("SELECT count(*) FROM t")).scalar() == 2
+
+
+def test_default_profile_leaves_sqlite_defaults(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "SQLITE_PROFILE", "default")
+    engine = create_engine(f"sqlite:///{tmp_path / 'plain.db'}")
+    database.apply_sqlite_profile(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+    engine.dispose()
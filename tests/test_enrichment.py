@@ -0,0 +1,135 @@
+import asyncio
+import sqlite3
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+
+from app import migrations
+from app.main import app
+from app.services import enrichment
+
+client = TestClient(app)
+
+
+def create_note_payload(**overrides):
+    payload = {
+        "title": "Enrich me",
+        "description": "Plan the launch and book the venue",
+        "status": "open",
+        "date": "2024-01-01T10:00:00Z",
+    }
+    payload.update(overrides)
+    return payload
+
+
+def drain():
+    while enrichment.run_once():
+        pass
+
+
+def test_deferred_create_returns_pending_then_worker_fills_items(monkeypatch):
+    monkeypatch.setattr(enrichment, "ENRICHMENT_MODE", "external")
+    monkeypatch.setattr(enrichment, "generate_action_items", lambda description: ["Book venue"])
+
+    import app.routers.notes as notes_router
+
+    def must_not_be_called(description):
+        raise AssertionError("create_note must not call the model in deferred mode")
+
+    monkeypatch.setattr(notes_router, "generate_action_items", must_not_be_called)
+
+    created = client.post("/notes/", json=create_note_payload())
+    assert created.status_code == 200
+    note = created.json()
+    assert note["enrichment_status"] == "pending"
+    assert note["action_items"] == []
+
+    assert client.get(f"/notes/{note['id']}/enrichment").json()["status"] == "pending"
+
+    drain()
+
+    status = client.get(f"/notes/{note['id']}/enrichment").json()
+    assert status["status"] == "done"
+    assert status["attempts"] == 1
+    assert client.get(f"/notes/{note['id']}").json()["action_items"] == ["Book venue"]
+
+
+def test_failed_jobs_retry_then_give_up(monkeypatch):
+    monkeypatch.setattr(enrichment, "ENRICHMENT_MODE", "external")
+    monkeypatch.setattr(enrichment, "ENRICHMENT_RETRY_BACKOFF", 0.0)
+    monkeypatch.setattr(enrichment, "ENRICHMENT_MAX_ATTEMPTS", 3)
+
+    def raising(description):
+        raise RuntimeError("OpenAI failure")
+
+    monkeypatch.setattr(enrichment, "generate_action_items", raising)
+
+    note_id = client.post("/notes/", json=create_note_payload()).json()["id"]
+    drain()
+
+    status = client.get(f"/notes/{note_id}/enrichment").json()
+    assert status["status"] == "failed"
+    assert status["attempts"] == 3
+    assert "OpenAI failure" in status["last_error"]
+
+
+def test_items_set_by_client_while_queued_are_kept(monkeypatch):
+    monkeypatch.setattr(enrichment, "ENRICHMENT_MODE", "external")
+    monkeypatch.setattr(enrichment, "generate_action_items", lambda description: ["From AI"])
+
+    note_id = client.post("/notes/", json=create_note_payload()).json()["id"]
+    client.put(f"/notes/{note_id}", json={"action_items": ["From user"]})
+    drain()
+
+    assert client.get(f"/notes/{note_id}").json()["action_items"] == ["From user"]
+
+
+def test_inline_mode_records_status(monkeypatch):
+    import app.routers.notes as notes_router
+
+    monkeypatch.setattr(notes_router, "generate_action_items", lambda description: ["Inline"])
+    note = client.post("/notes/", json=create_note_payload()).json()
+    assert note["enrichment_status"] == "done"
+
+    provided = client.post("/notes/", json=create_note_payload(action_items=["Mine"])).json()
+    assert provided["enrichment_status"] is None
+
+
+def test_worker_pool_drains_queue(monkeypatch):
+    monkeypatch.setattr(enrichment, "ENRICHMENT_MODE", "external")
+    monkeypatch.setattr(enrichment, "generate_action_items", lambda description: ["Pooled"])
+    note_id = client.post("/notes/", json=create_note_payload()).json()["id"]
+
+    async def run_pool():
+        pool = enrichment.WorkerPool(workers=1, poll_interval=0.01)
+        await pool.start()
+        for _ in range(100):
+            if client.get(f"/notes/{note_id}/enrichment").json()["status"] == "done":
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+
+    asyncio.run(run_pool())
+    assert client.get(f"/notes/{note_id}").json()["action_items"] == ["Pooled"]
+
+
+def test_enrichment_status_unknown_note():
+    assert client.get("/notes/999999/enrichment").status_code == 404
+
+
+def test_upgrade_adds_missing_columns(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE notes (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, description TEXT, "
+        "status VARCHAR NOT NULL, date DATETIME NOT NULL, action_items JSON)"
+    )
+    conn.commit()
+    conn.close()
+
+    engine = create_engine(f"sqlite:///{path}")
+    migrations.upgrade(engine)
+
+    inspector = inspect(engine)
+    assert "enrichment_status" in {c["name"] for c in inspector.get_columns("notes")}
+    assert "enrichment_jobs" in inspector.get_table_names()
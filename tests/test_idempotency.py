@@ -0,0 +1,175 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func
+
+import app.services.ai as ai
+from app import database, idempotency, models
+from app.main import app
+from app.services.cache import AICache
+
+client = TestClient(app)
+
+NOTE = {"title": "Retry me", "status": "open", "date": "2024-06-01T09:00:00Z", "action_items": ["Call back"]}
+
+
+def count_notes():
+    with database.SessionLocal() as db:
+        return db.query(func.count(models.Note.id)).scalar()
+
+
+def test_retried_create_is_replayed_without_a_second_note():
+    headers = {"Idempotency-Key": "create-1"}
+    first = client.post("/notes/", json=NOTE, headers=headers)
+    assert first.status_code == 200
+    assert "idempotent-replayed" not in first.headers
+    before = count_notes()
+
+    retry = client.post("/notes/", json=NOTE, headers=headers)
+    assert retry.status_code == 200
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert count_notes() == before
+
+    # Without a key every request is new
+    assert client.post("/notes/", json=NOTE).json()["id"] != first.json()["id"]
+
+
+def test_key_reused_for_another_request_is_rejected():
+    headers = {"Idempotency-Key": "create-2"}
+    assert client.post("/notes/", json=NOTE, headers=headers).status_code == 200
+    resp = client.post("/notes/", json={**NOTE, "title": "Something else"}, headers=headers)
+    assert resp.status_code == 422
+    assert client.post("/notes/", json=NOTE, headers={"Idempotency-Key": "x" * 300}).status_code == 400
+
+
+def test_retried_ai_note_does_not_call_openai_again(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(json.loads(request.content))
+        content = json.dumps({"title": "AI note", "status": "open", "date": "2024-06-02", "action_items": ["Ship"]})
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 50, "completion_tokens": 20, "total_tokens": 70},
+        })
+
+    fake = ai.build_client(api_key="test-key", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(ai, "_get_client", lambda: fake)
+    monkeypatch.setattr(ai, "ai_cache", AICache())
+    headers = {"Idempotency-Key": "ai-note-1"}
+
+    first = client.post("/notes/ai-note", json={"description": "Ship the release"}, headers=headers)
+    assert first.status_code == 200 and first.headers["X-OpenAI-Calls"] == "1"
+    before = count_notes()
+    # Even with the AI cache cleared, a replay never reaches the model
+    monkeypatch.setattr(ai, "ai_cache", AICache())
+    retry = client.post("/notes/ai-note", json={"description": "Ship the release"}, headers=headers)
+    assert retry.json() == first.json()
+    assert "X-OpenAI-Calls" not in retry.headers
+    assert len(calls) == 1
+    assert count_notes() == before
+
+
+@pytest.fixture
+def store(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'keys.db'}", connect_args={"check_same_thread": False})
+    models.IdempotencyKey.__table__.create(engine)
+    yield idempotency.IdempotencyStore(engine)
+    engine.dispose()
+
+
+def counting_app(calls, delay=0.0, status=200):
+    """ASGI app that counts its calls and answers with the call number after ``delay`` seconds."""
+
+    async def asgi(scope, receive, send):
+        calls.append((await receive())["body"])
+        await asyncio.sleep(delay)
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": json.dumps({"call": len(calls)}).encode()})
+
+    return asgi
+
+
+async def run_concurrently(asgi, count, key="k"):
+    transport = httpx.ASGITransport(app=asgi)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        return await asyncio.gather(
+            *(http.post("/notes/", content=b"{}", headers={"Idempotency-Key": key}) for _ in range(count))
+        )
+
+
+def test_concurrent_retries_wait_for_the_original(store):
+    calls = []
+    asgi = idempotency.IdempotencyMiddleware(counting_app(calls, delay=0.3), store=store)
+    responses = asyncio.run(run_concurrently(asgi, 3))
+    assert len(calls) == 1
+    assert [r.json() for r in responses] == [{"call": 1}] * 3
+    assert sorted(r.headers.get("idempotent-replayed", "") for r in responses) == ["", "true", "true"]
+
+
+def test_waiting_retries_poll_read_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_POLL_INTERVAL", 0.01)
+    url = f"sqlite:///{tmp_path / 'keys.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    read_engine = create_engine(url, connect_args={"check_same_thread": False})
+    database.apply_sqlite_profile(read_engine, read_only=True)
+    models.IdempotencyKey.__table__.create(engine)
+    store = idempotency.IdempotencyStore(engine, read_engine)
+    claims = []
+    claim = store._claim
+    monkeypatch.setattr(store, "_claim", lambda *args: claims.append(args) or claim(*args))
+
+    calls = []
+    asgi = idempotency.IdempotencyMiddleware(counting_app(calls, delay=0.3), store=store)
+    responses = asyncio.run(run_concurrently(asgi, 3))
+    assert [r.json() for r in responses] == [{"call": 1}] * 3
+    # One write transaction per request; the dozens of polls while waiting are SELECTs
+    assert len(claims) == 3
+    engine.dispose()
+    read_engine.dispose()
+
+
+def test_retry_gets_409_when_the_original_outlasts_the_wait(store, monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 0.05)
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_POLL_INTERVAL", 0.01)
+    calls = []
+    asgi = idempotency.IdempotencyMiddleware(counting_app(calls, delay=0.5), store=store)
+    statuses = sorted(r.status_code for r in asyncio.run(run_concurrently(asgi, 2)))
+    assert statuses == [200, 409]
+    assert len(calls) == 1
+
+
+def test_server_errors_and_expired_keys_run_again(store, monkeypatch):
+    calls = []
+    failing = idempotency.IdempotencyMiddleware(counting_app(calls, status=503), store=store)
+    assert [r.status_code for r in asyncio.run(run_concurrently(failing, 1))] == [503]
+    ok = idempotency.IdempotencyMiddleware(counting_app(calls), store=store)
+    assert asyncio.run(run_concurrently(ok, 1))[0].json() == {"call": 2}
+
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_TTL_SECONDS", 0)
+    assert asyncio.run(run_concurrently(ok, 1, key="expiring"))[0].json() == {"call": 3}
+    assert asyncio.run(run_concurrently(ok, 1, key="expiring"))[0].json() == {"call": 4}
+
+
+def test_response_is_stored_when_the_client_disconnects(store):
+    calls = []
+    asgi = idempotency.IdempotencyMiddleware(counting_app(calls), store=store)
+
+    async def receive():
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    async def gone(message):
+        raise ConnectionResetError
+
+    scope = {"type": "http", "method": "POST", "path": "/notes/", "query_string": b"",
+             "headers": [(b"idempotency-key", b"k")]}
+    asyncio.run(asgi(scope, receive, gone))
+    retry = asyncio.run(run_concurrently(asgi, 1))[0]
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == {"call": 1}
+    assert len(calls) == 1
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import app.services.ai as ai
+from app import metrics
+from app.main import app
+from app.services.cache import AICache
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = metrics.Histogram("test_latency_seconds", "test", ("route",), buckets=(0.1, 1.0))
+    hist.observe(0.05, "/a")
+    hist.observe(0.5, "/a")
+    hist.observe(5.0, "/a")
+    text = "\n".join(hist.render())
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/a"} 3' in text
+    metrics._registry.remove(hist)
+
+
+def test_route_template_restores_parameters():
+    scope = {"path": "/notes/42/enrichment", "path_params": {"note_id": 42}}
+    assert metrics.route_template(scope) == "/notes/{note_id}/enrichment"
+    assert metrics.route_template({"path": "/nope"}) == "unmatched"
+
+
+def test_requests_and_queries_are_recorded():
+    note_id = client.post(
+        "/notes/",
+        json={"title": "m", "status": "open", "date": "2024-01-01T00:00:00Z", "action_items": ["x"]},
+    ).json()["id"]
+    before = metrics.REQUEST_DURATION.count("GET", "/notes/{note_id}", "200")
+    client.get(f"/notes/{note_id}")
+    assert metrics.REQUEST_DURATION.count("GET", "/notes/{note_id}", "200") == before + 1
+    assert metrics.REQUEST_DB_TIME.count("GET", "/notes/{note_id}") >= 1
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/notes/{note_id}",status="200"' in resp.text
+    assert 'db_query_duration_seconds_count{operation="SELECT"}' in resp.text
+
+
+def test_openai_latency_and_tokens_recorded(monkeypatch):
+    def create(**kwargs):
+        message = SimpleNamespace(content='["Measured"]')
+        usage = SimpleNamespace(prompt_tokens=120, completion_tokens=15)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(ai, "_get_client", lambda: fake)
+    monkeypatch.setattr(ai, "ai_cache", AICache())
+
+    prompt_before = metrics.OPENAI_TOKENS.value("action_items", ai.MODEL, "prompt")
+    resp = client.post("/notes/ai-action-items", params={"description": "measure tokens"})
+    assert resp.json() == ["Measured"]
+
+    assert metrics.OPENAI_TOKENS.value("action_items", ai.MODEL, "prompt") == prompt_before + 120
+    assert metrics.OPENAI_REQUEST_DURATION.count("action_items", ai.MODEL, "ok") >= 1
+    assert metrics.REQUEST_OPENAI_TIME.count("POST", "/notes/ai-action-items") >= 1
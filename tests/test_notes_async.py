@@ -0,0 +1,156 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("greenlet")
+
+from app import database
+from app.database import Base
+from app.routers import notes_async
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+@pytest.fixture
+def async_client(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    Base.metadata.create_all(bind=create_engine(url))
+    monkeypatch.setattr(database, "async_engine", None)
+    monkeypatch.setattr(database, "AsyncSessionLocal", None)
+    database.init_async_engine(url)
+
+    app = FastAPI()
+    app.include_router(notes_async.router, prefix="/notes")
+    with TestClient(app) as client:
+        yield client
+
+
+def create_note_payload(**overrides):
+    payload = {
+        "title": "Async",
+        "description": "Async mode",
+        "status": "open",
+        "date": "2024-01-01T10:00:00Z",
+        "action_items": ["Await it"],
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_async_crud_round_trip(async_client):
+    created = async_client.post("/notes/", json=create_note_payload())
+    assert created.status_code == 200
+    note_id = created.json()["id"]
+
+    assert async_client.get(f"/notes/{note_id}").json()["title"] == "Async"
+    updated = async_client.put(f"/notes/{note_id}", json={"title": "Renamed"})
+    assert updated.json()["title"] == "Renamed"
+    assert [n["id"] for n in async_client.get("/notes/").json()] == [note_id]
+
+    assert async_client.delete(f"/notes/{note_id}").json()["detail"] == "Note deleted"
+    assert async_client.get(f"/notes/{note_id}").status_code == 404
+
+
+def test_async_create_awaits_ai(async_client, monkeypatch):
+    async def fake_agenerate_action_items(description: str):
+        return ["Async item"]
+
+    monkeypatch.setattr(notes_async, "agenerate_action_items", fake_agenerate_action_items)
+
+    resp = async_client.post("/notes/", json=create_note_payload(action_items=[]))
+    assert resp.json()["action_items"] == ["Async item"]
+
+
+def test_async_ai_note_upstream_error(async_client, monkeypatch):
+    async def raising(description: str):
+        raise RuntimeError("OpenAI failure")
+
+    monkeypatch.setattr(notes_async, "agenerate_note_fields", raising)
+
+    resp = async_client.post("/notes/ai-note", json={"description": "Kickoff"})
+    assert resp.status_code == 502
+
+
+def test_async_mode_selected_by_environment():
+    script = textwrap.dedent(
+        """
+        from fastapi.testclient import TestClient
+        from sqlalchemy import event
+        from app import database
+        from app.main import app
+        from app.routers import notes, notes_async
+
+        async def fake_agenerate_action_items(description):
+            return ["from async"]
+
+        notes_async.agenerate_action_items = fake_agenerate_action_items
+        notes.generate_action_items = lambda description: ["from sync"]
+
+        with TestClient(app) as client:
+            note = client.post("/notes/", json={
+                "title": "t", "description": "d", "status": "open", "date": "2024-01-01T00:00:00Z",
+            }).json()
+            assert note["action_items"] == ["from async"], note
+            assert client.get(f"/notes/{note['id']}").status_code == 200
+            assert client.get("/notes/ai-cache/stats").status_code == 200
+            # Sync routers share the async routes' database
+            assert client.get("/notes/stats").json()["notes"] == 1
+            changes = client.get("/notes/changes").json()["changes"]
+            assert [c["note_id"] for c in changes] == [note["id"]], changes
+            assert [i["text"] for i in client.get("/notes/action-items").json()] == ["from async"]
+            keyed = []
+            event.listen(database.async_engine.sync_engine, "before_cursor_execute",
+                         lambda conn, cursor, statement, *rest: keyed.append("idempotency_keys" in statement))
+            payload = {"title": "t", "status": "open", "date": "2024-01-01T00:00:00Z", "action_items": ["x"]}
+            first = client.post("/notes/", headers={"Idempotency-Key": "k"}, json=payload)
+            assert first.status_code == 200, first.text
+            replay = client.post("/notes/", headers={"Idempotency-Key": "k"}, json=payload)
+            assert replay.headers["idempotent-replayed"] == "true" and replay.json() == first.json()
+            # Keys go through the engine the async note routes use
+            assert any(keyed), keyed
+        """
+    )
+    env = dict(os.environ, ASYNC_MODE="1", DATABASE_URL="sqlite:///:memory:", AI_CACHE_PATH="")
+    env.pop("OPENAI_API_KEY", None)
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_async_ai_note_stream(async_client, monkeypatch):
+    async def fake_stream(description: str):
+        yield "title", "Async kickoff"
+        yield "action_item", "Await it"
+        yield "fields", {"title": "Async kickoff", "status": "open", "date": "", "action_items": ["Await it"]}
+
+    monkeypatch.setattr(notes_async, "astream_note_fields", fake_stream)
+
+    resp = async_client.post("/notes/ai-note/stream", json={"description": "Kickoff"})
+    events = [block.split("\n")[0] for block in resp.text.strip().split("\n\n")]
+    assert events == ["event: title", "event: action_item", "event: note"]
+    assert async_client.get("/notes/").json()[0]["title"] == "Async kickoff"
+
+
+def test_async_listing_shares_paging_etags_and_ndjson(async_client):
+    ids = [async_client.post("/notes/", json=create_note_payload(title=f"Page {i}")).json()["id"] for i in range(3)]
+    page = async_client.get("/notes/", params={"limit": 2, "fields": "id,title"})
+    assert [n["id"] for n in page.json()] == ids[:2]
+    rest = async_client.get("/notes/", params={"limit": 2, "cursor": page.headers["X-Next-Cursor"]})
+    assert [n["id"] for n in rest.json()] == ids[2:]
+    assert async_client.get("/notes/", params={"limit": 2, "fields": "id,title"},
+                            headers={"If-None-Match": page.headers["ETag"]}).status_code == 304
+
+    lines = async_client.get("/notes/", headers={"Accept": "application/x-ndjson"}).text.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ids
+    note = async_client.get(f"/notes/{ids[0]}")
+    assert async_client.get(f"/notes/{ids[0]}", headers={"If-None-Match": note.headers["ETag"]}).status_code == 304
+    assert async_client.get("/notes/987654").status_code == 404
@@ -0,0 +1,136 @@
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import database
+from app.main import app
+
+client = TestClient(app)
+
+
+def create_note_payload(**overrides):
+    payload = {
+        "title": "Bulk",
+        "description": "Imported",
+        "status": "open",
+        "date": "2024-01-01T10:00:00Z",
+        "action_items": ["Review"],
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_bulk_create_json_array_with_per_item_errors():
+    body = [
+        create_note_payload(title="bulk-a"),
+        {"title": "missing fields"},
+        create_note_payload(title="bulk-b"),
+    ]
+    resp = client.post("/notes/bulk", json=body)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["succeeded"] == 2
+    assert data["failed"] == 1
+    assert [r["status"] for r in data["results"]] == [201, 422, 201]
+    assert data["results"][0]["note"] is None
+
+    created = data["results"][2]["id"]
+    assert client.get(f"/notes/{created}").json()["title"] == "bulk-b"
+
+
+def test_bulk_create_ndjson_in_chunks(monkeypatch):
+    import app.routers.bulk as bulk
+
+    monkeypatch.setattr(bulk, "BULK_CHUNK_SIZE", 2)
+    lines = [json.dumps(create_note_payload(title=f"ndjson-{i}")) for i in range(5)]
+    lines.insert(2, "{not json")
+    resp = client.post(
+        "/notes/bulk",
+        content="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+        params={"return_notes": True},
+    )
+    data = resp.json()
+    assert data["succeeded"] == 5
+    assert data["results"][2]["status"] == 422
+    assert [r["note"]["title"] for r in data["results"] if r["status"] == 201] == [
+        f"ndjson-{i}" for i in range(5)
+    ]
+
+
+def test_bulk_create_rejects_non_array():
+    assert client.post("/notes/bulk", json={"title": "x"}).status_code == 400
+
+
+def test_bulk_update_partial_and_missing():
+    ids = [r["id"] for r in client.post("/notes/bulk", json=[create_note_payload()] * 2).json()["results"]]
+    resp = client.patch(
+        "/notes/bulk",
+        json=[
+            {"id": ids[0], "title": "patched-0"},
+            {"id": ids[1], "status": "done"},
+            {"id": 987654, "title": "ghost"},
+        ],
+        params={"return_notes": True},
+    )
+    data = resp.json()
+    assert [r["status"] for r in data["results"]] == [200, 200, 404]
+    assert data["results"][0]["note"]["title"] == "patched-0"
+    second = client.get(f"/notes/{ids[1]}").json()
+    assert second["status"] == "done"
+    assert second["title"] == "Bulk"
+
+
+def test_bulk_update_rejects_nulls_and_isolates_failed_rows():
+    ids = [r["id"] for r in client.post("/notes/bulk", json=[create_note_payload()] * 3).json()["results"]]
+    resp = client.patch("/notes/bulk", json=[{"id": ids[0], "title": None}, {"id": ids[1], "title": "kept"}])
+    assert [(r["status"], r["id"]) for r in resp.json()["results"]] == [(422, None), (200, ids[1])]
+    assert client.get(f"/notes/{ids[0]}").json()["title"] == "Bulk"
+
+    # A row the database refuses fails alone; the rest of its chunk still commits
+    with database.engine.begin() as conn:
+        conn.execute(text("CREATE TRIGGER refuse_boom BEFORE UPDATE ON notes WHEN new.title = 'boom' "
+                          "BEGIN SELECT RAISE(ABORT, 'refused'); END"))
+    try:
+        resp = client.patch("/notes/bulk", json=[{"id": ids[0], "title": "boom"}, {"id": ids[2], "title": "saved"}])
+    finally:
+        with database.engine.begin() as conn:
+            conn.execute(text("DROP TRIGGER refuse_boom"))
+    assert [(r["status"], r["id"]) for r in resp.json()["results"]] == [(500, ids[0]), (200, ids[2])]
+    assert client.get(f"/notes/{ids[2]}").json()["title"] == "saved"
+
+
+def test_bulk_delete():
+    ids = [r["id"] for r in client.post("/notes/bulk", json=[create_note_payload()] * 2).json()["results"]]
+    resp = client.request("DELETE", "/notes/bulk", json={"ids": ids + [987654]})
+    assert resp.status_code == 200
+    assert [r["status"] for r in resp.json()["results"]] == [200, 200, 404]
+    assert all(client.get(f"/notes/{i}").status_code == 404 for i in ids)
+
+
+def test_bulk_create_queues_enrichment_when_deferred(monkeypatch):
+    from app.services import enrichment
+
+    monkeypatch.setattr(enrichment, "ENRICHMENT_MODE", "external")
+    monkeypatch.setattr(enrichment, "generate_action_items", lambda description: ["Queued"])
+    resp = client.post("/notes/bulk", json=[create_note_payload(action_items=[])], params={"return_notes": True})
+    note = resp.json()["results"][0]["note"]
+    assert note["enrichment_status"] == "pending"
+
+    while enrichment.run_once():
+        pass
+    assert client.get(f"/notes/{note['id']}").json()["action_items"] == ["Queued"]
+
+
+def test_bulk_delete_accepts_arrays_and_ndjson():
+    ids = [r["id"] for r in client.post("/notes/bulk", json=[create_note_payload()] * 4).json()["results"]]
+    resp = client.request("DELETE", "/notes/bulk", json=[ids[0], {"id": ids[1]}, "not-an-id"])
+    assert [r["status"] for r in resp.json()["results"]] == [200, 200, 422]
+
+    body = f'{ids[2]}\n{{"id": {ids[3]}}}\n{{broken\n'
+    resp = client.request("DELETE", "/notes/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert [r["status"] for r in resp.json()["results"]] == [200, 200, 422]
+    assert all(client.get(f"/notes/{i}").status_code == 404 for i in ids)
+
+    assert client.request("DELETE", "/notes/bulk", json={"ids": []}).status_code == 422
@@ -0,0 +1,146 @@
+import asyncio
+import time
+from datetime import datetime
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app import changes, database, migrations, models
+from app.main import app
+from app.routers import changes as changes_router
+
+client = TestClient(app)
+
+
+def create_note(title):
+    payload = {"title": title, "status": "open", "date": "2024-04-01T09:00:00Z", "action_items": ["Sync"]}
+    return client.post("/notes/", json=payload).json()["id"]
+
+
+def head():
+    with database.ReadSessionLocal() as db:
+        return changes.head(db)
+
+
+def test_writes_are_logged_with_tombstones_and_collapsed_per_batch():
+    since = head()
+    kept = create_note("Kept")
+    client.put(f"/notes/{kept}", json={"title": "Kept v2"})
+    gone = create_note("Gone")
+    client.delete(f"/notes/{gone}")
+
+    resp = client.get("/notes/changes", params={"since": since})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [(c["note_id"], c["op"]) for c in body["changes"]] == [(kept, "update"), (gone, "delete")]
+    assert body["changes"][0]["note"]["title"] == "Kept v2"
+    assert body["changes"][0]["version"] == body["changes"][0]["note"]["version"] == 2
+    assert body["changes"][1]["note"] is None
+    assert body["has_more"] is False
+
+    caught_up = client.get("/notes/changes", params={"since": body["cursor"]}).json()
+    assert caught_up == {"changes": [], "cursor": body["cursor"], "has_more": False}
+
+
+def test_batches_follow_the_cursor():
+    since = head()
+    ids = [create_note(f"Batch {i}") for i in range(3)]
+    seen = []
+    while True:
+        body = client.get("/notes/changes", params={"since": since, "limit": 2}).json()
+        seen += [c["note_id"] for c in body["changes"]]
+        since = body["cursor"]
+        if not body["has_more"]:
+            break
+    assert seen == ids
+
+
+def test_bulk_writes_are_logged_and_rolled_back_writes_are_not():
+    since = head()
+    payload = [{"title": f"Bulk {i}", "status": "open", "date": "2024-04-01T09:00:00Z"} for i in range(2)]
+    created = [r["id"] for r in client.post("/notes/bulk", json=payload).json()["results"]]
+    client.request("DELETE", "/notes/bulk", json={"ids": created[:1]})
+    body = client.get("/notes/changes", params={"since": since}).json()
+    assert [(c["note_id"], c["op"]) for c in body["changes"]] == [(created[1], "create"), (created[0], "delete")]
+
+    db = database.SessionLocal()
+    try:
+        db.add(models.Note(title="Never", status="open", date=datetime(2024, 4, 1)))
+        db.flush()
+        db.rollback()
+    finally:
+        db.close()
+    assert head() == body["cursor"]
+
+
+def test_long_poll_returns_when_a_write_commits(monkeypatch):
+    # Only the in-process wake-up can beat this poll interval
+    monkeypatch.setattr(changes, "CHANGES_POLL_INTERVAL", 30)
+    since = head()
+
+    async def go():
+        waiting = asyncio.ensure_future(changes_router.wait_for_changes(since, 10))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        await run_in_threadpool(create_note, "Wake")
+        return await waiting, time.monotonic() - started
+
+    woken, elapsed = asyncio.run(go())
+    assert woken and elapsed < 5
+
+    monkeypatch.setattr(changes, "CHANGES_POLL_INTERVAL", 0.01)
+    started = time.monotonic()
+    body = client.get("/notes/changes", params={"since": head(), "wait": 0.1}).json()
+    assert body["changes"] == [] and time.monotonic() - started >= 0.1
+
+
+def test_sse_tail_sends_backlog_then_heartbeats(monkeypatch):
+    monkeypatch.setattr(changes_router, "CHANGES_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(changes, "CHANGES_POLL_INTERVAL", 0.01)
+    since = head()
+    ids = [create_note(f"Tail {i}") for i in range(2)]
+
+    async def go():
+        response = await changes_router.stream_changes(since=0, last_event_id=since)
+        assert response.media_type == "text/event-stream"
+        events = []
+        async for chunk in response.body_iterator:
+            events.append(chunk)
+            if chunk.startswith(":"):
+                break
+        await response.body_iterator.aclose()
+        return events
+
+    events = asyncio.run(go())
+    assert events[-1] == ": keepalive\n\n"
+    assert [event.split("\n")[0] for event in events[:-1]] == [f"id: {since + 1}", f"id: {since + 2}"]
+    assert all(f'"note_id": {note_id}' in event for note_id, event in zip(ids, events))
+
+
+def test_compaction_keeps_the_latest_change_per_note():
+    since = head()
+    note_id = create_note("Compacted")
+    for i in range(3):
+        client.put(f"/notes/{note_id}", json={"title": f"Compacted {i}"})
+    with database.engine.begin() as conn:
+        assert changes.compact(conn) >= 3
+        rows = conn.execute(text("SELECT op, version FROM note_changes WHERE note_id = :id"), {"id": note_id}).all()
+    assert rows == [("update", 4)]
+    body = client.get("/notes/changes", params={"since": since}).json()
+    assert [(c["note_id"], c["note"]["title"]) for c in body["changes"]] == [(note_id, "Compacted 2")]
+
+
+def test_upgrade_seeds_the_feed_from_existing_notes(tmp_path):
+    old = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with old.begin() as conn:
+        conn.execute(text("CREATE TABLE notes (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, "
+                          "description TEXT, status VARCHAR NOT NULL, date DATETIME NOT NULL, action_items JSON)"))
+        conn.execute(text("INSERT INTO notes (title, status, date, action_items) "
+                          "VALUES ('Old', 'open', '2024-01-01 00:00:00.000000', '[]')"))
+    migrations.upgrade(old)
+    with Session(old) as db:
+        body = changes.read(db, 0, 10)
+    assert [(c["op"], c["note"]["title"]) for c in body["changes"]] == [("create", "Old")]
+    old.dispose()
@@ -0,0 +1,123 @@
+import sqlite3
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app import database, migrations, models, response_cache
+from app.main import app
+from app.response_cache import Entry, ResponseCache
+
+client = TestClient(app)
+
+
+def create_note_payload(**overrides):
+    payload = {
+        "title": "Cached",
+        "description": "ETag fixture",
+        "status": "open",
+        "date": "2024-01-01T10:00:00Z",
+        "action_items": ["One"],
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_read_note_etag_and_not_modified():
+    note = client.post("/notes/", json=create_note_payload()).json()
+    assert note["version"] == 1
+
+    first = client.get(f"/notes/{note['id']}")
+    etag = first.headers["etag"]
+    assert first.json() == note
+
+    hits = response_cache.cache.stats["hits"]
+    assert client.get(f"/notes/{note['id']}").content == first.content
+    assert response_cache.cache.stats["hits"] == hits + 1
+
+    conditional = client.get(f"/notes/{note['id']}", headers={"If-None-Match": etag})
+    assert conditional.status_code == 304
+    assert conditional.headers["etag"] == etag
+    assert conditional.content == b""
+
+    updated = client.put(f"/notes/{note['id']}", json={"title": "Changed"}).json()
+    assert updated["version"] == 2
+    after = client.get(f"/notes/{note['id']}", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["etag"] != etag
+    assert after.json()["title"] == "Changed"
+
+
+def test_writes_outside_the_routes_still_change_the_etag():
+    note = client.post("/notes/", json=create_note_payload()).json()
+    etag = client.get(f"/notes/{note['id']}").headers["etag"]
+
+    # Simulates another worker process: no in-process invalidation happens
+    db = database.SessionLocal()
+    db.get(models.Note, note["id"]).status = "done"
+    db.commit()
+    db.close()
+
+    resp = client.get(f"/notes/{note['id']}", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "done"
+
+
+def test_list_page_etag_tracks_page_contents():
+    client.post("/notes/", json=create_note_payload(status="etag-list"))
+    client.post("/notes/", json=create_note_payload(status="etag-list"))
+    url = "/notes/?status=etag-list&limit=1"
+
+    first = client.get(url)
+    etag = first.headers["etag"]
+    assert "x-next-cursor" in first.headers
+
+    cached = client.get(url, headers={"If-None-Match": f'"other", {etag}'})
+    assert cached.status_code == 304
+
+    # Same parameters in another order share the cache entry and tag
+    reordered = client.get("/notes/?limit=1&status=etag-list")
+    assert reordered.headers["etag"] == etag
+    assert reordered.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+
+    note_id = first.json()[0]["id"]
+    client.delete(f"/notes/{note_id}")
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()[0]["id"] != note_id
+
+    sparse = client.get(url + "&fields=id,title")
+    assert list(sparse.json()[0].keys()) == ["id", "title"]
+    assert sparse.headers["etag"] != changed.headers["etag"]
+
+
+def test_cache_is_bounded_by_bytes_with_lru_eviction():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", Entry('"1"', b"aaaa", {}))
+    cache.put("b", Entry('"2"', b"bbbb", {}))
+    assert cache.get("a", '"1"') is not None  # a is now most recent
+    cache.put("c", Entry('"3"', b"cccc", {}))
+
+    assert cache.get("b", '"2"') is None
+    assert cache.get("a", '"1"') is not None
+    assert cache.get("a", '"stale"') is None
+    cache.put("huge", Entry('"4"', b"x" * 11, {}))
+    snapshot = cache.snapshot()
+    assert snapshot["bytes"] == 8 and snapshot["entries"] == 2 and snapshot["evictions"] == 1
+
+
+def test_upgrade_adds_version_columns(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE notes (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, description TEXT, "
+        "status VARCHAR NOT NULL, date DATETIME NOT NULL, action_items JSON)"
+    )
+    conn.execute("INSERT INTO notes (title, status, date) VALUES ('Old', 'open', '2024-01-01 00:00:00')")
+    conn.commit()
+    conn.close()
+
+    engine = create_engine(f"sqlite:///{path}")
+    migrations.upgrade(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version, updated_at FROM notes")).one() == (1, None)
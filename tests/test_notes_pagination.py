@@ -0,0 +1,121 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+
+def create_note_payload(**overrides):
+    payload = {
+        "title": "Paged",
+        "description": "Pagination fixture",
+        "status": "open",
+        "date": "2024-01-01T10:00:00Z",
+        "action_items": ["One"],
+    }
+    payload.update(overrides)
+    return payload
+
+
+def seed(status, count):
+    ids = []
+    for i in range(count):
+        resp = client.post(
+            "/notes/",
+            json=create_note_payload(
+                title=f"{status}-{i}",
+                status=status,
+                date=f"2024-02-{(count - i):02d}T00:00:00Z",
+            ),
+        )
+        ids.append(resp.json()["id"])
+    return ids
+
+
+def test_keyset_pages_cover_all_rows_once():
+    ids = seed("paged-by-id", 5)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"status": "paged-by-id", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get("/notes/", params=params)
+        assert resp.status_code == 200
+        seen.extend(note["id"] for note in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == ids
+
+
+def test_order_by_date_descending_with_cursor():
+    seed("paged-by-date", 4)
+
+    first = client.get(
+        "/notes/",
+        params={"status": "paged-by-date", "order_by": "date", "descending": True, "limit": 2},
+    )
+    assert [n["title"] for n in first.json()] == ["paged-by-date-0", "paged-by-date-1"]
+
+    second = client.get(
+        "/notes/",
+        params={
+            "status": "paged-by-date",
+            "order_by": "date",
+            "descending": True,
+            "limit": 2,
+            "cursor": first.headers["X-Next-Cursor"],
+        },
+    )
+    assert [n["title"] for n in second.json()] == ["paged-by-date-2", "paged-by-date-3"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_date_range_filter():
+    seed("paged-range", 4)
+    resp = client.get(
+        "/notes/",
+        params={
+            "status": "paged-range",
+            "date_from": "2024-02-02T00:00:00",
+            "date_to": "2024-02-04T00:00:00",
+        },
+    )
+    assert sorted(n["title"] for n in resp.json()) == ["paged-range-1", "paged-range-2"]
+
+
+def test_sparse_fields():
+    seed("paged-sparse", 1)
+    resp = client.get("/notes/", params={"status": "paged-sparse", "fields": "id,title"})
+    assert resp.status_code == 200
+    assert list(resp.json()[0].keys()) == ["id", "title"]
+
+
+def test_unknown_field_and_bad_cursor_rejected():
+    assert client.get("/notes/", params={"fields": "id,secret"}).status_code == 400
+    assert client.get("/notes/", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_cursor_for_other_order_rejected():
+    seed("paged-mismatch", 3)
+    resp = client.get("/notes/", params={"status": "paged-mismatch", "limit": 1})
+    cursor = resp.headers["X-Next-Cursor"]
+    assert client.get("/notes/", params={"cursor": cursor, "order_by": "date"}).status_code == 400
+
+
+def test_ndjson_stream_returns_every_row(monkeypatch):
+    import app.pagination as pagination
+
+    monkeypatch.setattr(pagination, "STREAM_BATCH_SIZE", 2)
+    ids = seed("paged-stream", 5)
+
+    resp = client.get("/notes/", params={"status": "paged-stream", "format": "ndjson", "limit": 1})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["id"] for line in lines] == ids
@@ -0,0 +1,74 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.database import engine
+from app.main import app
+from app import search
+
+client = TestClient(app)
+
+
+def create_note_payload(**overrides):
+    payload = {
+        "title": "Search",
+        "description": "Searchable",
+        "status": "open",
+        "date": "2024-01-01T10:00:00Z",
+        "action_items": ["Nothing"],
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_search_ranks_title_matches_first():
+    body_hit = client.post(
+        "/notes/", json=create_note_payload(title="Weekly sync", description="Discuss zebracorn migration")
+    ).json()
+    title_hit = client.post("/notes/", json=create_note_payload(title="Zebracorn rollout")).json()
+
+    resp = client.get("/notes/search", params={"q": "zebracorn"})
+    assert resp.status_code == 200
+    hits = resp.json()
+    assert [h["note"]["id"] for h in hits] == [title_hit["id"], body_hit["id"]]
+    assert "<mark>" in hits[0]["snippet"]
+
+
+def test_search_tracks_updates_and_deletes():
+    note_id = client.post("/notes/", json=create_note_payload(title="Quokkaplan")).json()["id"]
+    assert len(client.get("/notes/search", params={"q": "quokkaplan"}).json()) == 1
+
+    client.put(f"/notes/{note_id}", json={"title": "Renamed"})
+    assert client.get("/notes/search", params={"q": "quokkaplan"}).json() == []
+    assert client.get("/notes/search", params={"q": "renamed"}).json()[0]["note"]["id"] == note_id
+
+    client.delete(f"/notes/{note_id}")
+    assert all(h["note"]["id"] != note_id for h in client.get("/notes/search", params={"q": "renamed"}).json())
+
+
+def test_search_matches_action_items_and_bulk_writes():
+    client.post("/notes/bulk", json=[create_note_payload(action_items=["Order flamingoprints"])])
+    hits = client.get("/notes/search", params={"q": "flamingo"}).json()
+    assert hits and hits[0]["note"]["action_items"] == ["Order flamingoprints"]
+
+
+def test_search_pagination_and_syntax_safety():
+    for i in range(3):
+        client.post("/notes/", json=create_note_payload(title=f"Pagedsearch {i}"))
+    first = client.get("/notes/search", params={"q": "pagedsearch", "limit": 2}).json()
+    rest = client.get("/notes/search", params={"q": "pagedsearch", "limit": 2, "offset": 2}).json()
+    assert len(first) == 2 and len(rest) == 1
+
+    # FTS operators in user input are matched literally instead of erroring
+    assert client.get("/notes/search", params={"q": 'AND "( NEAR'}).status_code == 200
+    assert client.get("/notes/search", params={"q": ""}).status_code == 422
+
+
+def test_rebuild_restores_index():
+    note_id = client.post("/notes/", json=create_note_payload(title="Rebuildable")).json()["id"]
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO notes_fts(notes_fts) VALUES ('delete-all')"))
+    assert client.get("/notes/search", params={"q": "rebuildable"}).json() == []
+
+    with engine.begin() as conn:
+        search.rebuild(conn)
+    assert client.get("/notes/search", params={"q": "rebuildable"}).json()[0]["note"]["id"] == note_id
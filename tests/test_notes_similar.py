@@ -0,0 +1,105 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app import database, embeddings, models
+from app.embeddings import EmbeddingIndex, embed
+from app.main import app
+
+client = TestClient(app)
+
+
+def create(title, description):
+    payload = {
+        "title": title,
+        "description": description,
+        "status": "open",
+        "date": "2024-05-01T10:00:00Z",
+        "action_items": ["Follow up"],
+    }
+    return client.post("/notes/", json=payload).json()["id"]
+
+
+def ids(resp):
+    assert resp.status_code == 200
+    return [hit["note"]["id"] for hit in resp.json()]
+
+
+def test_embed_is_deterministic_and_normalised():
+    a = embed("Zanzibar budget review", "Quarterly zanzibar finance numbers")
+    assert np.array_equal(a, embed("Zanzibar budget review", "Quarterly zanzibar finance numbers"))
+    assert abs(float(np.linalg.norm(a)) - 1.0) < 1e-5
+    related = embed("Zanzibar finance sync", None)
+    unrelated = embed("Team picnic logistics", None)
+    assert float(a @ related) > float(a @ unrelated)
+    assert not embed("", "the and of").any()
+
+
+def test_index_upsert_remove_and_top_k():
+    index = EmbeddingIndex(dim=3)
+    index.upsert(1, np.array([1, 0, 0], dtype=np.float32))
+    index.upsert(2, np.array([0.6, 0.8, 0], dtype=np.float32))
+    index.upsert(3, np.array([0, 0, 1], dtype=np.float32))
+    query = np.array([1, 0, 0], dtype=np.float32)
+
+    assert [i for i, _ in index.top_k(query, 2)] == [1, 2]
+    assert [i for i, _ in index.top_k(query, 5, exclude=1)] == [2, 3]
+
+    index.remove(1)
+    index.upsert(3, np.array([1, 0, 0], dtype=np.float32))
+    assert len(index) == 2
+    assert [i for i, _ in index.top_k(query, 2)] == [3, 2]
+
+
+def test_semantic_search_and_similar_notes():
+    finance = create("Qwertyfin budget review", "Walk through the qwertyfin quarterly budget and forecast")
+    finance2 = create("Qwertyfin forecast", "Update the qwertyfin budget forecast spreadsheet")
+    picnic = create("Qwertypic picnic", "Plan food and games for the qwertypic picnic")
+
+    found = ids(client.get("/notes/semantic-search", params={"q": "qwertyfin budget forecast", "limit": 3}))
+    assert found[:2] in ([finance, finance2], [finance2, finance])
+
+    similar = client.get(f"/notes/{finance}/similar", params={"limit": 5})
+    assert ids(similar)[0] == finance2
+    assert finance not in ids(similar)
+    assert 0 < similar.json()[0]["score"] <= 1
+
+    # Writes update the index incrementally
+    client.put(f"/notes/{picnic}", json={"title": "Qwertyfin budget", "description": "Qwertyfin budget forecast"})
+    assert ids(client.get(f"/notes/{finance2}/similar", params={"limit": 1})) == [picnic]
+    client.delete(f"/notes/{picnic}")
+    assert picnic not in ids(client.get(f"/notes/{finance2}/similar", params={"limit": 10}))
+
+    strict = client.get("/notes/semantic-search", params={"q": "qwertyfin", "min_score": 0.99})
+    assert ids(strict) == []
+    assert client.get("/notes/999999/similar").status_code == 404
+    assert client.get("/notes/semantic-search", params={"q": " "}).status_code == 400
+
+
+def test_bulk_writes_and_rebuild_keep_vectors():
+    resp = client.post(
+        "/notes/bulk",
+        json=[
+            {"title": "Asdfbulk launch", "description": "Asdfbulk launch checklist", "status": "open",
+             "date": "2024-05-01T10:00:00Z", "action_items": []},
+            {"title": "Asdfbulk retro", "description": "Asdfbulk launch retro", "status": "open",
+             "date": "2024-05-01T10:00:00Z", "action_items": []},
+        ],
+    )
+    first, second = [r["id"] for r in resp.json()["results"]]
+    embeddings.index.ensure_loaded(database.ReadSessionLocal)
+    assert ids(client.get(f"/notes/{first}/similar", params={"limit": 1})) == [second]
+
+    client.patch("/notes/bulk", json=[{"id": second, "title": "Unrelated zxcv"}])
+    db = database.SessionLocal()
+    try:
+        stored = embeddings.from_blob(
+            db.query(models.Note.embedding).filter(models.Note.id == second).scalar()
+        )
+        assert np.allclose(stored, embed("Unrelated zxcv", "Asdfbulk launch retro"))
+
+        version = db.get(models.Note, second).version
+        assert embeddings.rebuild(db) >= 2
+        db.expire_all()
+        assert db.get(models.Note, second).version == version
+    finally:
+        db.close()
@@ -0,0 +1,112 @@
+import sqlite3
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app import migrations, stats
+from app.database import engine
+from app.main import app
+
+client = TestClient(app)
+
+
+def create_note(status, date, items=()):
+    payload = {"title": "Stats", "status": status, "date": date, "action_items": list(items)}
+    return client.post("/notes/", json=payload).json()["id"]
+
+
+def table_matches_full_aggregate():
+    with engine.connect() as conn:
+        kept = conn.execute(text(f"SELECT * FROM {stats.TABLE} ORDER BY day, status")).all()
+        fresh = conn.execute(text(f"SELECT * FROM ({stats.AGGREGATE}) ORDER BY day, status")).all()
+    return kept == fresh
+
+
+def get_stats(**params):
+    resp = client.get("/notes/stats", params=params)
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_counts_follow_every_write():
+    a = create_note("st-open", "2031-03-02T09:00:00Z", ["One", "Two"])
+    b = create_note("st-open", "2031-03-02T15:00:00Z", ["Three"])
+    create_note("st-done", "2031-03-10T09:00:00Z")
+    window = {"from": "2031-03-01", "to": "2031-03-31"}
+
+    body = get_stats(**window)
+    assert body == {
+        "notes": 3,
+        "action_items": 3,
+        "action_items_done": 0,
+        "by_status": {"st-done": 1, "st-open": 2},
+        "buckets": None,
+    }
+
+    items = client.get(f"/notes/{a}/action-items").json()
+    client.patch(f"/notes/action-items/{items[1]['id']}", json={"done": True})
+    assert get_stats(**window)["action_items_done"] == 1
+
+    # Moving a note to another status and day carries its surviving done item along
+    client.put(f"/notes/{a}", json={"status": "st-done", "date": "2031-03-10T10:00:00Z", "action_items": ["New", "Two"]})
+    body = get_stats(**window, granularity="day")
+    assert body["by_status"] == {"st-done": 2, "st-open": 1}
+    assert body["action_items_done"] == 1
+    assert [(b["period"], b["notes"], b["action_items_done"]) for b in body["buckets"]] == [
+        ("2031-03-02", 1, 0),
+        ("2031-03-10", 2, 1),
+    ]
+
+    # Replacing the done item drops it from the done count
+    client.put(f"/notes/{a}", json={"action_items": ["New", "Changed"]})
+    assert get_stats(**window)["action_items_done"] == 0
+
+    client.delete(f"/notes/{b}")
+    client.post("/notes/bulk", json=[{"title": "Bulk", "status": "st-open", "date": "2031-03-20T09:00:00Z", "action_items": ["x"]}])
+    body = get_stats(**window, status="st-open")
+    assert body["notes"] == 1 and body["action_items"] == 1
+    assert table_matches_full_aggregate()
+
+
+def test_week_and_month_buckets():
+    create_note("st-bucket", "2032-05-03T09:00:00Z")  # Monday
+    create_note("st-bucket", "2032-05-09T09:00:00Z", ["a"])  # Sunday, same week
+    create_note("st-bucket", "2032-05-10T09:00:00Z")  # next Monday
+    create_note("st-bucket", "2032-06-01T09:00:00Z")
+
+    weeks = get_stats(status="st-bucket", granularity="week")["buckets"]
+    assert [(w["period"], w["notes"], w["action_items"]) for w in weeks] == [
+        ("2032-05-03", 2, 1),
+        ("2032-05-10", 1, 0),
+        ("2032-05-31", 1, 0),
+    ]
+    months = get_stats(status="st-bucket", granularity="month")["buckets"]
+    assert [(m["period"], m["notes"], m["by_status"]) for m in months] == [
+        ("2032-05-01", 3, {"st-bucket": 3}),
+        ("2032-06-01", 1, {"st-bucket": 1}),
+    ]
+    assert client.get("/notes/stats", params={"granularity": "hour"}).status_code == 422
+
+
+def test_upgrade_computes_stats_for_existing_notes(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE notes (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, description TEXT, "
+        "status VARCHAR NOT NULL, date DATETIME NOT NULL, action_items JSON)"
+    )
+    conn.execute(
+        "INSERT INTO notes (title, status, date, action_items) VALUES "
+        "('A', 'open', '2024-01-01 09:00:00', '[\"x\", \"y\"]'), "
+        "('B', 'open', '2024-01-01 17:00:00', NULL), "
+        "('C', 'done', '2024-01-02 09:00:00', '[]')"
+    )
+    conn.commit()
+    conn.close()
+
+    old = create_engine(f"sqlite:///{path}")
+    migrations.upgrade(old)
+    migrations.upgrade(old)  # idempotent
+    with old.connect() as conn:
+        rows = conn.execute(text(f"SELECT * FROM {stats.TABLE} ORDER BY day, status")).all()
+    assert rows == [("2024-01-01", "open", 2, 2, 0), ("2024-01-02", "done", 1, 0, 0)]
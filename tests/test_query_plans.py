@@ -0,0 +1,97 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app import indexes, migrations, query_plan
+from app.database import engine
+from app.main import app
+
+client = TestClient(app)
+
+
+def create_note(status, date):
+    payload = {"title": "Plan", "status": status, "date": date, "action_items": ["Check"]}
+    return client.post("/notes/", json=payload).json()["id"]
+
+
+def exercise_notes_routes():
+    ids = [create_note("plan-open", f"2032-01-0{day}T09:00:00Z") for day in range(1, 4)]
+    create_note("plan-done", "2032-01-05T09:00:00Z")
+    window = {"date_from": "2032-01-01T00:00:00", "date_to": "2032-02-01T00:00:00"}
+    for params in (
+        {},
+        {"order_by": "date"},
+        {"order_by": "date", "descending": True},
+        {"status": "plan-open"},
+        {"status": "plan-open", "order_by": "date", "descending": True},
+        {"status": "plan-open", **window},
+        {**window, "order_by": "date"},
+        {"status": "plan-open", "fields": "id,title", "format": "ndjson"},
+    ):
+        first = client.get("/notes/", params={**params, "limit": 1})
+        assert first.status_code == 200
+        cursor = first.headers.get("X-Next-Cursor")
+        if cursor:
+            assert client.get("/notes/", params={**params, "limit": 1, "cursor": cursor}).status_code == 200
+    assert client.get(f"/notes/{ids[0]}").status_code == 200
+    assert client.get(f"/notes/{ids[0]}/enrichment").status_code == 200
+    assert client.get("/notes/changes", params={"since": 1, "limit": 2}).status_code == 200
+    assert client.put(f"/notes/{ids[0]}", json={"status": "plan-done"}).status_code == 200
+    assert client.delete(f"/notes/{ids[1]}").status_code == 200
+
+
+def test_notes_routes_never_scan_a_whole_table():
+    with query_plan.capture(engine) as statements:
+        exercise_notes_routes()
+    assert any(statement.lstrip().startswith("SELECT") for statement, _ in statements)
+
+    with engine.connect() as conn:
+        scans = {
+            statement: found
+            for statement, parameters in statements
+            if (found := query_plan.full_scans(conn, statement, parameters))
+        }
+    assert scans == {}
+
+
+def test_full_scans_flags_unindexed_filters():
+    with engine.connect() as conn:
+        assert query_plan.full_scans(conn, "SELECT id FROM notes WHERE description = ?", ("x",)) == ["SCAN notes"]
+        assert query_plan.full_scans(conn, "SELECT id FROM notes WHERE status = ?", ("x",)) == []
+        # An unfiltered page walks the primary key and stops at the limit
+        assert query_plan.full_scans(conn, "SELECT id FROM notes ORDER BY id LIMIT 10") == []
+        # Without an index for the order every row is read and sorted before the limit applies
+        assert query_plan.full_scans(conn, "SELECT id FROM notes ORDER BY description LIMIT 10") == ["SCAN notes"]
+
+
+def test_migration_adds_indexes_to_existing_tables(tmp_path):
+    old = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with old.begin() as conn:
+        conn.execute(text("CREATE TABLE notes (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, "
+                          "description TEXT, status VARCHAR NOT NULL, date DATETIME NOT NULL, action_items JSON)"))
+    migrations.upgrade(old)
+    with old.connect() as conn:
+        names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+    assert {"ix_notes_date_id", indexes.STATUS_DATE_INDEX} <= names
+    old.dispose()
+
+
+def test_partial_indexes_replace_the_status_composite(tmp_path):
+    db = create_engine(f"sqlite:///{tmp_path / 'partial.db'}")
+    migrations.upgrade(db)
+    listing = "SELECT id FROM notes WHERE status = ? ORDER BY date, id LIMIT 5"
+    with db.begin() as conn:
+        indexes.ensure_status_indexes(conn, ["open", "in progress"])
+        names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        assert {"ix_notes_partial_open", "ix_notes_partial_in_progress"} <= names
+        assert indexes.STATUS_DATE_INDEX not in names
+
+        assert query_plan.explain(conn, listing, ("open",)) == ["SCAN notes USING INDEX ix_notes_partial_open"]
+        assert query_plan.full_scans(conn, listing, ("open",)) == []
+        assert query_plan.full_scans(conn, listing.replace("?", "'closed'")) != []
+
+        # Back to the default layout
+        indexes.ensure_status_indexes(conn, [])
+        names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        assert indexes.STATUS_DATE_INDEX in names
+        assert not any(name.startswith(indexes.PARTIAL_PREFIX) for name in names)
+    db.dispose()
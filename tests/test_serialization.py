@@ -0,0 +1,49 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import response_cache, serialization
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def seeded():
+    ids = [
+        client.post(
+            "/notes/",
+            json={
+                "title": f"Sérialisé {i}",
+                "description": None if i else "Ünïcode description",
+                "status": "serialization",
+                "date": "2024-03-01T08:30:00Z",
+                "action_items": ["Ship it"],
+            },
+        ).json()["id"]
+        for i in range(3)
+    ]
+    client.put(f"/notes/{ids[0]}", json={"title": "Bumped"})
+    return ids
+
+
+def fetch_all(ids):
+    response_cache.cache.clear()
+    return [
+        client.get(f"/notes/{ids[0]}").content,
+        client.get("/notes/?status=serialization").content,
+        client.get("/notes/?status=serialization&fields=id,title,date,updated_at").content,
+    ]
+
+
+def test_fast_responses_match_the_validated_path_byte_for_byte(seeded, monkeypatch):
+    default = fetch_all(seeded)
+    monkeypatch.setattr(serialization, "FAST_RESPONSES", True)
+    fast = fetch_all(seeded)
+
+    assert fast == default
+    assert client.get("/notes/?status=serialization").json()[0]["title"] == "Bumped"
+
+
+def test_fast_read_note_404(monkeypatch):
+    monkeypatch.setattr(serialization, "FAST_RESPONSES", True)
+    assert client.get("/notes/999999").status_code == 404
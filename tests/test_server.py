@@ -0,0 +1,103 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import pytest
+
+from app import server
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork server needs os.fork")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 20.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+def test_options_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("SERVER_MAX_REQUESTS", "1000")
+    monkeypatch.setenv("SERVER_KEEPALIVE_TIMEOUT", "75")
+    monkeypatch.setenv("SERVER_HTTP", "h11")
+    args = server.parse_args(["--port", "9000"])
+    options = server.uvicorn_options(args)
+    assert args.workers == 3
+    assert options["port"] == 9000
+    assert options["limit_max_requests"] == 1000
+    assert options["timeout_keep_alive"] == 75
+    assert options["http"] == "h11"
+    assert options["loop"] in ("uvloop", "asyncio")
+
+
+def test_preload_flag_overrides_the_environment(monkeypatch):
+    monkeypatch.setenv("SERVER_PRELOAD", "false")
+    assert server.parse_args([]).preload is False
+    assert server.parse_args(["--preload"]).preload is True
+    monkeypatch.setenv("SERVER_PRELOAD", "true")
+    assert server.parse_args(["--no-preload"]).preload is False
+
+
+def test_workers_recycle_and_drain_in_flight_ai_calls(tmp_path):
+    api_port, fake_port = free_port(), free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{tmp_path / 'server.db'}",
+        AI_CACHE_PATH="",
+        OPENAI_API_KEY="test-key",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{fake_port}/v1",
+        OPENAI_MAX_RETRIES="0",
+    )
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_openai", "--port", str(fake_port), "--delay-ms", "1500"],
+        cwd=ROOT, env=env,
+    )
+    api = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(api_port),
+         "--workers", "2", "--max-requests", "5", "--graceful-timeout", "10", "--log-level", "warning"],
+        cwd=ROOT, env=env, stderr=subprocess.PIPE, text=True,
+    )
+    base = f"http://127.0.0.1:{api_port}"
+    try:
+        wait_for_port(fake_port)
+        wait_for_port(api_port)
+        # Both workers recycle at least once; every request is still served
+        assert [httpx.get(f"{base}/notes/").status_code for _ in range(20)] == [200] * 20
+
+        result = {}
+
+        def slow_ai_call():
+            result["response"] = httpx.post(
+                f"{base}/notes/ai-action-items", params={"description": "drain me"}, timeout=30
+            )
+
+        caller = threading.Thread(target=slow_ai_call)
+        caller.start()
+        time.sleep(0.5)
+        api.send_signal(signal.SIGTERM)
+        caller.join(timeout=30)
+        assert result["response"].status_code == 200
+        assert api.wait(timeout=30) == 0
+    finally:
+        for proc in (api, fake):
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()